@@ -0,0 +1,145 @@
+"""
+Deterministic stand-ins for Groq and MongoDB used by the benchmarks
+
+install() must run before anything creates the MongoDB client or the Groq
+chain. After it, the app's own code paths (LLM_Setup, the src.db queries,
+the exporters) run unchanged against a fake chat model with a fixed latency
+and output size, and against mongomock or a throwaway database on a real
+server.
+"""
+import random
+import time
+from datetime import datetime, timedelta
+
+SUBJECTS = ["Science", "Mathematics", "History", "English", "Geography", "Art", "Music", "Biology"]
+GRADES = ["Grade 3", "Grade 5", "Grade 7", "Grade 9", "Grade 11", "Bachelor's Degree"]
+
+
+def fake_plan_text(seed, size):
+    """Markdown lesson plan of about `size` characters, identical for the same seed"""
+    rng = random.Random(seed)
+    words = ["students", "observe", "energy", "model", "discuss", "record", "compare", "explain",
+             "**key**", "*idea*", "`term`", "evidence", "pattern", "predict", "measure", "summarise"]
+    parts = [f"# Lesson Plan {seed}\n"]
+    section = 0
+    while sum(map(len, parts)) < size:
+        section += 1
+        parts.append(f"\n## Section {section}\n")
+        parts.append(" ".join(rng.choice(words) for _ in range(40)) + ".\n")
+        parts.extend(f"- {' '.join(rng.choice(words) for _ in range(8))}\n" for _ in range(4))
+        parts.extend(f"{i}. {' '.join(rng.choice(words) for _ in range(6))}\n" for i in range(1, 4))
+        if section % 3 == 0:
+            parts.append("\n| Activity | Minutes | Notes |\n|---|---|---|\n")
+            parts.extend(f"| Step {i} | {5 * i} | {rng.choice(words)} |\n" for i in range(1, 5))
+    return "".join(parts)[:size]
+
+
+def make_fake_chat_model(latency=0.5, output_chars=6000, chunk_chars=40):
+    """A LangChain chat model that waits `latency` seconds and answers with a fake plan.
+
+    The answer is seeded from the prompt, so the same prompt always gets the
+    same text. Streaming spreads the latency over the chunks. Token usage is
+    reported like Groq does (about four characters per token).
+    """
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import AIMessage, AIMessageChunk
+    from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+    def prompt_of(messages):
+        return "".join(str(m.content) for m in messages)
+
+    def usage(prompt, text):
+        return {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(text) // 4,
+                "total_tokens": (len(prompt) + len(text)) // 4}
+
+    class FakeChatModel(BaseChatModel):
+        @property
+        def _llm_type(self):
+            return "fake-groq"
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+            prompt = prompt_of(messages)
+            text = fake_plan_text(prompt, output_chars)
+            time.sleep(latency)
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))],
+                              llm_output={"token_usage": usage(prompt, text)})
+
+        def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+            prompt = prompt_of(messages)
+            text = fake_plan_text(prompt, output_chars)
+            pieces = [text[i:i + chunk_chars] for i in range(0, len(text), chunk_chars)] or [""]
+            for piece in pieces:
+                time.sleep(latency / len(pieces))
+                chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+                if run_manager:
+                    run_manager.on_llm_new_token(piece, chunk=chunk)
+                yield chunk
+            counts = usage(prompt, text)
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata={
+                "input_tokens": counts["prompt_tokens"], "output_tokens": counts["completion_tokens"],
+                "total_tokens": counts["total_tokens"]}))
+
+    return FakeChatModel()
+
+
+def _copy_projections(collection_class):
+    """mongomock adds `_id` to the projection dict it is given, which breaks when
+    several threads share one (e.g. plans.CARD_FIELDS); hand it a copy instead"""
+    original = collection_class.find
+
+    def find(self, filter=None, projection=None, *args, **kwargs):
+        if isinstance(projection, dict):
+            projection = dict(projection)
+        return original(self, filter, projection, *args, **kwargs)
+
+    collection_class.find = find
+
+
+def install(latency=0.5, output_chars=6000, mongo_uri=None, database=None):
+    """Swap Groq for the fake model and MongoDB for mongomock (or `mongo_uri`)"""
+    import pymongo
+    from langchain_core.output_parsers import StrOutputParser
+
+    from src.config.settings import Settings
+    from src.utils import llm
+
+    if mongo_uri:
+        Settings.MONGODB_URI = mongo_uri
+    else:
+        import mongomock
+        pymongo.MongoClient = mongomock.MongoClient
+        _copy_projections(mongomock.collection.Collection)
+    if database:
+        Settings.DATABASE_NAME = database
+
+    # No real rate limit to respect, and every call should reach the model
+    Settings.GROQ_API_KEY = "benchmark"
+    Settings.GROQ_REQUESTS_PER_MINUTE = 10 ** 9
+    Settings.GROQ_RATE_BURST = 10 ** 6
+    Settings.LLM_CACHE_BACKEND = "none"
+
+    chain = make_fake_chat_model(latency, output_chars) | StrOutputParser()
+    llm.get_llm_chain = lambda *args, **kwargs: chain
+    return chain
+
+
+def seed_plans(collection, username, count, content_chars=2000, seed=0):
+    """Insert `count` plans for `username` spread over the last year, in batches"""
+    rng = random.Random(f"{username}-{seed}")
+    now = datetime.now()
+    batch = []
+    for i in range(count):
+        batch.append({
+            "username": username,
+            "subject": rng.choice(SUBJECTS),
+            "topic": f"Topic {i}",
+            "grade": rng.choice(GRADES),
+            "duration": f"{rng.choice([30, 45, 60, 90])} minutes",
+            "content": fake_plan_text(f"{username}-{i}", content_chars),
+            "created_at": now - timedelta(minutes=rng.randrange(365 * 24 * 60)),
+        })
+        if len(batch) == 500:
+            collection.insert_many(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch)
@@ -0,0 +1,177 @@
+"""
+Measure the app's cold-start import time and time to first paint
+
+Each scenario runs in a fresh interpreter under `python -X importtime`. The
+report gives the median wall time over --runs, the total import time, and
+the heaviest top-level imports.
+
+Scenarios:
+    cold_start    every module streamlit.py imports at the top level (read from its source)
+    first_export  cold_start, then render one PDF and one Word file
+    first_llm     cold_start, then build the Groq chain (no request is sent)
+    first_paint   run streamlit.py once headless via AppTest, up to the login page
+                  (MongoDB is replaced by mongomock, which must be installed)
+
+Usage:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --runs 5 --top 15
+    python benchmarks/import_time.py --scenario cold_start --json
+    python benchmarks/import_time.py --save import_baseline.json
+    python benchmarks/import_time.py --compare import_baseline.json
+"""
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "streamlit.py")
+
+# Scripts run from a scratch directory with the repo appended to sys.path, so
+# `import streamlit` finds the package rather than the app's streamlit.py
+PRELUDE = f"import sys; sys.path.append({ROOT!r})\n"
+
+SAMPLE_PLAN = (
+    "{'subject': 'Science', 'topic': 'Photosynthesis', 'grade': 'Grade 5', 'duration': '45 minutes',"
+    " 'content': '# Overview\\n- Light\\n- Water\\n1. Observe\\n| Step | Time |\\n|---|---|\\n| Intro | 5 |'}"
+)
+
+
+def app_imports(path=APP):
+    """Module names imported at the top level of the app script, including its try/except block"""
+    with open(path, encoding="utf-8") as fh:
+        tree = ast.parse(fh.read())
+    statements = []
+    for node in tree.body:
+        statements.extend(node.body if isinstance(node, ast.Try) else [node])
+    modules = []
+    for node in statements:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def scenario_code(name):
+    imports = "".join(f"import {module}\n" for module in app_imports())
+    if name == "cold_start":
+        return imports
+    if name == "first_export":
+        return imports + (
+            "from src.utils.export import generate_pdf, generate_word_doc\n"
+            f"plan = {SAMPLE_PLAN}\n"
+            "generate_pdf(plan); generate_word_doc(plan)\n"
+        )
+    if name == "first_llm":
+        return imports + (
+            "from src.utils.llm import get_llm_chain\n"
+            "get_llm_chain(api_key='benchmark-key')\n"
+        )
+    if name == "first_paint":
+        return (
+            "import mongomock, pymongo\n"
+            "pymongo.MongoClient = mongomock.MongoClient\n"
+            "from streamlit.testing.v1 import AppTest\n"
+            f"AppTest.from_file({APP!r}, default_timeout=120).run()\n"
+        )
+    raise ValueError(name)
+
+
+SCENARIOS = ("cold_start", "first_export", "first_llm", "first_paint")
+
+
+def parse_importtime(stderr):
+    """(total_us, {top-level module: cumulative_us}) from -X importtime output"""
+    top = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            # Top-level entries have a single leading space; nested ones are indented further
+            top[name.strip()] = top.get(name.strip(), 0) + int(cumulative)
+    return sum(top.values()), top
+
+
+def run_scenario(name, runs):
+    code = PRELUDE + scenario_code(name)
+    walls, totals, tops = [], [], []
+    with tempfile.TemporaryDirectory() as scratch:
+        for _ in range(runs):
+            started = time.perf_counter()
+            proc = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", code],
+                cwd=scratch, capture_output=True, text=True
+            )
+            wall = time.perf_counter() - started
+            if proc.returncode != 0:
+                error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "unknown error"
+                return {"scenario": name, "error": error}
+            total, top = parse_importtime(proc.stderr)
+            walls.append(wall)
+            totals.append(total)
+            tops.append(top)
+    median_top = {
+        module: statistics.median(t.get(module, 0) for t in tops) for module in set().union(*tops)
+    }
+    return {
+        "scenario": name,
+        "runs": runs,
+        "wall_ms": statistics.median(walls) * 1000,
+        "import_ms": statistics.median(totals) / 1000,
+        "top_imports_ms": {m: us / 1000 for m, us in sorted(median_top.items(), key=lambda kv: -kv[1])},
+    }
+
+
+def print_report(results, top, baseline=None):
+    baseline = {r["scenario"]: r for r in (baseline or []) if "error" not in r}
+    for result in results:
+        print(f"\n== {result['scenario']} ==")
+        if "error" in result:
+            print(f"  failed: {result['error']}")
+            continue
+        line = f"  wall {result['wall_ms']:.0f} ms, imports {result['import_ms']:.0f} ms (median of {result['runs']})"
+        previous = baseline.get(result["scenario"])
+        if previous:
+            line += (f"  [baseline wall {previous['wall_ms']:.0f} ms ({result['wall_ms'] - previous['wall_ms']:+.0f}),"
+                     f" imports {previous['import_ms']:.0f} ms ({result['import_ms'] - previous['import_ms']:+.0f})]")
+        print(line)
+        for module, ms in list(result["top_imports_ms"].items())[:top]:
+            print(f"    {ms:8.1f} ms  {module}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenario", choices=SCENARIOS, action="append",
+                        help="Scenario to run (repeatable); default: all")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per scenario (default: 3)")
+    parser.add_argument("--top", type=int, default=10, help="Heaviest imports to list per scenario")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--save", metavar="FILE", help="Write results to FILE as a baseline")
+    parser.add_argument("--compare", metavar="FILE", help="Show differences from a saved baseline")
+    args = parser.parse_args()
+
+    results = [run_scenario(name, args.runs) for name in (args.scenario or SCENARIOS)]
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        baseline = None
+        if args.compare:
+            with open(args.compare, encoding="utf-8") as fh:
+                baseline = json.load(fh)
+        print_report(results, args.top, baseline)
+    return 1 if any("error" in r for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,311 @@
+"""
+Simulate many concurrent teacher sessions against streamlit.py, headless
+
+Every virtual user is a Streamlit AppTest session running the real app
+script in this process, the way one server process hosts many browser
+sessions. Groq is replaced by the fake chat model and MongoDB by mongomock
+(see benchmarks/fakes.py). Each user logs in and then repeats this flow
+with a think time between steps: open Create Plan, generate a plan, save
+it, prepare the PDF, browse My Plans.
+
+Reported:
+    latency       p50/p95/p99 per step and overall (the full rerun, as the browser waits for it)
+    cpu/action    process CPU time divided by actions taken
+    sessions/core target utilisation x (think time + mean step latency) / cpu per action,
+                  i.e. how many users one core keeps up with at that pace
+    memory        resident memory added per live session
+
+AppTest also decodes every rerun's output in-process, work a browser would
+do, so CPU per action is an upper bound. With the default EXPORT_WORKERS=0,
+exports render in this process and count towards its CPU.
+
+Usage:
+    pip install mongomock
+    python benchmarks/load_test.py --users 20
+    python benchmarks/load_test.py --users 50 --iterations 5 --think-ms 5000 --latency-ms 1500
+    python benchmarks/load_test.py --users 50 --expected-sessions 400 --save load_baseline.json
+    python benchmarks/load_test.py --users 50 --compare load_baseline.json
+"""
+import argparse
+import gc
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.dirname(ROOT)
+APP = os.path.join(REPO, "streamlit.py")
+
+sys.path.append(REPO)
+
+import fakes  # noqa: E402
+from suite import percentile  # noqa: E402
+
+PASSWORD = "load-test-password"
+STEPS = ("open", "login", "create_plan", "generate", "save", "export_pdf", "my_plans")
+
+
+def current_rss_mb():
+    """Resident memory now (Linux); falls back to the peak elsewhere"""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        from suite import peak_rss_mb
+        return peak_rss_mb()
+
+
+def share_app_test_runtime():
+    """Let AppTest sessions run concurrently in one process, as a server's sessions do.
+
+    AppTest assumes one test at a time: each run installs a fresh mock Runtime
+    as the process-wide instance, clears it again afterwards, and recompiles
+    the script. Here every run gets one shared mock runtime (media files,
+    st.cache_data storage) and one script cache, installed once, so runs on
+    different threads cannot pull the runtime out from under each other.
+    """
+    from unittest.mock import MagicMock
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.testing.v1 import app_test, local_script_runner
+
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.dataframe_source_mgr = app_test.DataframeSourceManager()
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    runtime.bidi_component_registry = app_test.BidiComponentManager()
+    # No browser behind these sessions: st.context (cookies, headers) reads as empty
+    runtime.get_client.return_value = None
+    Runtime._instance = runtime
+
+    class PerRunRuntime:
+        # Receives AppTest's per-run install and reset, leaving the shared instance alone
+        _instance = None
+
+    script_cache = app_test.ScriptCache()
+    app_test.Runtime = PerRunRuntime
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: script_cache
+    # AppTest toggles this around each run; with it already on, concurrent runs cannot turn it off
+    config.set_option("global.appTest", True)
+
+
+def _button(at, label):
+    return next(b for b in at.button if b.label == label)
+
+
+class VirtualUser:
+    """One teacher's browser session, driven through AppTest"""
+
+    def __init__(self, username, think, seed):
+        from streamlit.testing.v1 import AppTest
+        self.username = username
+        self.think = think
+        self.rng = random.Random(seed)
+        self.at = AppTest.from_file(APP, default_timeout=300)
+
+    def _step(self, name, action, record):
+        started = time.perf_counter()
+        error = None
+        try:
+            action()
+            if self.at.exception:
+                error = self.at.exception[0].value
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+        record(name, time.perf_counter() - started, error)
+        # Jittered think time, so sessions do not move in lockstep
+        time.sleep(self.think * self.rng.uniform(0.5, 1.5))
+        return error is None
+
+    def login(self, record):
+        at = self.at
+        if not self._step("open", at.run, record):
+            return False
+
+        def login():
+            at.text_input(key="login_username").input(self.username)
+            at.text_input(key="login_password").input(PASSWORD)
+            at.button(key="login_btn").click().run()
+        return self._step("login", login, record) and at.session_state["logged_in"]
+
+    def plan_flow(self, iteration, record):
+        at = self.at
+
+        def generate():
+            at.text_input(key="subject").input(self.rng.choice(fakes.SUBJECTS))
+            at.text_input(key="topic").input(f"{self.username} topic {iteration}")
+            at.text_input(key="duration").input("45 minutes")
+            at.text_area(key="learning_objectives").input("Understand the key ideas and apply them")
+            _button(at, "🚀 Generate Lesson Plan").click().run()
+
+        steps = [
+            ("create_plan", lambda: at.sidebar.radio[0].set_value("📝 Create Plan").run()),
+            ("generate", generate),
+            ("save", lambda: _button(at, "💾 Save Plan").click().run()),
+            ("export_pdf", lambda: at.button(key="prepare_plan_pdf").click().run()),
+            ("my_plans", lambda: at.sidebar.radio[0].set_value("📚 My Plans").run()),
+        ]
+        for name, action in steps:
+            if not self._step(name, action, record):
+                return False
+        return True
+
+
+def run_load(args):
+    fakes.install(args.latency_ms / 1000.0, args.output_chars)
+    share_app_test_runtime()
+    from src.config.settings import Settings
+    from src.db import get_users_collection
+    from src.utils.auth import register_user
+
+    Settings.EXPORT_WORKERS = args.export_workers
+    if args.bcrypt_rounds:
+        Settings.BCRYPT_ROUNDS = args.bcrypt_rounds
+    users = get_users_collection()
+    usernames = [f"teacher{i}" for i in range(args.users + 1)]
+    for username in usernames:
+        register_user(users, username, PASSWORD)
+
+    # One unrecorded session first, so imports and process-wide caches are warm
+    warm = VirtualUser(usernames[-1], 0, seed=-1)
+    if warm.login(lambda *a: None):
+        warm.plan_flow(0, lambda *a: None)
+    del warm
+    gc.collect()
+    rss_base = current_rss_mb()
+
+    samples = []
+    lock = threading.Lock()
+
+    def record(step, seconds, error):
+        with lock:
+            samples.append((step, seconds, error))
+
+    sessions = []
+
+    def run_user(i):
+        user = VirtualUser(usernames[i], args.think_ms / 1000.0, seed=i)
+        with lock:
+            sessions.append(user)
+        if user.login(record):
+            for iteration in range(args.iterations):
+                if not user.plan_flow(iteration, record):
+                    break
+
+    threads = [threading.Thread(target=run_user, args=(i,), name=f"vuser-{i}") for i in range(args.users)]
+    cpu_started, wall_started = time.process_time(), time.perf_counter()
+    for thread in threads:
+        thread.start()
+        time.sleep(args.ramp_s / max(1, args.users))
+    for thread in threads:
+        thread.join()
+    cpu, wall = time.process_time() - cpu_started, time.perf_counter() - wall_started
+
+    # Every session is still referenced here, as a server keeps them until they disconnect
+    gc.collect()
+    memory_per_session = (current_rss_mb() - rss_base) / max(1, len(sessions))
+    return summarise(samples, cpu, wall, memory_per_session, args)
+
+
+def summarise(samples, cpu, wall, memory_per_session, args):
+    by_step = {}
+    for step, seconds, error in samples:
+        entry = by_step.setdefault(step, {"latencies": [], "errors": 0})
+        entry["latencies"].append(seconds)
+        entry["errors"] += error is not None
+    steps = {}
+    for step in STEPS:
+        if step in by_step:
+            ordered = sorted(by_step[step]["latencies"])
+            steps[step] = {"count": len(ordered), "errors": by_step[step]["errors"],
+                           "p50_ms": percentile(ordered, 50) * 1000, "p95_ms": percentile(ordered, 95) * 1000,
+                           "p99_ms": percentile(ordered, 99) * 1000}
+    ordered = sorted(s for _, s, _ in samples) or [0.0]
+    actions = len(samples)
+    cpu_per_action = cpu / actions if actions else 0.0
+    mean_latency = sum(ordered) / len(ordered)
+    sessions_per_core = (args.target_util * (args.think_ms / 1000.0 + mean_latency) / cpu_per_action
+                         if cpu_per_action else 0.0)
+    result = {
+        "users": args.users,
+        "params": {k: getattr(args, k) for k in ("iterations", "think_ms", "latency_ms", "output_chars",
+                                                  "export_workers", "bcrypt_rounds", "target_util")},
+        "actions": actions,
+        "errors": sum(e is not None for _, _, e in samples),
+        "actions_per_s": actions / wall if wall else 0.0,
+        "p50_ms": percentile(ordered, 50) * 1000,
+        "p95_ms": percentile(ordered, 95) * 1000,
+        "p99_ms": percentile(ordered, 99) * 1000,
+        "cpu_ms_per_action": cpu_per_action * 1000,
+        "sessions_per_core": sessions_per_core,
+        "memory_mb_per_session": memory_per_session,
+        "steps": steps,
+    }
+    if args.expected_sessions and sessions_per_core:
+        result["cores_needed"] = math.ceil(args.expected_sessions / sessions_per_core)
+        result["memory_mb_needed"] = args.expected_sessions * memory_per_session
+    return result
+
+
+def print_report(result, baseline=None):
+    print(f"{result['users']} users, {result['actions']} actions, {result['errors']} errors, "
+          f"{result['actions_per_s']:.1f} actions/s")
+    print(f"\n{'step':<12}{'count':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for step, s in result["steps"].items():
+        print(f"{step:<12}{s['count']:>7}{s['errors']:>8}{s['p50_ms']:>10.0f}{s['p95_ms']:>10.0f}{s['p99_ms']:>10.0f}")
+    print(f"{'all':<12}{result['actions']:>7}{result['errors']:>8}{result['p50_ms']:>10.0f}"
+          f"{result['p95_ms']:>10.0f}{result['p99_ms']:>10.0f}")
+    print(f"\ncpu per action     {result['cpu_ms_per_action']:.1f} ms")
+    print(f"sessions per core  {result['sessions_per_core']:.1f} "
+          f"(at {result['params']['target_util']:.0%} utilisation, {result['params']['think_ms']} ms think time)")
+    print(f"memory per session {result['memory_mb_per_session']:.2f} MB")
+    if "cores_needed" in result:
+        print(f"for the expected sessions: {result['cores_needed']} cores, {result['memory_mb_needed']:.0f} MB")
+    if baseline:
+        for key in ("p95_ms", "p99_ms", "cpu_ms_per_action", "sessions_per_core", "memory_mb_per_session"):
+            if baseline.get(key):
+                print(f"  {key} vs baseline: {(result[key] - baseline[key]) / baseline[key] * 100:+.0f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--iterations", type=int, default=3, help="Plan flows per user after logging in")
+    parser.add_argument("--think-ms", type=int, default=2000, help="Mean pause between a user's steps")
+    parser.add_argument("--ramp-s", type=float, default=5.0, help="Spread user start-up over this many seconds")
+    parser.add_argument("--latency-ms", type=int, default=1500, help="Fake model latency per call")
+    parser.add_argument("--output-chars", type=int, default=6000, help="Fake model output size")
+    parser.add_argument("--export-workers", type=int, default=0,
+                        help="EXPORT_WORKERS for the run (default 0, so export CPU is counted)")
+    parser.add_argument("--bcrypt-rounds", type=int, help="BCRYPT_ROUNDS for the run (default: Settings)")
+    parser.add_argument("--target-util", type=float, default=0.7, help="CPU utilisation to plan for")
+    parser.add_argument("--expected-sessions", type=int, help="Also print cores and memory for this many sessions")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--save", metavar="FILE", help="Write results to FILE as a baseline")
+    parser.add_argument("--compare", metavar="FILE", help="Show differences from a saved baseline")
+    args = parser.parse_args()
+
+    result = run_load(args)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as fh:
+            json.dump(result, fh, indent=2)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        baseline = None
+        if args.compare:
+            with open(args.compare, encoding="utf-8") as fh:
+                baseline = json.load(fh)
+        print_report(result, baseline)
+    return 1 if result["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
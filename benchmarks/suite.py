@@ -0,0 +1,281 @@
+"""
+Benchmark the app's hot paths offline against a fake Groq model and mongomock
+
+Each scenario runs in a fresh interpreter (see benchmarks/fakes.py for the
+stand-ins) and reports throughput, p50/p95/p99 latency per operation and the
+peak resident memory of that interpreter.
+
+Scenarios:
+    llm_setup     LLM_Setup() from concurrent sessions, fake model latency and output size
+    save_plans    insert a plan and invalidate the user's cached stats, as "Save Plan" does
+    list_plans    My Plans landing: first page, total count, grades and dashboard stats
+    filter_plans  My Plans with grade/search filters, sort options and paging
+    export_pdf    generate_pdf() for a plan of --output-chars
+    export_docx   generate_word_doc() for a plan of --output-chars
+
+Usage:
+    pip install mongomock
+    python benchmarks/suite.py
+    python benchmarks/suite.py --scenario list_plans --plans-per-user 5000 --sessions 100
+    python benchmarks/suite.py --save bench_baseline.json
+    python benchmarks/suite.py --compare bench_baseline.json --fail-over 20
+    python benchmarks/suite.py --mongo-uri mongodb://localhost:27017/   # real server, throwaway database
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.dirname(ROOT)
+
+# ops: timed operations; sessions: threads issuing them concurrently
+SCENARIOS = {
+    "llm_setup": {"ops": 200, "sessions": 50, "latency_ms": 500, "output_chars": 6000},
+    "save_plans": {"ops": 1000, "sessions": 1, "output_chars": 6000},
+    "list_plans": {"ops": 200, "sessions": 50, "plans_per_user": 1000, "users": 5},
+    "filter_plans": {"ops": 200, "sessions": 50, "plans_per_user": 1000, "users": 5},
+    "export_pdf": {"ops": 20, "sessions": 1, "output_chars": 6000},
+    "export_docx": {"ops": 20, "sessions": 1, "output_chars": 6000},
+}
+
+OVERRIDES = ("ops", "sessions", "latency_ms", "output_chars", "plans_per_user")
+
+
+def percentile(ordered, pct):
+    return ordered[min(len(ordered) - 1, int(pct / 100.0 * len(ordered)))]
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _run_ops(op, ops, sessions):
+    """Call op(i) `ops` times from `sessions` threads; (latencies, wall seconds)"""
+    latencies = []
+    lock = threading.Lock()
+
+    def timed_op(i):
+        started = time.perf_counter()
+        op(i)
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+
+    started = time.perf_counter()
+    if sessions <= 1:
+        for i in range(ops):
+            timed_op(i)
+    else:
+        with ThreadPoolExecutor(max_workers=sessions) as pool:
+            list(pool.map(timed_op, range(ops)))
+    return latencies, time.perf_counter() - started
+
+
+def _prepare(name, params, mongo_uri):
+    """Install the fakes, seed data and return op(i) for one scenario"""
+    sys.path.append(REPO)
+    import fakes
+
+    database = f"bench_{os.getpid()}" if mongo_uri else None
+    fakes.install(params.get("latency_ms", 0) / 1000.0, params.get("output_chars", 6000), mongo_uri, database)
+
+    from src.db import ensure_indexes, get_database, get_plans_collection
+    from src.db.plans import count_plans, list_plan_cards, list_plan_grades
+
+    db = get_database()
+    if mongo_uri:
+        ensure_indexes(db)
+    plans = get_plans_collection()
+    users = [f"user{u}" for u in range(params.get("users", 1))]
+    for username in users:
+        fakes.seed_plans(plans, username, params.get("plans_per_user", 0))
+
+    if name == "llm_setup":
+        from src.utils.llm import LLM_Setup
+        return lambda i: LLM_Setup(f"Generate a lesson plan, request {i}"), db
+
+    if name == "save_plans":
+        from datetime import datetime
+        from src.db.stats import invalidate_plan_stats
+        content = fakes.fake_plan_text("save", params["output_chars"])
+
+        def save(i):
+            plans.insert_one({"username": "user0", "subject": "Science", "topic": f"Topic {i}",
+                              "grade": "Grade 5", "duration": "45 minutes", "content": content,
+                              "created_at": datetime.now()})
+            invalidate_plan_stats("user0")
+        return save, db
+
+    if name == "list_plans":
+        from src.db.stats import compute_plan_stats
+
+        def landing(i):
+            username = users[i % len(users)]
+            list_plan_cards(plans, username)
+            count_plans(plans, username)
+            list_plan_grades(plans, username)
+            compute_plan_stats(plans, username)
+        return landing, db
+
+    if name == "filter_plans":
+        # mongomock has no collation support, so subject sorts need a real server
+        sorts = ["Newest First", "Oldest First"] + (["Subject A-Z", "Subject Z-A"] if mongo_uri else [])
+        searches = [None, "topic 1", "science"]
+
+        def browse(i):
+            username = users[i % len(users)]
+            grade = fakes.GRADES[i % len(fakes.GRADES)]
+            search = searches[i % len(searches)]
+            after = None
+            for _ in range(3):
+                _, after = list_plan_cards(plans, username, search=search, grade=grade,
+                                           sort=sorts[i % len(sorts)], after=after)
+                if after is None:
+                    break
+            count_plans(plans, username, search=search, grade=grade)
+        return browse, db
+
+    if name in ("export_pdf", "export_docx"):
+        from src.utils.export import generate_pdf, generate_word_doc
+        render = generate_pdf if name == "export_pdf" else generate_word_doc
+        plan = {"subject": "Science", "topic": "Photosynthesis", "grade": "Grade 5", "duration": "45 minutes",
+                "content": fakes.fake_plan_text("export", params["output_chars"]),
+                "created_at": "January 01, 2025 at 09:00 AM"}
+        if not render(plan):
+            raise RuntimeError(f"{name}: exporter unavailable (is its library installed?)")
+        return lambda i: render(plan), db
+
+    raise ValueError(name)
+
+
+def run_one(name, params, mongo_uri=None):
+    """Run a scenario in this interpreter and return its result dict"""
+    op, db = _prepare(name, params, mongo_uri)
+    try:
+        latencies, wall = _run_ops(op, params["ops"], params["sessions"])
+    finally:
+        if mongo_uri:
+            db.client.drop_database(db.name)
+    ordered = sorted(latencies)
+    return {
+        "scenario": name,
+        "params": params,
+        "ops": len(ordered),
+        "throughput_per_s": len(ordered) / wall if wall else 0.0,
+        "p50_ms": percentile(ordered, 50) * 1000,
+        "p95_ms": percentile(ordered, 95) * 1000,
+        "p99_ms": percentile(ordered, 99) * 1000,
+        "mean_ms": statistics.mean(ordered) * 1000,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_scenario(name, params, mongo_uri=None):
+    """Run one scenario in a fresh interpreter, so peak memory and imports are its own"""
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", name, "--params", json.dumps(params)]
+    if mongo_uri:
+        cmd += ["--mongo-uri", mongo_uri]
+    with tempfile.TemporaryDirectory() as scratch:
+        # Run from a scratch directory so `import streamlit` is not the app script
+        proc = subprocess.run(cmd, cwd=scratch, capture_output=True, text=True)
+    if proc.returncode != 0:
+        lines = proc.stderr.strip().splitlines()
+        return {"scenario": name, "params": params, "error": lines[-1] if lines else "unknown error"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def compare(result, previous):
+    """Percentage change from the baseline for latency and throughput (positive latency = slower)"""
+    def change(key):
+        return (result[key] - previous[key]) / previous[key] * 100 if previous.get(key) else 0.0
+    return {"p50_ms": change("p50_ms"), "p95_ms": change("p95_ms"), "throughput_per_s": change("throughput_per_s")}
+
+
+def print_report(results, baseline=None):
+    baseline = {r["scenario"]: r for r in (baseline or []) if "error" not in r}
+    print(f"{'scenario':<14}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'peak MB':>10}")
+    for result in results:
+        if "error" in result:
+            print(f"{result['scenario']:<14}  failed: {result['error']}")
+            continue
+        peak = f"{result['peak_rss_mb']:.0f}" if result["peak_rss_mb"] is not None else "n/a"
+        print(f"{result['scenario']:<14}{result['throughput_per_s']:>10.1f}{result['p50_ms']:>10.1f}"
+              f"{result['p95_ms']:>10.1f}{result['p99_ms']:>10.1f}{peak:>10}")
+        previous = baseline.get(result["scenario"])
+        if previous:
+            delta = compare(result, previous)
+            print(f"{'  vs baseline':<14}{delta['throughput_per_s']:>+9.0f}%{delta['p50_ms']:>+9.0f}%"
+                  f"{delta['p95_ms']:>+9.0f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenario", choices=list(SCENARIOS), action="append",
+                        help="Scenario to run (repeatable); default: all")
+    parser.add_argument("--ops", type=int, help="Operations per scenario")
+    parser.add_argument("--sessions", type=int, help="Concurrent sessions (threads)")
+    parser.add_argument("--latency-ms", type=int, help="Fake model latency per call")
+    parser.add_argument("--output-chars", type=int, help="Fake model output and exported plan size")
+    parser.add_argument("--plans-per-user", type=int, help="Plans seeded per user for the query scenarios")
+    parser.add_argument("--mongo-uri", help="Use this MongoDB server (throwaway database) instead of mongomock")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--save", metavar="FILE", help="Write results to FILE as a baseline")
+    parser.add_argument("--compare", metavar="FILE", help="Show differences from a saved baseline")
+    parser.add_argument("--fail-over", type=float, metavar="PCT",
+                        help="With --compare, exit 1 if any p95 is more than PCT%% slower")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--params", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        sys.path.insert(0, ROOT)
+        print(json.dumps(run_one(args.child, json.loads(args.params), args.mongo_uri)))
+        return 0
+
+    results = []
+    for name in args.scenario or SCENARIOS:
+        params = dict(SCENARIOS[name])
+        for key in OVERRIDES:
+            value = getattr(args, key)
+            if value is not None and key in params:
+                params[key] = value
+        results.append(run_scenario(name, params, args.mongo_uri))
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results, baseline)
+
+    failed = any("error" in r for r in results)
+    if baseline and args.fail_over is not None:
+        previous = {r["scenario"]: r for r in baseline if "error" not in r}
+        for result in results:
+            if "error" not in result and result["scenario"] in previous:
+                if compare(result, previous[result["scenario"]])["p95_ms"] > args.fail_over:
+                    print(f"Regression: {result['scenario']} p95 is more than {args.fail_over:.0f}% slower")
+                    failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+"""
+Create, verify and report usage of the app's MongoDB indexes
+
+Usage:
+    python scripts/manage_indexes.py ensure
+    python scripts/manage_indexes.py verify
+    python scripts/manage_indexes.py stats
+"""
+import argparse
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.db.connection import get_database
+from src.db.indexes import ensure_indexes, verify_indexes, index_usage_stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("command", choices=["ensure", "verify", "stats"])
+    args = parser.parse_args()
+    db = get_database()
+
+    if args.command == "ensure":
+        problems = ensure_indexes(db)
+        for problem in problems:
+            print(f"WARNING: {problem}")
+        print("Indexes ensured." if not problems else f"{len(problems)} index(es) could not be created.")
+        return 1 if problems else 0
+
+    if args.command == "verify":
+        missing = verify_indexes(db)
+        for collection, names in missing.items():
+            print(f"{collection}: missing {', '.join(names)}")
+        print("All indexes present." if not missing else "Run `ensure` to create missing indexes.")
+        return 1 if missing else 0
+
+    stats = index_usage_stats(db)
+    width = max([len(f"{s['collection']}.{s['name']}") for s in stats] + [10])
+    print(f"{'index'.ljust(width)}  {'ops':>10}  since")
+    for s in sorted(stats, key=lambda s: s["ops"], reverse=True):
+        print(f"{(s['collection'] + '.' + s['name']).ljust(width)}  {s['ops']:>10}  {s['since']:%Y-%m-%d %H:%M}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
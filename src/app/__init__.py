@@ -0,0 +1,10 @@
+"""
+Streamlit UI helpers for AI Lesson Planner
+"""
+from .downloads import deferred_download_button
+from .session_cookie import read_session_cookie, set_session_cookie, clear_session_cookie, sync_session_cookie
+from .theme import apply_theme, compile_stylesheet
+from .timing_panel import timing_panel
+
+__all__ = ['deferred_download_button', 'apply_theme', 'compile_stylesheet', 'timing_panel',
+           'read_session_cookie', 'set_session_cookie', 'clear_session_cookie', 'sync_session_cookie']
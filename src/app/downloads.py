@@ -0,0 +1,41 @@
+"""
+Download buttons that build their file only when asked
+"""
+import streamlit as st
+
+# Prepared files are kept per session so the download button survives reruns;
+# only the most recent few are retained
+MAX_PREPARED_PER_SESSION = 8
+
+
+def deferred_download_button(label, render, file_name, mime, key, token, prepare_label=None):
+    """Show a "prepare" button that renders the file on click, then a download button.
+
+    `render()` returns the file bytes and is only called when the user asks for
+    the file. `token` identifies the content being exported (e.g. a content hash
+    or plan id plus format); a prepared file is discarded when the token changes.
+    """
+    prepared = st.session_state.setdefault("prepared_exports", {})
+    entry = prepared.get(key)
+    if entry is not None and entry[0] == token:
+        st.download_button(
+            label=label,
+            data=entry[1],
+            file_name=file_name,
+            mime=mime,
+            key=f"download_{key}",
+            use_container_width=True
+        )
+        return
+
+    if st.button(prepare_label or f"⚙️ Prepare {label.split(' ', 1)[-1]}", key=f"prepare_{key}", use_container_width=True):
+        with st.spinner("Preparing file..."):
+            data = render()
+        if not data:
+            st.error("❌ Could not generate this file.")
+            return
+        prepared.pop(key, None)
+        prepared[key] = (token, data)
+        while len(prepared) > MAX_PREPARED_PER_SESSION:
+            prepared.pop(next(iter(prepared)))
+        st.rerun()
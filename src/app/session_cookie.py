@@ -0,0 +1,48 @@
+"""
+Keep the login session token in a browser cookie rather than the page URL
+"""
+import json
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+from ..config.settings import Settings
+
+COOKIE_NAME = "lesson_planner_session"
+
+_PENDING = "_session_cookie_pending"
+
+
+def read_session_cookie():
+    """The session token the browser sent when this tab connected, if any"""
+    return st.context.cookies.get(COOKIE_NAME)
+
+
+def set_session_cookie(token):
+    """Store `token` in the browser on the next sync_session_cookie()"""
+    st.session_state[_PENDING] = (token, Settings.SESSION_TTL_SECONDS)
+
+
+def clear_session_cookie():
+    """Remove the browser's session cookie on the next sync_session_cookie()"""
+    st.session_state[_PENDING] = ("", 0)
+
+
+def sync_session_cookie():
+    """Write a pending cookie change; call on every rerun, logged in or not.
+
+    Streamlit gives the app no access to response headers, so the cookie is
+    written by a zero-height component (same origin as the app) and cannot be
+    HttpOnly. SameSite=Strict keeps other sites from planting or sending it,
+    and unlike a URL it does not end up in history, shared links or logs.
+    """
+    pending = st.session_state.pop(_PENDING, None)
+    if pending is None:
+        return
+    token, max_age = pending
+    cookie = json.dumps(f"{COOKIE_NAME}={token}; Path=/; Max-Age={max_age}; SameSite=Strict")
+    components.html(
+        "<script>window.parent.document.cookie = "
+        f"{cookie} + (window.parent.location.protocol === 'https:' ? '; Secure' : '');</script>",
+        height=0
+    )
@@ -0,0 +1,509 @@
+"""
+Light and dark stylesheets, compiled once and served as static files
+"""
+import hashlib
+import os
+import re
+from functools import lru_cache
+from string import Template
+
+import streamlit as st
+
+from ..config.settings import Settings
+
+PALETTES = {
+    "light": {
+        "bg_color": "#f8fafc",
+        "bg_gradient_end": "#e0e7ff",
+        "text_color": "#1e293b",
+        "card_bg_color": "#ffffff",
+        "input_bg_color": "#ffffff",
+        "input_text_color": "#1e293b",
+        "button_color": "#4f46e5",
+        "accent_color": "#7c3aed",
+        "border_color": "#e2e8f0",
+    },
+    "dark": {
+        "bg_color": "#0f172a",
+        "bg_gradient_end": "#1e293b",
+        "text_color": "#f1f5f9",
+        "card_bg_color": "#1e293b",
+        "input_bg_color": "#334155",
+        "input_text_color": "#f1f5f9",
+        "button_color": "#6366f1",
+        "accent_color": "#8b5cf6",
+        "border_color": "#475569",
+    },
+}
+
+# Served from Streamlit's static folder next to the app script (server.enableStaticServing)
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "static")
+
+STYLESHEET = Template("""
+    /* Main App Background */
+    .stApp {
+        background: linear-gradient(135deg, $bg_color 0%, $bg_gradient_end 100%);
+        color: $text_color;
+    }
+
+    /* Hide Streamlit default elements */
+    #MainMenu {visibility: hidden;}
+    footer {visibility: hidden;}
+    header {visibility: hidden;}
+
+    /* Custom Header */
+    .main-header {
+        background: linear-gradient(135deg, $button_color 0%, $accent_color 100%);
+        padding: 2rem 1rem;
+        border-radius: 15px;
+        margin-bottom: 2rem;
+        box-shadow: 0 10px 30px rgba(0,0,0,0.2);
+        text-align: center;
+    }
+
+    .main-header h1 {
+        color: white;
+        font-size: 2.5rem;
+        font-weight: 800;
+        margin: 0;
+        text-shadow: 2px 2px 4px rgba(0,0,0,0.3);
+    }
+
+    .main-header p {
+        color: rgba(255,255,255,0.9);
+        font-size: 1.1rem;
+        margin-top: 0.5rem;
+    }
+
+    /* Cards */
+    .lesson-card {
+        background-color: $card_bg_color;
+        padding: 2rem;
+        border-radius: 15px;
+        box-shadow: 0 4px 20px rgba(0,0,0,0.1);
+        margin: 1rem 0;
+        border: 1px solid $border_color;
+    }
+
+    /* Input boxes - Mobile Friendly */
+    .stTextInput>div>div>input, 
+    .stTextArea>div>div>textarea,
+    .stSelectbox>div>div>select {
+        background-color: $input_bg_color !important;
+        color: $input_text_color !important;
+        font-size: 16px !important; /* Larger for mobile */
+        border-radius: 10px !important;
+        padding: 12px 15px !important;
+        border: 2px solid $border_color !important;
+        transition: all 0.3s ease !important;
+    }
+
+    .stTextInput>div>div>input:focus,
+    .stTextArea>div>div>textarea:focus {
+        border-color: $button_color !important;
+        box-shadow: 0 0 0 3px rgba(99, 102, 241, 0.1) !important;
+    }
+
+    /* Labels */
+    .stTextInput label, 
+    .stTextArea label,
+    .stSelectbox label {
+        color: $text_color !important;
+        font-weight: 600 !important;
+        font-size: 14px !important;
+        margin-bottom: 8px !important;
+    }
+
+    /* Buttons - Touch Friendly */
+    .stButton>button {
+        background: linear-gradient(135deg, $button_color 0%, $accent_color 100%) !important;
+        color: white !important;
+        font-weight: 600 !important;
+        font-size: 16px !important;
+        border-radius: 12px !important;
+        padding: 12px 30px !important;
+        min-height: 48px !important; /* Touch-friendly size */
+        width: 100% !important;
+        border: none !important;
+        box-shadow: 0 4px 15px rgba(99, 102, 241, 0.3) !important;
+        transition: all 0.3s ease !important;
+    }
+
+    .stButton>button:hover {
+        transform: translateY(-2px) !important;
+        box-shadow: 0 6px 20px rgba(99, 102, 241, 0.4) !important;
+    }
+
+    .stButton>button:active {
+        transform: translateY(0) !important;
+    }
+
+    /* Sidebar */
+    .css-1d391kg {
+        background-color: $card_bg_color !important;
+    }
+
+    /* Markdown content */
+    .lesson-plan-content {
+        background-color: $card_bg_color;
+        padding: 2rem;
+        border-radius: 15px;
+        margin: 1rem 0;
+        line-height: 1.8;
+        font-size: 16px;
+    }
+
+    .lesson-plan-content h1, .lesson-plan-content h2, .lesson-plan-content h3 {
+        color: $button_color;
+        margin-top: 1.5rem;
+        margin-bottom: 1rem;
+    }
+
+    .lesson-plan-content a {
+        color: $accent_color;
+        text-decoration: none;
+        font-weight: 600;
+    }
+
+    .lesson-plan-content a:hover {
+        text-decoration: underline;
+    }
+
+    /* Mobile Responsive */
+    @media (max-width: 768px) {
+        .main-header h1 {
+            font-size: 1.8rem;
+        }
+
+        .lesson-card {
+            padding: 1.5rem;
+        }
+
+        [data-testid="stSidebar"] {
+            width: 100% !important;
+        }
+    }
+
+    /* Success/Error Messages */
+    .stSuccess {
+        background-color: rgba(34, 197, 94, 0.1);
+        border-left: 4px solid #22c55e;
+        padding: 1rem;
+        border-radius: 8px;
+    }
+
+    .stError {
+        background-color: rgba(239, 68, 68, 0.1);
+        border-left: 4px solid #ef4444;
+        padding: 1rem;
+        border-radius: 8px;
+    }
+
+    /* Loading Spinner */
+    .stSpinner > div {
+        border-top-color: $button_color !important;
+    }
+
+    /* Navigation Bar */
+    .navbar {
+        background: linear-gradient(135deg, $button_color 0%, $accent_color 100%);
+        padding: 1rem 2rem;
+        border-radius: 0 0 15px 15px;
+        margin-bottom: 2rem;
+        box-shadow: 0 4px 15px rgba(0,0,0,0.1);
+        position: relative;
+    }
+
+    .navbar-content {
+        display: flex;
+        justify-content: space-between;
+        align-items: center;
+        max-width: 100%;
+        margin: 0 auto;
+    }
+
+    .navbar-brand {
+        font-size: 1.5rem;
+        font-weight: 800;
+        color: white;
+        text-decoration: none;
+    }
+
+    .navbar-links {
+        display: flex;
+        gap: 1.5rem;
+        align-items: center;
+    }
+
+    .navbar-link {
+        color: white;
+        text-decoration: none;
+        font-weight: 600;
+        padding: 0.5rem 1rem;
+        border-radius: 8px;
+        transition: all 0.3s ease;
+    }
+
+    .navbar-link:hover {
+        background: rgba(255,255,255,0.2);
+    }
+
+    /* Dark Mode Toggle Button in Navbar */
+    .dark-mode-toggle {
+        background: rgba(255, 255, 255, 0.15) !important;
+        color: white !important;
+        border: 2px solid rgba(255, 255, 255, 0.3) !important;
+        font-weight: 600 !important;
+        font-size: 14px !important;
+        padding: 8px 16px !important;
+        border-radius: 25px !important;
+        transition: all 0.3s ease !important;
+        cursor: pointer !important;
+        display: flex !important;
+        align-items: center !important;
+        gap: 8px !important;
+    }
+
+    .dark-mode-toggle:hover {
+        background: rgba(255, 255, 255, 0.25) !important;
+        transform: scale(1.05) !important;
+        box-shadow: 0 4px 12px rgba(0,0,0,0.2) !important;
+    }
+
+    .dark-mode-toggle:active {
+        transform: scale(0.98) !important;
+    }
+
+    /* Toggle Icon Animation */
+    .toggle-icon {
+        font-size: 18px !important;
+        transition: transform 0.3s ease !important;
+    }
+
+    .dark-mode-toggle:hover .toggle-icon {
+        transform: rotate(15deg) !important;
+    }
+
+    /* Footer */
+    .footer {
+        background: linear-gradient(135deg, $card_bg_color 0%, $bg_color 100%);
+        padding: 2rem;
+        margin-top: 4rem;
+        border-top: 2px solid $border_color;
+        border-radius: 15px 15px 0 0;
+    }
+
+    .footer-content {
+        max-width: 1200px;
+        margin: 0 auto;
+        display: grid;
+        grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
+        gap: 2rem;
+    }
+
+    .footer-section h4 {
+        color: $button_color;
+        margin-bottom: 1rem;
+        font-size: 1.2rem;
+    }
+
+    .footer-section p, .footer-section a {
+        color: $text_color;
+        text-decoration: none;
+        line-height: 1.8;
+    }
+
+    .footer-section a {
+        color: $accent_color;
+    }
+
+    .footer-bottom {
+        text-align: center;
+        margin-top: 2rem;
+        padding-top: 1rem;
+        border-top: 1px solid $border_color;
+        color: $text_color;
+    }
+
+    /* Feature Cards */
+    .feature-card {
+        background: $card_bg_color;
+        padding: 2rem;
+        border-radius: 15px;
+        border: 2px solid $border_color;
+        box-shadow: 0 4px 15px rgba(0,0,0,0.1);
+        transition: transform 0.3s ease, box-shadow 0.3s ease;
+        height: 100%;
+    }
+
+    .feature-card:hover {
+        transform: translateY(-5px);
+        box-shadow: 0 8px 25px rgba(0,0,0,0.15);
+    }
+
+    .feature-icon {
+        font-size: 3rem;
+        margin-bottom: 1rem;
+    }
+
+    .feature-card h3 {
+        color: $button_color;
+        margin-bottom: 1rem;
+    }
+
+    .feature-card p {
+        color: $text_color;
+        line-height: 1.6;
+    }
+
+    /* Navbar dark mode toggle */
+    button[key="dark_mode_toggle_navbar"] {
+        background: linear-gradient(135deg, rgba(255, 255, 255, 0.2) 0%, rgba(255, 255, 255, 0.1) 100%) !important;
+        color: white !important;
+        border: 2px solid rgba(255, 255, 255, 0.4) !important;
+        font-weight: 700 !important;
+        font-size: 15px !important;
+        border-radius: 30px !important;
+        transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1) !important;
+        margin-top: 0.5rem !important;
+        padding: 10px 20px !important;
+        box-shadow: 0 2px 8px rgba(0,0,0,0.15) !important;
+        text-transform: none !important;
+        letter-spacing: 0.5px !important;
+    }
+
+    button[key="dark_mode_toggle_navbar"]:hover {
+        background: linear-gradient(135deg, rgba(255, 255, 255, 0.3) 0%, rgba(255, 255, 255, 0.2) 100%) !important;
+        transform: translateY(-2px) scale(1.05) !important;
+        box-shadow: 0 6px 20px rgba(0,0,0,0.25) !important;
+        border-color: rgba(255, 255, 255, 0.6) !important;
+    }
+
+    button[key="dark_mode_toggle_navbar"]:active {
+        transform: translateY(0) scale(0.98) !important;
+        box-shadow: 0 2px 8px rgba(0,0,0,0.15) !important;
+    }
+""")
+
+HEADER_HTML = """
+<div class="main-header">
+    <h1>📚 AI Lesson Planner</h1>
+    <p>Create engaging, interactive lesson plans with AI-powered assistance</p>
+</div>
+"""
+
+NAVBAR_HTML = """
+<div class="navbar">
+    <div class="navbar-content">
+        <div class="navbar-brand">📚 AI Lesson Planner</div>
+        <div class="navbar-links">
+            <a href="#" class="navbar-link">Home</a>
+            <a href="#" class="navbar-link">Features</a>
+            <a href="#" class="navbar-link">About</a>
+        </div>
+    </div>
+</div>
+"""
+
+FOOTER_TEMPLATE = Template("""
+<div class="footer">
+    <div class="footer-content">
+        <div class="footer-section">
+            <h4>📚 AI Lesson Planner</h4>
+            <p>Create comprehensive, engaging lesson plans with AI-powered assistance. Perfect for educators at all levels.</p>
+        </div>
+        <div class="footer-section">
+            <h4>🔗 Quick Links</h4>
+            <p><a href="#home">🏠 Home</a></p>
+            <p><a href="#create-plan">📝 Create Plan</a></p>
+            <p><a href="#my-plans">📚 My Plans</a></p>
+            <p><a href="#settings">⚙️ Settings</a></p>
+        </div>
+        <div class="footer-section">
+            <h4>💡 Features</h4>
+            <p>🤖 AI-Powered Generation</p>
+            <p>📚 Notes & Quiz Creator</p>
+            <p>📥 Multiple Export Formats</p>
+            <p>💾 Cloud Storage</p>
+        </div>
+        <div class="footer-section">
+            <h4>📞 Support & Connect</h4>
+            <p><a href="$linkedin_url" target="_blank">💼 LinkedIn</a></p>
+            <p><a href="$github_url" target="_blank">🐙 GitHub</a></p>
+            <p><a href="mailto:$email">📧 Email</a></p>
+            <p><a href="$portfolio_url" target="_blank">🌐 Portfolio</a></p>
+        </div>
+    </div>
+    <div class="footer-bottom">
+        <p>© 2024 AI Lesson Planner. All rights reserved. | Made with  for educators worldwide</p>
+    </div>
+</div>
+""")
+
+
+def theme_mode(dark_mode):
+    return "dark" if dark_mode else "light"
+
+
+def _minify(css):
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    return css.replace(';}', '}').strip()
+
+
+@lru_cache(maxsize=None)
+def compile_stylesheet(mode):
+    """Minified stylesheet for "light" or "dark", built once per process"""
+    return _minify(STYLESHEET.substitute(PALETTES[mode]))
+
+
+@lru_cache(maxsize=None)
+def stylesheet_url(mode):
+    """App-relative URL of the published stylesheet, or None to inline it instead.
+
+    The file is (re)written only when its content changed, and the URL carries
+    a content hash so browsers cache it until the theme itself changes.
+    """
+    if not Settings.THEME_STATIC_CSS or not st.get_option("server.enableStaticServing"):
+        return None
+    css = compile_stylesheet(mode)
+    path = os.path.join(STATIC_DIR, f"theme-{mode}.css")
+    try:
+        with open(path, encoding="utf-8") as fh:
+            current = fh.read()
+    except OSError:
+        current = None
+    if current != css:
+        try:
+            os.makedirs(STATIC_DIR, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as fh:
+                fh.write(css)
+        except OSError:
+            return None
+    version = hashlib.sha256(css.encode("utf-8")).hexdigest()[:12]
+    return f"app/static/theme-{mode}.css?v={version}"
+
+
+def apply_theme(dark_mode):
+    """Attach the stylesheet for the current mode and return its palette.
+
+    Streamlit drops any element a rerun does not emit again, so this runs on
+    every rerun. With static serving it emits a one-line @import that the
+    browser resolves from cache, instead of the full stylesheet.
+    """
+    mode = theme_mode(dark_mode)
+    url = stylesheet_url(mode)
+    if url:
+        st.markdown(f'<style>@import url("{url}");</style>', unsafe_allow_html=True)
+    else:
+        st.markdown(f"<style>{compile_stylesheet(mode)}</style>", unsafe_allow_html=True)
+    return PALETTES[mode]
+
+
+@lru_cache(maxsize=8)
+def footer_html(linkedin_url, github_url, email, portfolio_url):
+    return FOOTER_TEMPLATE.substitute(
+        linkedin_url=linkedin_url, github_url=github_url, email=email, portfolio_url=portfolio_url
+    )
@@ -0,0 +1,54 @@
+"""
+Per-rerun timing panel for admin users
+"""
+import streamlit as st
+
+from ..utils.llm import check_llm_health
+from ..utils.metrics import cache_hit_rates, metrics_snapshot
+
+
+def _label_text(labels):
+    return ", ".join(f"{k}={v}" for k, v in labels)
+
+
+def timing_panel(rerun_seconds, trace):
+    """Sidebar breakdown of this rerun's timed calls, plus process-wide latency and cache hit rates.
+
+    `trace` is the list returned by metrics.end_trace() for this rerun. Groq
+    is only probed when the admin asks, so reruns never wait on it.
+    """
+    with st.sidebar.expander("⏱️ Performance"):
+        st.metric("This rerun", f"{rerun_seconds * 1000:.0f} ms")
+
+        calls = {}
+        for name, labels, seconds in trace:
+            count, total = calls.get((name, labels), (0, 0.0))
+            calls[(name, labels)] = (count + 1, total + seconds)
+        if calls:
+            st.markdown("**This rerun**")
+            st.dataframe([
+                {"metric": name, "labels": _label_text(labels), "calls": count, "ms": round(total * 1000, 1)}
+                for (name, labels), (count, total) in sorted(calls.items(), key=lambda kv: -kv[1][1])
+            ], hide_index=True, use_container_width=True)
+
+        st.markdown("**Since startup**")
+        st.dataframe([
+            {"metric": h["name"], "labels": _label_text(h["labels"].items()), "count": h["count"],
+             "p50 ms": round(h["p50"] * 1000, 1), "p95 ms": round(h["p95"] * 1000, 1)}
+            for h in metrics_snapshot()["histograms"]
+        ], hide_index=True, use_container_width=True)
+
+        rates = cache_hit_rates()
+        if rates:
+            st.markdown("**Cache hit rates**")
+            for cache, rate in sorted(rates.items()):
+                st.caption(f"{cache}: {rate:.0%}")
+
+        if st.button("🩺 Check Groq", key="llm_health_check", use_container_width=True):
+            health = check_llm_health()
+            latency = f" in {health['latency_ms']:.0f} ms" if health["latency_ms"] is not None else ""
+            message = f"{health['model']}: {health['status']}{latency}, circuit breaker {health['breaker']}"
+            if health["ok"]:
+                st.success(message)
+            else:
+                st.error(message)
@@ -14,11 +14,79 @@ class Settings:
     DATABASE_NAME = "StudentDB"
     COLLECTION_USERS = "users"
     COLLECTION_PLANS = "lesson_plans"
+    COLLECTION_CACHE = "lesson_cache"
+    COLLECTION_SESSIONS = "sessions"
+    MONGODB_MAX_POOL_SIZE = int(os.getenv('MONGODB_MAX_POOL_SIZE', '50'))
+    MONGODB_MIN_POOL_SIZE = int(os.getenv('MONGODB_MIN_POOL_SIZE', '2'))
+    MONGODB_MAX_IDLE_TIME_MS = int(os.getenv('MONGODB_MAX_IDLE_TIME_MS', '300000'))
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGODB_SERVER_SELECTION_TIMEOUT_MS', '10000'))
+    MONGODB_CONNECT_TIMEOUT_MS = int(os.getenv('MONGODB_CONNECT_TIMEOUT_MS', '10000'))
+    MONGODB_SOCKET_TIMEOUT_MS = int(os.getenv('MONGODB_SOCKET_TIMEOUT_MS', '30000'))
+    STATS_CACHE_SECONDS = int(os.getenv('STATS_CACHE_SECONDS', '60'))
+    USER_CACHE_SECONDS = int(os.getenv('USER_CACHE_SECONDS', '300'))
+    
+    # Auth Settings
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+    AUTH_WORKERS = int(os.getenv('AUTH_WORKERS', '4'))
+    LOGIN_MAX_ATTEMPTS = int(os.getenv('LOGIN_MAX_ATTEMPTS', '5'))
+    LOGIN_LOCKOUT_SECONDS = int(os.getenv('LOGIN_LOCKOUT_SECONDS', '300'))
+    SESSION_SECRET = os.getenv('SESSION_SECRET')
+    SESSION_TTL_SECONDS = int(os.getenv('SESSION_TTL_SECONDS', str(7 * 24 * 3600)))
     
     # API Settings
     GROQ_API_KEY = os.getenv('key')
     GROQ_MODEL = "llama-3.3-70b-versatile"
     GROQ_TEMPERATURE = 0.7
+    GROQ_MAX_CONNECTIONS = int(os.getenv('GROQ_MAX_CONNECTIONS', '20'))
+    GROQ_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('GROQ_MAX_KEEPALIVE_CONNECTIONS', '10'))
+    GROQ_KEEPALIVE_EXPIRY = float(os.getenv('GROQ_KEEPALIVE_EXPIRY', '120'))
+    GROQ_REQUEST_TIMEOUT = float(os.getenv('GROQ_REQUEST_TIMEOUT', '120'))
+    LLM_WORKERS = int(os.getenv('LLM_WORKERS', '8'))
+    GROQ_REQUESTS_PER_MINUTE = int(os.getenv('GROQ_REQUESTS_PER_MINUTE', '30'))
+    BATCH_MAX_CONCURRENCY = int(os.getenv('BATCH_MAX_CONCURRENCY', '4'))
+    
+    # Resilience Settings
+    GROQ_RATE_BURST = int(os.getenv('GROQ_RATE_BURST', '5'))
+    LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '4'))
+    LLM_RETRY_BASE_DELAY = float(os.getenv('LLM_RETRY_BASE_DELAY', '1.0'))
+    LLM_RETRY_MAX_DELAY = float(os.getenv('LLM_RETRY_MAX_DELAY', '30.0'))
+    LLM_CALL_DEADLINE = float(os.getenv('LLM_CALL_DEADLINE', '180'))
+    LLM_BREAKER_THRESHOLD = int(os.getenv('LLM_BREAKER_THRESHOLD', '5'))
+    LLM_BREAKER_RESET_SECONDS = float(os.getenv('LLM_BREAKER_RESET_SECONDS', '30'))
+    
+    # Prompt Budget Settings (tokens per prompt; plans beyond the model context get map-reduce notes)
+    # The notes/quiz prompt may use the model context less its answer; NOTES_PROMPT_MAX_TOKENS=0 sets no lower cap
+    PROMPT_MAX_TOKENS = int(os.getenv('PROMPT_MAX_TOKENS', '4000'))
+    NOTES_PROMPT_MAX_TOKENS = int(os.getenv('NOTES_PROMPT_MAX_TOKENS', '0'))
+    LLM_CONTEXT_TOKENS = int(os.getenv('LLM_CONTEXT_TOKENS', '131072'))
+    NOTES_OUTPUT_TOKENS = int(os.getenv('NOTES_OUTPUT_TOKENS', '8192'))
+    NOTES_CHUNK_TOKENS = int(os.getenv('NOTES_CHUNK_TOKENS', '16384'))
+    
+    # Response Cache Settings ("memory", "sqlite", "mongo" or "none")
+    LLM_CACHE_BACKEND = os.getenv('LLM_CACHE_BACKEND', 'memory')
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '500'))
+    LLM_CACHE_TTL_SECONDS = int(os.getenv('LLM_CACHE_TTL_SECONDS', str(7 * 24 * 3600)))
+    LLM_CACHE_PATH = os.getenv('LLM_CACHE_PATH', '.cache/llm_responses.sqlite3')
+    
+    # Export Cache Settings (set EXPORT_CACHE_DIR to enable the disk tier)
+    EXPORT_CACHE_MAX_BYTES = int(os.getenv('EXPORT_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+    EXPORT_CACHE_DIR = os.getenv('EXPORT_CACHE_DIR')
+    EXPORT_CACHE_DISK_MAX_BYTES = int(os.getenv('EXPORT_CACHE_DISK_MAX_BYTES', str(512 * 1024 * 1024)))
+    
+    # Export Worker Pool Settings (EXPORT_WORKERS=0 renders on the calling thread)
+    EXPORT_WORKERS = int(os.getenv('EXPORT_WORKERS', '2'))
+    EXPORT_QUEUE_SIZE = int(os.getenv('EXPORT_QUEUE_SIZE', '8'))
+    EXPORT_RENDER_TIMEOUT = float(os.getenv('EXPORT_RENDER_TIMEOUT', '60'))
+    BULK_EXPORT_BATCH_SIZE = int(os.getenv('BULK_EXPORT_BATCH_SIZE', '20'))
+    BULK_EXPORT_TTL_SECONDS = int(os.getenv('BULK_EXPORT_TTL_SECONDS', '3600'))
+    
+    # Metrics Settings (METRICS_PORT=0 disables the endpoint; ADMIN_USERS see the timing panel)
+    METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
+    METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+    ADMIN_USERS = {name.strip() for name in os.getenv('ADMIN_USERS', '').split(',') if name.strip()}
+    
+    # Theme Settings (serve the stylesheet from static/ instead of inlining it on every rerun)
+    THEME_STATIC_CSS = os.getenv('THEME_STATIC_CSS', 'true').lower() == 'true'
     
     # App Settings
     APP_NAME = "AI Lesson Planner"
@@ -0,0 +1,29 @@
+"""
+Database access for AI Lesson Planner
+"""
+from .connection import (
+    get_client, get_database, get_users_collection, get_plans_collection, get_sessions_collection, close_client
+)
+from .stats import get_plan_stats, invalidate_plan_stats
+from .user_cache import get_cached, invalidate_user
+from .sessions import create_session, resolve_session, revoke_session
+from .indexes import ensure_indexes, verify_indexes, index_usage_stats
+
+__all__ = [
+    'get_client',
+    'get_database',
+    'get_users_collection',
+    'get_plans_collection',
+    'get_sessions_collection',
+    'close_client',
+    'ensure_indexes',
+    'verify_indexes',
+    'index_usage_stats',
+    'get_plan_stats',
+    'invalidate_plan_stats',
+    'get_cached',
+    'invalidate_user',
+    'create_session',
+    'resolve_session',
+    'revoke_session'
+]
@@ -0,0 +1,66 @@
+"""
+MongoDB connection management
+"""
+import atexit
+import threading
+
+import pymongo
+
+from ..config.settings import Settings
+
+# One MongoClient (and its connection pool) per process, shared by all sessions
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide MongoClient, creating and verifying it on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                client = pymongo.MongoClient(
+                    Settings.MONGODB_URI,
+                    maxPoolSize=Settings.MONGODB_MAX_POOL_SIZE,
+                    minPoolSize=Settings.MONGODB_MIN_POOL_SIZE,
+                    maxIdleTimeMS=Settings.MONGODB_MAX_IDLE_TIME_MS,
+                    serverSelectionTimeoutMS=Settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+                    connectTimeoutMS=Settings.MONGODB_CONNECT_TIMEOUT_MS,
+                    socketTimeoutMS=Settings.MONGODB_SOCKET_TIMEOUT_MS
+                )
+                # Fail fast (and only once) if the server is unreachable or auth is wrong
+                client.admin.command("ping")
+                _client = client
+    return _client
+
+
+def get_database():
+    """Return the application database"""
+    return get_client()[Settings.DATABASE_NAME]
+
+
+def get_users_collection():
+    """Return the users collection"""
+    return get_database()[Settings.COLLECTION_USERS]
+
+
+def get_plans_collection():
+    """Return the lesson_plans collection"""
+    return get_database()[Settings.COLLECTION_PLANS]
+
+
+def get_sessions_collection():
+    """Return the sessions collection"""
+    return get_database()[Settings.COLLECTION_SESSIONS]
+
+
+def close_client():
+    """Close the shared client; the next call reconnects"""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+atexit.register(close_client)
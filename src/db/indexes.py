@@ -0,0 +1,84 @@
+"""
+Index definitions and bootstrap for MongoDB collections
+"""
+import logging
+
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+from ..config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+# Every plan query is scoped to one user, so the filter indexes lead with username
+INDEXES = {
+    Settings.COLLECTION_USERS: [
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+    ],
+    Settings.COLLECTION_PLANS: [
+        IndexModel([("username", ASCENDING), ("created_at", DESCENDING)], name="username_created_at"),
+        IndexModel([("username", ASCENDING), ("grade", ASCENDING)], name="username_grade"),
+        # Collated to match the case-insensitive Subject A-Z / Z-A sort
+        IndexModel([("username", ASCENDING), ("subject", ASCENDING)], name="username_subject_ci",
+                   collation={"locale": "en", "strength": 2}),
+        # Full-text search; the username prefix keeps each search within one user's plans
+        IndexModel(
+            [("username", ASCENDING), ("subject", TEXT), ("topic", TEXT), ("grade", TEXT), ("content", TEXT)],
+            name="plan_text",
+            weights={"subject": 10, "topic": 10, "grade": 5, "content": 1}
+        ),
+    ],
+    Settings.COLLECTION_SESSIONS: [
+        # MongoDB's TTL monitor deletes sessions once expires_at has passed
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+}
+
+
+def ensure_indexes(db):
+    """Create any missing indexes; returns a list of problems (empty when all is well).
+
+    Index creation is idempotent, so this is safe to run at every startup.
+    Failures are reported rather than raised so a bad index never takes the
+    app down, e.g. when existing duplicate usernames block the unique index.
+    """
+    problems = []
+    for collection_name, models in INDEXES.items():
+        collection = db[collection_name]
+        for model in models:
+            name = model.document["name"]
+            try:
+                collection.create_indexes([model])
+            except DuplicateKeyError as e:
+                problems.append(f"{collection_name}.{name}: duplicate values prevent creating the index ({e})")
+            except OperationFailure as e:
+                problems.append(f"{collection_name}.{name}: {e}")
+    for problem in problems:
+        logger.warning("Index bootstrap: %s", problem)
+    return problems
+
+
+def verify_indexes(db):
+    """Return {collection: [missing index names]} for indexes that do not exist"""
+    missing = {}
+    for collection_name, models in INDEXES.items():
+        existing = set(db[collection_name].index_information())
+        absent = [m.document["name"] for m in models if m.document["name"] not in existing]
+        if absent:
+            missing[collection_name] = absent
+    return missing
+
+
+def index_usage_stats(db):
+    """Per-index access counts since the server last started, via $indexStats"""
+    stats = []
+    for collection_name in INDEXES:
+        for entry in db[collection_name].aggregate([{"$indexStats": {}}]):
+            stats.append({
+                "collection": collection_name,
+                "name": entry["name"],
+                "key": dict(entry["key"]),
+                "ops": entry["accesses"]["ops"],
+                "since": entry["accesses"]["since"],
+            })
+    return stats
@@ -0,0 +1,77 @@
+"""
+Lesson plan queries for the My Plans page
+"""
+import re
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+
+# Fields needed to render a plan card; `content` is fetched only on demand
+CARD_FIELDS = {"subject": True, "topic": True, "grade": True, "duration": True, "created_at": True}
+
+SORT_OPTIONS = {
+    "Newest First": ("created_at", DESCENDING),
+    "Oldest First": ("created_at", ASCENDING),
+    "Subject A-Z": ("subject", ASCENDING),
+    "Subject Z-A": ("subject", DESCENDING),
+}
+
+# Subject sorts are case-insensitive, matching the previous Python-side sort
+CASE_INSENSITIVE = {"locale": "en", "strength": 2}
+
+DEFAULT_PAGE_SIZE = 10
+
+
+def build_plan_filter(username, search=None, grade=None):
+    """Mongo filter for a user's plans, optionally narrowed by search text and grade"""
+    query = {"username": username}
+    if grade:
+        query["grade"] = grade
+    if search:
+        pattern = {"$regex": re.escape(search.strip()), "$options": "i"}
+        query["$or"] = [{"subject": pattern}, {"topic": pattern}, {"grade": pattern}]
+    return query
+
+
+def list_plan_cards(collection, username, search=None, grade=None, sort="Newest First",
+                    page_size=DEFAULT_PAGE_SIZE, after=None):
+    """Return one page of plan cards and the cursor for the next page.
+
+    Pagination is keyset based on (sort field, _id): `after` is the cursor
+    returned with the previous page, or None for the first page. The returned
+    cursor is None on the last page.
+    """
+    field, direction = SORT_OPTIONS[sort]
+    query = build_plan_filter(username, search, grade)
+    if after is not None:
+        value, last_id = after
+        op = "$lt" if direction == DESCENDING else "$gt"
+        query = {"$and": [query, {"$or": [
+            {field: {op: value}},
+            {field: value, "_id": {op: last_id}}
+        ]}]}
+    cursor = collection.find(query, CARD_FIELDS).sort([(field, direction), ("_id", direction)]).limit(page_size + 1)
+    if field == "subject":
+        cursor = cursor.collation(CASE_INSENSITIVE)
+    cards = list(cursor)
+    next_cursor = None
+    if len(cards) > page_size:
+        cards = cards[:page_size]
+        next_cursor = (cards[-1].get(field), cards[-1]["_id"])
+    return cards, next_cursor
+
+
+def count_plans(collection, username, search=None, grade=None):
+    """Number of plans matching the same filter as list_plan_cards()"""
+    return collection.count_documents(build_plan_filter(username, search, grade))
+
+
+def list_plan_grades(collection, username):
+    """Distinct grade levels the user has plans for"""
+    return sorted(g for g in collection.distinct("grade", {"username": username}) if g)
+
+
+def get_plan(collection, plan_id, username):
+    """Fetch a single plan including its content, scoped to its owner"""
+    return collection.find_one({"_id": ObjectId(plan_id), "username": username})
+
@@ -0,0 +1,81 @@
+"""
+Full-text search over saved lesson plans
+"""
+import html
+import re
+
+from .plans import CARD_FIELDS, DEFAULT_PAGE_SIZE
+
+# Characters of plan content returned around the first match
+SNIPPET_BEFORE = 80
+SNIPPET_LENGTH = 240
+
+
+def _search_terms(query):
+    """Words to highlight: quoted phrases and bare words, ignoring -exclusions"""
+    phrases = re.findall(r'"([^"]+)"', query)
+    rest = re.sub(r'"[^"]*"', " ", query)
+    words = [w for w in rest.split() if not w.startswith("-")]
+    return [t.lower() for t in phrases + words if t.strip()]
+
+
+def _text_filter(username, query, grade=None):
+    text_filter = {"username": username, "$text": {"$search": query}}
+    if grade:
+        text_filter["grade"] = grade
+    return text_filter
+
+
+def highlight_snippet(snippet, terms):
+    """Escape a raw snippet, strip Markdown noise and wrap matched terms in <mark>"""
+    text = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', snippet or "")
+    text = re.sub(r'[#*_`>|]+', " ", text)
+    text = " ".join(text.split())
+    text = html.escape(text)
+    if terms:
+        pattern = re.compile("|".join(re.escape(html.escape(t)) for t in sorted(terms, key=len, reverse=True)), re.IGNORECASE)
+        text = pattern.sub(lambda m: f"<mark>{m.group(0)}</mark>", text)
+    return f"…{text}…"
+
+
+def search_plan_cards(collection, username, query, grade=None, page_size=DEFAULT_PAGE_SIZE, after=None):
+    """Rank a user's plans against `query` using the plan_text index.
+
+    Returns (cards, next_cursor) like list_plan_cards(); the cursor is the
+    offset of the next page. Each card carries `score` and `snippet_html`.
+    The snippet is cut server-side, so full plan content never leaves MongoDB.
+    """
+    terms = _search_terms(query)
+    first_term = terms[0] if terms else ""
+    offset = after or 0
+    pipeline = [
+        {"$match": _text_filter(username, query, grade)},
+        {"$sort": {"score": {"$meta": "textScore"}, "created_at": -1}},
+        {"$skip": offset},
+        {"$limit": page_size + 1},
+        {"$project": dict(
+            CARD_FIELDS,
+            score={"$meta": "textScore"},
+            snippet={"$let": {
+                "vars": {"at": {"$indexOfCP": [{"$toLower": "$content"}, first_term]}},
+                "in": {"$substrCP": [
+                    "$content",
+                    {"$max": [0, {"$subtract": ["$$at", SNIPPET_BEFORE]}]},
+                    SNIPPET_LENGTH
+                ]}
+            }}
+        )},
+    ]
+    cards = list(collection.aggregate(pipeline))
+    next_cursor = None
+    if len(cards) > page_size:
+        cards = cards[:page_size]
+        next_cursor = offset + page_size
+    for card in cards:
+        card["snippet_html"] = highlight_snippet(card.pop("snippet", ""), terms)
+    return cards, next_cursor
+
+
+def count_search_results(collection, username, query, grade=None):
+    """Number of plans matching a full-text query"""
+    return collection.count_documents(_text_filter(username, query, grade))
@@ -0,0 +1,77 @@
+"""
+Signed, expiring login sessions stored in MongoDB
+"""
+import hashlib
+import hmac
+import logging
+import secrets
+from datetime import datetime, timedelta
+
+from ..config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+_fallback_secret = None
+
+
+def _secret():
+    """Signing key from SESSION_SECRET; without one, a per-process key (sessions end on restart)"""
+    global _fallback_secret
+    if Settings.SESSION_SECRET:
+        return Settings.SESSION_SECRET.encode('utf-8')
+    if _fallback_secret is None:
+        logger.warning("SESSION_SECRET is not set; sessions will not survive a restart")
+        _fallback_secret = secrets.token_bytes(32)
+    return _fallback_secret
+
+
+def _sign(session_id):
+    return hmac.new(_secret(), session_id.encode('utf-8'), hashlib.sha256).hexdigest()[:32]
+
+
+def _session_id(token):
+    """The session id from a token whose signature checks out, else None"""
+    session_id, _, signature = (token or "").partition(".")
+    if not session_id or not hmac.compare_digest(signature, _sign(session_id)):
+        return None
+    return session_id
+
+
+def create_session(collection, username):
+    """Start a session for `username` and return its token (`<id>.<signature>`)"""
+    session_id = secrets.token_urlsafe(24)
+    now = datetime.utcnow()
+    collection.insert_one({
+        "_id": session_id,
+        "username": username,
+        "created_at": now,
+        "expires_at": now + timedelta(seconds=Settings.SESSION_TTL_SECONDS),
+    })
+    return f"{session_id}.{_sign(session_id)}"
+
+
+def resolve_session(collection, token):
+    """Username for a valid, unexpired token, else None.
+
+    Forged or malformed tokens are rejected by their signature without a
+    database round-trip. A session past half its lifetime is extended, so
+    active users stay signed in.
+    """
+    session_id = _session_id(token)
+    if session_id is None:
+        return None
+    now = datetime.utcnow()
+    session = collection.find_one({"_id": session_id, "expires_at": {"$gt": now}}, {"username": True, "expires_at": True})
+    if session is None:
+        return None
+    ttl = timedelta(seconds=Settings.SESSION_TTL_SECONDS)
+    if session["expires_at"] - now < ttl / 2:
+        collection.update_one({"_id": session_id}, {"$set": {"expires_at": now + ttl}})
+    return session["username"]
+
+
+def revoke_session(collection, token):
+    """End the session behind `token` (logout)"""
+    session_id = _session_id(token)
+    if session_id is not None:
+        collection.delete_one({"_id": session_id})
@@ -0,0 +1,39 @@
+"""
+Dashboard statistics for a user's lesson plans
+"""
+from datetime import datetime, timedelta
+
+from ..config.settings import Settings
+from .user_cache import get_cached, invalidate_user
+
+
+def compute_plan_stats(collection, username):
+    """Total plans, distinct subjects, distinct grades and plans from the last 7 days.
+
+    A single $facet aggregation returns all four numbers in one round-trip
+    without transferring any plan documents.
+    """
+    week_ago = datetime.now() - timedelta(days=7)
+    pipeline = [
+        {"$match": {"username": username}},
+        {"$project": {"_id": False, "subject": True, "grade": True, "created_at": True}},
+        {"$facet": {
+            "total": [{"$count": "n"}],
+            "subjects": [{"$group": {"_id": "$subject"}}, {"$count": "n"}],
+            "grades": [{"$group": {"_id": "$grade"}}, {"$count": "n"}],
+            "this_week": [{"$match": {"created_at": {"$gte": week_ago}}}, {"$count": "n"}],
+        }}
+    ]
+    facets = next(collection.aggregate(pipeline), {})
+    return {name: (facets.get(name) or [{"n": 0}])[0]["n"] for name in ("total", "subjects", "grades", "this_week")}
+
+
+def get_plan_stats(collection, username):
+    """Cached compute_plan_stats(); call invalidate_plan_stats() after any write"""
+    return get_cached(username, "stats", lambda: compute_plan_stats(collection, username),
+                      ttl=Settings.STATS_CACHE_SECONDS)
+
+
+def invalidate_plan_stats(username):
+    """Drop the cached statistics and plan lists for a user after a save, duplicate or delete"""
+    invalidate_user(username)
@@ -0,0 +1,45 @@
+"""
+Per-user query cache shared by every session and browser tab in the process
+"""
+import threading
+import time
+
+from ..config.settings import Settings
+from ..utils.metrics import count_cache
+
+# (username, name) -> (expires_at, value)
+_cache = {}
+_lock = threading.Lock()
+
+# Expired entries are swept once the cache grows past this many entries
+SWEEP_THRESHOLD = 5000
+
+
+def get_cached(username, name, compute, ttl=None):
+    """Return the cached result of `compute()` for this user and query name.
+
+    `name` identifies the query and may be any hashable, e.g. a tuple of its
+    filter values. Cached values are shared across sessions, so callers must
+    not mutate them. Call invalidate_user() after any write to the user's plans.
+    """
+    now = time.monotonic()
+    key = (username, name)
+    entry = _cache.get(key)
+    if entry is not None and entry[0] > now:
+        count_cache("user_query", True)
+        return entry[1]
+    count_cache("user_query", False)
+    value = compute()
+    with _lock:
+        _cache[key] = (now + (ttl or Settings.USER_CACHE_SECONDS), value)
+        if len(_cache) > SWEEP_THRESHOLD:
+            for stale in [k for k, (expires_at, _) in _cache.items() if expires_at <= now]:
+                del _cache[stale]
+    return value
+
+
+def invalidate_user(username):
+    """Drop every cached query for a user"""
+    with _lock:
+        for key in [k for k in _cache if k[0] == username]:
+            del _cache[key]
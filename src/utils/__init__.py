@@ -1,13 +1,40 @@
 """
 Utility functions for AI Lesson Planner
+
+The names below are imported from their modules on first use, so importing
+one submodule (src.db uses src.utils.metrics) does not load the others.
 """
-from .export import generate_pdf, generate_word_doc
-from .llm import LLM_Setup, generate_notes_and_quiz
+from importlib import import_module
+
+_EXPORTS = {
+    'generate_pdf': '.export',
+    'generate_word_doc': '.export',
+    'generate_html': '.export',
+    'render': '.export',
+    'render_export': '.export_cache',
+    'export_plans_zip': '.bulk_export',
+    'LLM_Setup': '.llm',
+    'LLM_Stream': '.llm',
+    'FullPackageJob': '.llm',
+    'generate_notes_and_quiz': '.llm',
+    'get_llm_chain': '.llm',
+    'check_llm_health': '.llm',
+    'shutdown_llm_clients': '.llm',
+    'get_response_cache': '.cache',
+    'iter_batch_generation': '.batch',
+    'authenticate': '.auth',
+    'register_user': '.auth',
+    'timed': '.metrics',
+    'metrics_snapshot': '.metrics',
+    'start_metrics_server': '.metrics'
+}
+
+__all__ = list(_EXPORTS)
 
-__all__ = [
-    'generate_pdf',
-    'generate_word_doc',
-    'LLM_Setup',
-    'generate_notes_and_quiz'
-]
 
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,167 @@
+"""
+Password hashing, login and signup off the Streamlit script thread
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+from ..config.settings import Settings
+from .metrics import observe
+
+
+class LoginThrottled(Exception):
+    """Raised without checking the password while a username is locked out"""
+
+    def __init__(self, retry_in):
+        super().__init__(f"Too many failed login attempts. Try again in {int(retry_in) + 1} seconds.")
+        self.retry_in = retry_in
+
+
+class LoginRateLimiter:
+    """Lock a username out after `max_attempts` failures within `window_seconds`.
+
+    Failures are kept per username, least recently failed first. Usernames
+    whose failures have all expired are dropped as new failures come in, and
+    at most `max_usernames` are tracked, so spraying made-up usernames cannot
+    grow the table without limit.
+    """
+
+    def __init__(self, max_attempts, window_seconds, max_usernames=10000):
+        self.max_attempts = max_attempts
+        self.window_seconds = window_seconds
+        self.max_usernames = max_usernames
+        self._failures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, username):
+        """Raise LoginThrottled if `username` has used up its attempts"""
+        now = time.monotonic()
+        with self._lock:
+            failures = self._failures.get(username)
+            if not failures:
+                return
+            while failures and now - failures[0] > self.window_seconds:
+                failures.popleft()
+            if not failures:
+                del self._failures[username]
+            elif len(failures) >= self.max_attempts:
+                raise LoginThrottled(self.window_seconds - (now - failures[0]))
+
+    def record_failure(self, username):
+        now = time.monotonic()
+        with self._lock:
+            failures = self._failures.pop(username, None) or deque(maxlen=self.max_attempts)
+            failures.append(now)
+            self._failures[username] = failures
+            # The oldest entries are the least recently failed: drop them once expired or over the cap
+            while self._failures:
+                oldest = next(iter(self._failures.values()))
+                if now - oldest[-1] <= self.window_seconds and len(self._failures) <= self.max_usernames:
+                    break
+                self._failures.popitem(last=False)
+
+    def reset(self, username):
+        with self._lock:
+            self._failures.pop(username, None)
+
+
+_EXECUTOR = None
+_LIMITER = None
+_DUMMY_HASH = None
+_init_lock = threading.Lock()
+
+
+def get_auth_executor():
+    """Bounded pool for bcrypt work; bcrypt releases the GIL, so threads scale across cores"""
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        with _init_lock:
+            if _EXECUTOR is None:
+                _EXECUTOR = ThreadPoolExecutor(max_workers=Settings.AUTH_WORKERS, thread_name_prefix="auth")
+    return _EXECUTOR
+
+
+def get_login_limiter():
+    """Failed-login limiter shared by every session in the process"""
+    global _LIMITER
+    if _LIMITER is None:
+        with _init_lock:
+            if _LIMITER is None:
+                _LIMITER = LoginRateLimiter(Settings.LOGIN_MAX_ATTEMPTS, Settings.LOGIN_LOCKOUT_SECONDS)
+    return _LIMITER
+
+
+def _run(operation, fn, *args):
+    submitted = time.perf_counter()
+    started = []
+
+    def timed():
+        started.append(time.perf_counter())
+        return fn(*args)
+
+    result = get_auth_executor().submit(timed).result()
+    finished = time.perf_counter()
+    observe("auth_queue_seconds", started[0] - submitted, operation=operation)
+    observe("auth_hash_seconds", finished - started[0], operation=operation)
+    return result
+
+
+def hash_password(password):
+    """bcrypt hash of `password` at the configured Settings.BCRYPT_ROUNDS"""
+    return _run("hash", bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt(rounds=Settings.BCRYPT_ROUNDS))
+
+
+def verify_password(password, hashed):
+    return _run("verify", bcrypt.checkpw, password.encode('utf-8'), hashed)
+
+
+def hash_rounds(hashed):
+    """Work factor recorded in a bcrypt hash ($2b$<rounds>$...)"""
+    try:
+        return int(hashed.split(b'$')[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def _dummy_hash():
+    """Hash checked for unknown usernames so they take as long as wrong passwords"""
+    global _DUMMY_HASH
+    if _DUMMY_HASH is None:
+        _DUMMY_HASH = hash_password("not-a-real-password")
+    return _DUMMY_HASH
+
+
+def authenticate(users, username, password):
+    """Return the user document if the password matches, else None.
+
+    Raises LoginThrottled once the username has too many recent failures.
+    A successful login whose hash was made with a different work factor is
+    rehashed at Settings.BCRYPT_ROUNDS.
+    """
+    limiter = get_login_limiter()
+    limiter.check(username)
+    user = users.find_one({"username": username})
+    if user is None:
+        verify_password(password, _dummy_hash())
+        limiter.record_failure(username)
+        return None
+    if not verify_password(password, user["password"]):
+        limiter.record_failure(username)
+        return None
+    limiter.reset(username)
+
+    if hash_rounds(user["password"]) != Settings.BCRYPT_ROUNDS:
+        # Conditional on the old hash so a concurrent password change is not overwritten
+        users.update_one(
+            {"_id": user["_id"], "password": user["password"]},
+            {"$set": {"password": hash_password(password)}}
+        )
+    return user
+
+
+def register_user(users, username, password):
+    """Create a user with a hashed password; raises DuplicateKeyError if the name is taken"""
+    users.insert_one({"username": username, "password": hash_password(password)})
@@ -0,0 +1,89 @@
+"""
+Batch lesson plan generation for whole units
+"""
+import asyncio
+import csv
+import io
+import queue
+from collections import namedtuple
+
+from ..config.settings import Settings
+from .llm import LLM_Setup_Async, get_llm_loop
+from .prompts import build_lesson_plan_prompt
+
+BatchResult = namedtuple("BatchResult", ["index", "item", "content", "error"])
+
+# Optional per-topic overrides accepted in an uploaded CSV
+CSV_FIELDS = ("topic", "duration", "learning_objectives", "customization")
+
+
+def parse_topics_text(text):
+    """One topic per line; blank lines and duplicates are dropped"""
+    seen = set()
+    topics = []
+    for line in text.splitlines():
+        topic = line.strip().lstrip("-*•").strip()
+        if topic and topic.lower() not in seen:
+            seen.add(topic.lower())
+            topics.append({"topic": topic})
+    return topics
+
+
+def parse_topics_csv(data):
+    """Read topics from CSV bytes/text with a `topic` column and optional overrides"""
+    if isinstance(data, bytes):
+        data = data.decode("utf-8-sig")
+    reader = csv.DictReader(io.StringIO(data))
+    if not reader.fieldnames or "topic" not in [f.strip().lower() for f in reader.fieldnames]:
+        raise ValueError("CSV must have a 'topic' column")
+    rows = []
+    for row in reader:
+        row = {(k or "").strip().lower(): (v or "").strip() for k, v in row.items()}
+        if row.get("topic"):
+            rows.append({field: row[field] for field in CSV_FIELDS if row.get(field)})
+    return rows
+
+
+def build_batch_items(topics, defaults):
+    """Merge per-topic rows with the shared unit settings into complete prompt inputs"""
+    items = []
+    for row in topics:
+        item = dict(defaults)
+        item.update({k: v for k, v in row.items() if v})
+        items.append(item)
+    return items
+
+
+def iter_batch_generation(items, max_concurrency=None, regenerate=False):
+    """Generate a lesson plan for every item, yielding a BatchResult as each one finishes.
+
+    Requests fan out on the shared LLM event loop with at most `max_concurrency`
+    in flight, and the shared Groq token bucket keeps them under the rate limit.
+    Results arrive in completion order; `BatchResult.index` gives the original
+    position.
+    """
+    results = queue.Queue()
+    concurrency = max_concurrency or Settings.BATCH_MAX_CONCURRENCY
+
+    async def run():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def generate(index, item):
+            async with semaphore:
+                try:
+                    prompt = build_lesson_plan_prompt(
+                        item["subject"], item["topic"], item["grade"], item["duration"],
+                        item["learning_style"], item["difficulty"],
+                        item["learning_objectives"], item.get("customization")
+                    )
+                    content = await LLM_Setup_Async(prompt, regenerate=regenerate)
+                    results.put(BatchResult(index, item, content, None))
+                except Exception as e:
+                    results.put(BatchResult(index, item, None, e))
+
+        await asyncio.gather(*(generate(i, item) for i, item in enumerate(items)))
+
+    future = asyncio.run_coroutine_threadsafe(run(), get_llm_loop())
+    for _ in range(len(items)):
+        yield results.get()
+    future.result()
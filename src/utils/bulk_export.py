@@ -0,0 +1,191 @@
+"""
+Bulk export of a user's lesson plans as a ZIP archive
+"""
+import os
+import re
+import tempfile
+import time
+import zipfile
+from collections import deque
+from datetime import datetime
+
+from pymongo import DESCENDING
+
+from ..config.settings import Settings
+from .export import RENDERERS, get_export_pool, render_result, submit_render
+from .metrics import timed
+
+EXPORT_PREFIX = "lesson_plans_"
+
+# PDF and DOCX are already compressed, so only Markdown is deflated in the archive
+DEFLATED_FORMATS = {"md"}
+
+EXPORT_FIELDS = {
+    "subject": True, "topic": True, "grade": True, "duration": True, "content": True, "created_at": True
+}
+
+
+def _safe_name(text, max_length=40):
+    name = re.sub(r'[^\w\-]+', '_', str(text)).strip('_')
+    return name[:max_length] or "untitled"
+
+
+def plan_file_stem(plan):
+    """Archive file name (without extension) for a saved plan; unique per plan"""
+    created = plan.get('created_at')
+    date = created.strftime('%Y-%m-%d') if isinstance(created, datetime) else "undated"
+    return f"{date}_{_safe_name(plan['subject'])}_{_safe_name(plan['topic'])}_{str(plan['_id'])[-6:]}"
+
+
+def _plan_data(plan):
+    created = plan.get('created_at')
+    return {
+        "subject": plan['subject'],
+        "topic": plan['topic'],
+        "grade": plan['grade'],
+        "duration": plan['duration'],
+        "content": plan['content'],
+        "created_at": created.strftime('%B %d, %Y at %I:%M %p') if isinstance(created, datetime) else str(created or 'N/A')
+    }
+
+
+def _plan_file(fmt, stem, data):
+    return fmt, f"{fmt}/{stem}.{fmt}", data.encode('utf-8') if isinstance(data, str) else data
+
+
+def render_plan_files(plan_data, stem, formats):
+    """Render one plan in each format, in this process, as (format, archive name, bytes) triples"""
+    files = []
+    for fmt in formats:
+        data = RENDERERS[fmt](plan_data)
+        if data:
+            files.append(_plan_file(fmt, stem, data))
+    return files
+
+
+def submit_plan_files(plan_data, stem, formats):
+    """Queue one plan's renders on the export pool, waiting up to EXPORT_RENDER_TIMEOUT for each slot"""
+    renders = []
+    try:
+        for fmt in formats:
+            renders.append((fmt, submit_render(plan_data, fmt, wait=Settings.EXPORT_RENDER_TIMEOUT)))
+    except BaseException:
+        for _, future in renders:
+            future.cancel()
+        raise
+    return stem, renders
+
+
+def collect_plan_files(stem, renders):
+    """The render_plan_files() result for submit_plan_files() futures; raises ExportTimeout"""
+    files = []
+    for fmt, future in renders:
+        data = render_result(future, fmt)
+        if data:
+            files.append(_plan_file(fmt, stem, data))
+    return files
+
+
+def iter_user_plans(collection, username, batch_size):
+    """Cursor over a user's full plans, newest first, fetched from MongoDB in batches"""
+    return (
+        collection.find({"username": username}, EXPORT_FIELDS)
+        .sort([("created_at", DESCENDING), ("_id", DESCENDING)])
+        .batch_size(batch_size)
+    )
+
+
+def _write_files(archive, files):
+    for fmt, name, data in files:
+        compression = zipfile.ZIP_DEFLATED if fmt in DEFLATED_FORMATS else zipfile.ZIP_STORED
+        archive.writestr(name, data, compress_type=compression)
+
+
+@timed("bulk_export_seconds")
+def export_plans_zip(collection, username, formats, path=None, progress=None, batch_size=None):
+    """Write all of a user's plans, rendered in `formats`, to a ZIP file and return its path.
+
+    Plans are read through a batched cursor and each file is rendered in the
+    shared export worker pool with submit_render(), so bulk exports share its
+    slots and render timeout with single exports. At most two plans per
+    worker are in flight, and each plan's files are written to the archive
+    as soon as they are ready, in cursor order. Only that window of
+    documents is held in memory.
+
+    `progress(done, total)` is called from the calling thread after each plan.
+    Without `path`, the archive goes to a temporary file that the caller
+    must remove.
+    """
+    batch_size = batch_size or Settings.BULK_EXPORT_BATCH_SIZE
+    formats = tuple(formats)
+    pool = get_export_pool()
+    window = max(1, Settings.EXPORT_WORKERS) * 2
+    total = collection.count_documents({"username": username})
+    if path is None:
+        remove_stale_exports()
+        fd, path = tempfile.mkstemp(prefix=EXPORT_PREFIX, suffix=".zip")
+        os.close(fd)
+
+    done = 0
+    pending = deque()
+
+    def write(archive, files):
+        nonlocal done
+        _write_files(archive, files)
+        done += 1
+        if progress:
+            progress(done, total)
+
+    try:
+        with zipfile.ZipFile(path, "w") as archive:
+            for plan in iter_user_plans(collection, username, batch_size):
+                args = (_plan_data(plan), plan_file_stem(plan), formats)
+                if pool is None:
+                    write(archive, render_plan_files(*args))
+                    continue
+                pending.append(submit_plan_files(*args))
+                while pending and (len(pending) >= window or all(future.done() for _, future in pending[0][1])):
+                    write(archive, collect_plan_files(*pending.popleft()))
+            while pending:
+                write(archive, collect_plan_files(*pending.popleft()))
+    except BaseException:
+        for _, renders in pending:
+            for _, future in renders:
+                future.cancel()
+        os.remove(path)
+        raise
+    return path
+
+
+def read_export(path):
+    """The bytes of a finished archive; read only when the user downloads it"""
+    with open(path, "rb") as archive:
+        return archive.read()
+
+
+def discard_export(path):
+    """Remove an archive that will not be downloaded"""
+    if path:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def remove_stale_exports(max_age=None):
+    """Remove temporary archives older than `max_age` seconds (default BULK_EXPORT_TTL_SECONDS).
+
+    Catches archives left behind by sessions that ended without building
+    another export or logging out.
+    """
+    cutoff = time.time() - (max_age or Settings.BULK_EXPORT_TTL_SECONDS)
+    directory = tempfile.gettempdir()
+    for name in os.listdir(directory):
+        if not (name.startswith(EXPORT_PREFIX) and name.endswith(".zip")):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
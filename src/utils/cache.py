@@ -0,0 +1,274 @@
+"""
+Response cache for LLM generations
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from pymongo.errors import OperationFailure
+
+from ..config.settings import Settings
+from .metrics import count_cache
+
+
+def normalize_prompt(prompt):
+    """Collapse whitespace so cosmetic differences map to the same key"""
+    return " ".join(prompt.split())
+
+
+def make_cache_key(prompt, model, temperature):
+    """Content-address a generation by its normalized prompt and model settings"""
+    payload = json.dumps([model, float(temperature), normalize_prompt(prompt)], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class MemoryBackend:
+    """In-process LRU cache with size and age based eviction"""
+
+    def __init__(self, max_entries, ttl_seconds):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, created_at = entry
+            if time.time() - created_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    """On-disk cache that survives restarts; evicts expired then least recently used rows"""
+
+    def __init__(self, path, max_entries, ttl_seconds):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON responses (accessed_at)")
+
+    def get(self, key):
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def delete(self, key):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+# MongoDB error code for create_index on an existing index with other options
+INDEX_OPTIONS_CONFLICT = 85
+
+
+class MongoBackend:
+    """Shared cache in the `lesson_cache` collection; MongoDB's TTL monitor expires old entries"""
+
+    # Counting on every write is wasteful, so size eviction runs every N writes
+    EVICT_EVERY = 50
+
+    def __init__(self, collection, max_entries, ttl_seconds):
+        self.collection = collection
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._writes = 0
+        self._ensure_ttl_index(int(ttl_seconds))
+        self.collection.create_index("accessed_at")
+
+    def _ensure_ttl_index(self, ttl_seconds):
+        """Create the created_at TTL index, or change its expiry if LLM_CACHE_TTL_SECONDS has changed"""
+        try:
+            self.collection.create_index("created_at", expireAfterSeconds=ttl_seconds)
+        except OperationFailure as e:
+            if e.code != INDEX_OPTIONS_CONFLICT:
+                raise
+            self.collection.database.command(
+                "collMod", self.collection.name,
+                index={"keyPattern": {"created_at": 1}, "expireAfterSeconds": ttl_seconds}
+            )
+
+    def get(self, key):
+        now = datetime.utcnow()
+        doc = self.collection.find_one_and_update(
+            {"_id": key, "created_at": {"$gt": now - timedelta(seconds=self.ttl_seconds)}},
+            {"$set": {"accessed_at": now}},
+            projection={"value": True}
+        )
+        return doc["value"] if doc else None
+
+    def set(self, key, value):
+        now = datetime.utcnow()
+        self.collection.replace_one(
+            {"_id": key},
+            {"value": value, "created_at": now, "accessed_at": now},
+            upsert=True
+        )
+        self._writes += 1
+        if self._writes % self.EVICT_EVERY == 0:
+            self._evict()
+
+    def _evict(self):
+        excess = self.collection.estimated_document_count() - self.max_entries
+        if excess > 0:
+            stale = self.collection.find({}, {"_id": True}).sort("accessed_at", 1).limit(excess)
+            self.collection.delete_many({"_id": {"$in": [doc["_id"] for doc in stale]}})
+
+    def delete(self, key):
+        self.collection.delete_one({"_id": key})
+
+    def clear(self):
+        self.collection.delete_many({})
+
+    def __len__(self):
+        return self.collection.estimated_document_count()
+
+
+class ResponseCache:
+    """Front for a cache backend that keeps hit/miss counters"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _count(self, hit):
+        count_cache("llm_response", hit)
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key):
+        if self.backend is None:
+            return None
+        value = self.backend.get(key)
+        self._count(value is not None)
+        return value
+
+    def set(self, key, value):
+        if self.backend is not None and value:
+            self.backend.set(key, value)
+
+    def get_or_compute(self, key, compute, regenerate=False):
+        """Return the cached value for `key`, or compute and store it.
+
+        With `regenerate=True` the cache is bypassed for the read and the fresh
+        result replaces whatever was stored.
+        """
+        if not regenerate:
+            value = self.get(key)
+            if value is not None:
+                return value
+        value = compute()
+        self.set(key, value)
+        return value
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__ if self.backend else "disabled",
+            "entries": len(self.backend) if self.backend is not None else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _build_backend():
+    backend = (Settings.LLM_CACHE_BACKEND or "").lower()
+    if backend == "memory":
+        return MemoryBackend(Settings.LLM_CACHE_MAX_ENTRIES, Settings.LLM_CACHE_TTL_SECONDS)
+    if backend == "sqlite":
+        return SQLiteBackend(Settings.LLM_CACHE_PATH, Settings.LLM_CACHE_MAX_ENTRIES, Settings.LLM_CACHE_TTL_SECONDS)
+    if backend == "mongo":
+        from ..db.connection import get_database
+        collection = get_database()[Settings.COLLECTION_CACHE]
+        return MongoBackend(collection, Settings.LLM_CACHE_MAX_ENTRIES, Settings.LLM_CACHE_TTL_SECONDS)
+    return None
+
+
+def get_response_cache():
+    """Return the process-wide response cache configured in Settings"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(_build_backend())
+    return _cache
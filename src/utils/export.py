@@ -1,141 +1,529 @@
 """
 Export utilities for lesson plans
 """
+import asyncio
+import atexit
+import html
 import io
-import re
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from functools import lru_cache
+from importlib.util import find_spec
+from xml.sax.saxutils import escape as xml_escape
 
-# Export libraries
-try:
-    from docx import Document
-    from docx.shared import Inches, Pt, RGBColor
-    from docx.enum.text import WD_ALIGN_PARAGRAPH
-    DOCX_AVAILABLE = True
-except ImportError:
-    DOCX_AVAILABLE = False
+from ..config.settings import Settings
+from .metrics import timed
+from .markdown_blocks import (
+    HEADING, BULLET, NUMBERED, TABLE, CODE, RULE, parse_markdown
+)
+
+# Export libraries are imported inside the functions that use them, so
+# pages that never export do not pay for loading them
+DOCX_AVAILABLE = find_spec("docx") is not None
+REPORTLAB_AVAILABLE = find_spec("reportlab") is not None
+
+# Bump whenever the rendered output changes so cached exports are not reused
+EXPORT_TEMPLATE_VERSION = "2"
+
+# Link schemes kept as clickable links; anything else is rendered as plain text
+SAFE_LINK_SCHEMES = ("http://", "https://", "mailto:")
+
+LIST_INDENT = 18  # points per nesting level in PDF lists
+
+
+def _safe_link(url):
+    return url if url and url.strip().lower().startswith(SAFE_LINK_SCHEMES) else None
+
+
+def _meta_fields(plan_data):
+    return [
+        ("Grade/Level", plan_data['grade']),
+        ("Duration", plan_data['duration']),
+        ("Created", plan_data.get('created_at', 'N/A')),
+    ]
+
+
+def generate_markdown(plan_data):
+    """Generate a Markdown file from lesson plan"""
+    return f"""# {plan_data['subject']} - {plan_data['topic']}
+
+**Grade/Level:** {plan_data['grade']}  
+**Duration:** {plan_data['duration']}  
+**Created:** {plan_data.get('created_at', 'N/A')}
+
+---
 
-try:
-    from reportlab.lib.pagesizes import letter, A4
+{plan_data['content']}
+"""
+
+
+# ---------------------------------------------------------------------------
+# PDF (ReportLab)
+# ---------------------------------------------------------------------------
+
+@lru_cache(maxsize=None)
+def _pdf_styles():
+    """Paragraph styles for the PDF template, built once per process"""
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER
     from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.units import inch
-    from reportlab.lib.colors import RGBColor
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
-    from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
-    REPORTLAB_AVAILABLE = True
-except ImportError:
-    REPORTLAB_AVAILABLE = False
-    RGBColor = None
+
+    base = getSampleStyleSheet()
+    styles = {
+        'title': ParagraphStyle('PlanTitle', parent=base['Heading1'], fontSize=24,
+                                textColor=colors.HexColor('#00008B'), spaceAfter=30, alignment=TA_CENTER),
+        'meta': ParagraphStyle('PlanMeta', parent=base['Normal'], fontSize=11,
+                               textColor=colors.HexColor('#646464'), alignment=TA_CENTER),
+        'body': ParagraphStyle('PlanBody', parent=base['Normal'], spaceAfter=6),
+        'cell': ParagraphStyle('PlanCell', parent=base['Normal'], fontSize=9, leading=11),
+        'code': ParagraphStyle('PlanCode', parent=base['Code'], fontSize=8.5, leading=10.5,
+                               backColor=colors.HexColor('#F4F4F4'), borderPadding=4,
+                               spaceBefore=4, spaceAfter=8),
+    }
+    heading_sizes = {1: 18, 2: 14, 3: 12, 4: 11, 5: 10, 6: 10}
+    for level, size in heading_sizes.items():
+        spacing = max(6, size * 2 // 3)
+        styles[f'h{level}'] = ParagraphStyle(
+            f'PlanH{level}', parent=base[f'Heading{min(level, 6)}'], fontSize=size,
+            leading=size * 1.2, spaceAfter=spacing, spaceBefore=spacing
+        )
+    return styles
+
+
+@lru_cache(maxsize=None)
+def _pdf_list_style(level):
+    """Indented list item style for a nesting level"""
+    from reportlab.lib.styles import ParagraphStyle
+
+    return ParagraphStyle(
+        f'PlanList{level}', parent=_pdf_styles()['body'], spaceAfter=3,
+        leftIndent=LIST_INDENT * (level + 1), bulletIndent=LIST_INDENT * level + 4
+    )
+
+
+def _pdf_markup(spans):
+    """ReportLab paragraph markup for a list of inline spans"""
+    parts = []
+    for span in spans:
+        text = xml_escape(span.text)
+        if span.code:
+            text = f'<font face="Courier">{text}</font>'
+        if span.italic:
+            text = f'<i>{text}</i>'
+        if span.bold:
+            text = f'<b>{text}</b>'
+        link = _safe_link(span.link)
+        if link:
+            href = xml_escape(link, {'"': '&quot;'})
+            text = f'<link href="{href}" color="blue">{text}</link>'
+        parts.append(text)
+    return ''.join(parts)
+
+
+def _pdf_table(rows, width):
+    from reportlab.lib import colors
+    from reportlab.platypus import Paragraph, Table, TableStyle
+
+    styles = _pdf_styles()
+    columns = max(len(row) for row in rows)
+    data = [
+        [Paragraph(_pdf_markup(cell), styles['cell']) for cell in row] + [''] * (columns - len(row))
+        for row in rows
+    ]
+    table = Table(data, colWidths=[width / columns] * columns, repeatRows=1, hAlign='LEFT')
+    table.setStyle(TableStyle([
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#BBBBBB')),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#E8EAF6')),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ]))
+    return table
 
 
 def generate_pdf(plan_data):
     """Generate PDF from lesson plan"""
     if not REPORTLAB_AVAILABLE:
         return None
-    
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Preformatted
+    from reportlab.platypus.flowables import HRFlowable
+
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5*inch, bottomMargin=0.5*inch)
-    styles = getSampleStyleSheet()
+    styles = _pdf_styles()
     story = []
-    
-    # Title
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=RGBColor(0, 0, 139),
-        spaceAfter=30,
-        alignment=TA_CENTER
-    )
-    title = Paragraph(f"{plan_data['subject']} - {plan_data['topic']}", title_style)
-    story.append(title)
+
+    # Title and metadata
+    story.append(Paragraph(xml_escape(f"{plan_data['subject']} - {plan_data['topic']}"), styles['title']))
     story.append(Spacer(1, 0.2*inch))
-    
-    # Metadata
-    meta_style = ParagraphStyle(
-        'Meta',
-        parent=styles['Normal'],
-        fontSize=11,
-        textColor=RGBColor(100, 100, 100),
-        alignment=TA_CENTER
-    )
-    meta_text = f"<b>Grade/Level:</b> {plan_data['grade']} | <b>Duration:</b> {plan_data['duration']} | <b>Created:</b> {plan_data.get('created_at', 'N/A')}"
-    story.append(Paragraph(meta_text, meta_style))
+    meta_text = " | ".join(f"<b>{label}:</b> {xml_escape(str(value))}" for label, value in _meta_fields(plan_data))
+    story.append(Paragraph(meta_text, styles['meta']))
     story.append(Spacer(1, 0.3*inch))
-    
-    # Content - Simple markdown to text conversion
-    content = plan_data['content']
-    lines = content.split('\n')
-    for line in lines:
-        if line.strip():
-            if line.startswith('# '):
-                style = ParagraphStyle('H1', parent=styles['Heading1'], fontSize=18, spaceAfter=12, spaceBefore=12)
-                story.append(Paragraph(line[2:].strip(), style))
-            elif line.startswith('## '):
-                style = ParagraphStyle('H2', parent=styles['Heading2'], fontSize=14, spaceAfter=10, spaceBefore=10)
-                story.append(Paragraph(line[3:].strip(), style))
-            elif line.startswith('### '):
-                style = ParagraphStyle('H3', parent=styles['Heading3'], fontSize=12, spaceAfter=8, spaceBefore=8)
-                story.append(Paragraph(line[4:].strip(), style))
-            elif line.startswith('- ') or line.startswith('* '):
-                story.append(Paragraph(f"• {line[2:].strip()}", styles['Normal']))
-            elif line.startswith('**') and line.endswith('**'):
-                bold_text = line.strip('*')
-                story.append(Paragraph(f"<b>{bold_text}</b>", styles['Normal']))
-            else:
-                # Clean up markdown links
-                line = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', line)
-                story.append(Paragraph(line, styles['Normal']))
+
+    for block in parse_markdown(plan_data['content']):
+        if block.kind == HEADING:
+            story.append(Paragraph(_pdf_markup(block.spans), styles[f'h{block.level}']))
+        elif block.kind == BULLET:
+            story.append(Paragraph(_pdf_markup(block.spans), _pdf_list_style(block.level), bulletText='•'))
+        elif block.kind == NUMBERED:
+            story.append(Paragraph(_pdf_markup(block.spans), _pdf_list_style(block.level),
+                                   bulletText=f'{block.number}.'))
+        elif block.kind == TABLE:
+            story.append(_pdf_table(block.rows, doc.width))
             story.append(Spacer(1, 0.1*inch))
-    
+        elif block.kind == CODE:
+            story.append(Preformatted(block.text, styles['code']))
+        elif block.kind == RULE:
+            story.append(HRFlowable(width='100%', thickness=0.5, color=colors.grey, spaceBefore=6, spaceAfter=6))
+        else:
+            story.append(Paragraph(_pdf_markup(block.spans), styles['body']))
+
     doc.build(story)
     buffer.seek(0)
     return buffer.getvalue()
 
 
+# ---------------------------------------------------------------------------
+# Word (python-docx)
+# ---------------------------------------------------------------------------
+
+# Built-in list styles of the default python-docx template, by nesting level
+DOCX_BULLET_STYLES = ('List Bullet', 'List Bullet 2', 'List Bullet 3')
+DOCX_NUMBER_STYLES = ('List Number', 'List Number 2', 'List Number 3')
+
+
+def _docx_hyperlink(paragraph, url):
+    """Append an external hyperlink element to the paragraph; runs moved into it become the link text"""
+    from docx.opc.constants import RELATIONSHIP_TYPE
+    from docx.oxml import OxmlElement
+    from docx.oxml.ns import qn
+
+    r_id = paragraph.part.relate_to(url, RELATIONSHIP_TYPE.HYPERLINK, is_external=True)
+    hyperlink = OxmlElement('w:hyperlink')
+    hyperlink.set(qn('r:id'), r_id)
+    paragraph._p.append(hyperlink)
+    return hyperlink
+
+
+def _docx_runs(paragraph, spans):
+    """Append one styled run per inline span"""
+    from docx.shared import RGBColor
+
+    for span in spans:
+        run = paragraph.add_run(span.text)
+        run.bold = span.bold or None
+        run.italic = span.italic or None
+        if span.code:
+            run.font.name = 'Courier New'
+        link = _safe_link(span.link)
+        if link:
+            run.font.underline = True
+            run.font.color.rgb = RGBColor(0x05, 0x63, 0xC1)
+            _docx_hyperlink(paragraph, link).append(run._r)
+
+
+def _docx_rule(doc):
+    from docx.oxml import OxmlElement
+    from docx.oxml.ns import qn
+
+    paragraph = doc.add_paragraph()
+    borders = OxmlElement('w:pBdr')
+    bottom = OxmlElement('w:bottom')
+    for key, value in (('w:val', 'single'), ('w:sz', '6'), ('w:space', '1'), ('w:color', 'AAAAAA')):
+        bottom.set(qn(key), value)
+    borders.append(bottom)
+    paragraph._p.get_or_add_pPr().append(borders)
+
+
+def _docx_table(doc, rows):
+    columns = max(len(row) for row in rows)
+    table = doc.add_table(rows=len(rows), cols=columns)
+    table.style = 'Table Grid'
+    for r, row in enumerate(rows):
+        for c, cell in enumerate(row):
+            paragraph = table.cell(r, c).paragraphs[0]
+            _docx_runs(paragraph, [s._replace(bold=True) for s in cell] if r == 0 else cell)
+    doc.add_paragraph()
+
+
 def generate_word_doc(plan_data):
     """Generate Word document from lesson plan"""
     if not DOCX_AVAILABLE:
         return None
-    
+    from docx import Document
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.shared import Pt
+
     doc = Document()
-    
+
     # Title
     title = doc.add_heading(f"{plan_data['subject']} - {plan_data['topic']}", 0)
     title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    
+
     # Metadata
     meta_para = doc.add_paragraph()
-    meta_para.add_run(f"Grade/Level: {plan_data['grade']}").bold = True
-    meta_para.add_run(f" | Duration: {plan_data['duration']}").bold = True
-    meta_para.add_run(f" | Created: {plan_data.get('created_at', 'N/A')}").bold = True
+    for i, (label, value) in enumerate(_meta_fields(plan_data)):
+        meta_para.add_run(f"{' | ' if i else ''}{label}: {value}").bold = True
     meta_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    
+
     doc.add_paragraph()
-    
-    # Content
-    content = plan_data['content']
-    lines = content.split('\n')
-    
-    for line in lines:
-        if line.strip():
-            if line.startswith('# '):
-                doc.add_heading(line[2:].strip(), level=1)
-            elif line.startswith('## '):
-                doc.add_heading(line[3:].strip(), level=2)
-            elif line.startswith('### '):
-                doc.add_heading(line[4:].strip(), level=3)
-            elif line.startswith('- ') or line.startswith('* '):
-                doc.add_paragraph(line[2:].strip(), style='List Bullet')
-            elif line.startswith('**') and line.endswith('**'):
-                para = doc.add_paragraph()
-                para.add_run(line.strip('*')).bold = True
-            else:
-                # Clean markdown links
-                clean_line = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', line)
-                doc.add_paragraph(clean_line)
-    
+
+    for block in parse_markdown(plan_data['content']):
+        if block.kind == HEADING:
+            _docx_runs(doc.add_heading(level=block.level), block.spans)
+        elif block.kind == BULLET:
+            style = DOCX_BULLET_STYLES[min(block.level, len(DOCX_BULLET_STYLES) - 1)]
+            _docx_runs(doc.add_paragraph(style=style), block.spans)
+        elif block.kind == NUMBERED:
+            style = DOCX_NUMBER_STYLES[min(block.level, len(DOCX_NUMBER_STYLES) - 1)]
+            _docx_runs(doc.add_paragraph(style=style), block.spans)
+        elif block.kind == TABLE:
+            _docx_table(doc, block.rows)
+        elif block.kind == CODE:
+            run = doc.add_paragraph().add_run(block.text)
+            run.font.name = 'Courier New'
+            run.font.size = Pt(9)
+        elif block.kind == RULE:
+            _docx_rule(doc)
+        else:
+            _docx_runs(doc.add_paragraph(), block.spans)
+
     # Save to bytes
     buffer = io.BytesIO()
     doc.save(buffer)
     buffer.seek(0)
     return buffer.getvalue()
 
+
+# ---------------------------------------------------------------------------
+# HTML
+# ---------------------------------------------------------------------------
+
+HTML_STYLE = """
+body { font-family: -apple-system, "Segoe UI", Helvetica, Arial, sans-serif; max-width: 800px;
+       margin: 2rem auto; padding: 0 1rem; line-height: 1.55; color: #222; }
+h1.title { text-align: center; color: #00008B; }
+p.meta { text-align: center; color: #646464; }
+table { border-collapse: collapse; margin: 1rem 0; }
+th, td { border: 1px solid #bbb; padding: 0.35rem 0.6rem; vertical-align: top; }
+th { background: #E8EAF6; }
+pre { background: #f4f4f4; padding: 0.75rem; overflow-x: auto; }
+code { font-family: Consolas, "Courier New", monospace; }
+"""
+
+
+def _html_inline(spans):
+    parts = []
+    for span in spans:
+        text = html.escape(span.text)
+        if span.code:
+            text = f'<code>{text}</code>'
+        if span.italic:
+            text = f'<em>{text}</em>'
+        if span.bold:
+            text = f'<strong>{text}</strong>'
+        link = _safe_link(span.link)
+        if link:
+            text = f'<a href="{html.escape(link)}">{text}</a>'
+        parts.append(text)
+    return ''.join(parts)
+
+
+def _html_table(rows):
+    out = ['<table>']
+    for r, row in enumerate(rows):
+        tag = 'th' if r == 0 else 'td'
+        out.append('<tr>' + ''.join(f'<{tag}>{_html_inline(cell)}</{tag}>' for cell in row) + '</tr>')
+    out.append('</table>')
+    return '\n'.join(out)
+
+
+def generate_html(plan_data):
+    """Generate a standalone HTML page from lesson plan"""
+    title = html.escape(f"{plan_data['subject']} - {plan_data['topic']}")
+    meta_text = " | ".join(
+        f"<strong>{label}:</strong> {html.escape(str(value))}" for label, value in _meta_fields(plan_data)
+    )
+    out = [
+        '<!DOCTYPE html>',
+        f'<html><head><meta charset="utf-8"><title>{title}</title><style>{HTML_STYLE}</style></head><body>',
+        f'<h1 class="title">{title}</h1>',
+        f'<p class="meta">{meta_text}</p>',
+    ]
+
+    open_lists = []  # stack of (tag, level); each open list has an unclosed <li>
+    for block in parse_markdown(plan_data['content']):
+        if block.kind in (BULLET, NUMBERED):
+            tag = 'ul' if block.kind == BULLET else 'ol'
+            while open_lists and (open_lists[-1][1] > block.level
+                                  or (open_lists[-1][1] == block.level and open_lists[-1][0] != tag)):
+                out.append(f'</li></{open_lists.pop()[0]}>')
+            if open_lists and open_lists[-1][1] == block.level:
+                out.append('</li>')
+            else:
+                start = f' start="{block.number}"' if tag == 'ol' and block.number != 1 else ''
+                out.append(f'<{tag}{start}>')
+                open_lists.append((tag, block.level))
+            out.append(f'<li>{_html_inline(block.spans)}')
+            continue
+        while open_lists:
+            out.append(f'</li></{open_lists.pop()[0]}>')
+
+        if block.kind == HEADING:
+            out.append(f'<h{block.level}>{_html_inline(block.spans)}</h{block.level}>')
+        elif block.kind == TABLE:
+            out.append(_html_table(block.rows))
+        elif block.kind == CODE:
+            out.append(f'<pre><code>{html.escape(block.text)}</code></pre>')
+        elif block.kind == RULE:
+            out.append('<hr>')
+        else:
+            out.append(f'<p>{_html_inline(block.spans)}</p>')
+
+    while open_lists:
+        out.append(f'</li></{open_lists.pop()[0]}>')
+    out.append('</body></html>')
+    return '\n'.join(out).encode('utf-8')
+
+
+# ---------------------------------------------------------------------------
+# Export worker pool
+# ---------------------------------------------------------------------------
+
+RENDERERS = {
+    "md": generate_markdown,
+    "pdf": generate_pdf,
+    "docx": generate_word_doc,
+    "html": generate_html,
+}
+
+
+class ExportQueueFull(Exception):
+    """Raised instead of queueing a render when the export pool is saturated"""
+
+    def __init__(self):
+        super().__init__("The export service is busy. Please try again in a moment.")
+
+
+class ExportTimeout(TimeoutError):
+    """Raised when a render does not finish within its timeout"""
+
+    def __init__(self, fmt, timeout):
+        super().__init__(f"{fmt.upper()} export timed out after {timeout:g} seconds.")
+
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+_SLOTS = None
+
+
+def _warm_worker():
+    """Pool initializer: load the rendering libraries and PDF styles once per worker"""
+    if REPORTLAB_AVAILABLE:
+        _pdf_styles()
+    if DOCX_AVAILABLE:
+        from docx import Document
+        Document()
+
+
+def _noop():
+    return None
+
+
+def get_export_pool():
+    """Process pool shared by every session; workers are started and warmed on first use.
+
+    Workers are spawned rather than forked because the app server is
+    multi-threaded. Returns None when Settings.EXPORT_WORKERS is 0, and
+    rendering then happens inline.
+    """
+    global _POOL, _SLOTS
+    if Settings.EXPORT_WORKERS <= 0:
+        return None
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                pool = ProcessPoolExecutor(
+                    Settings.EXPORT_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_warm_worker
+                )
+                for _ in range(Settings.EXPORT_WORKERS):
+                    pool.submit(_noop)
+                _SLOTS = threading.BoundedSemaphore(Settings.EXPORT_WORKERS + Settings.EXPORT_QUEUE_SIZE)
+                _POOL = pool
+    return _POOL
+
+
+def shutdown_export_pool():
+    """Stop the export workers; the next render starts a new pool"""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.shutdown(wait=False, cancel_futures=True)
+            _POOL = None
+
+
+atexit.register(shutdown_export_pool)
+
+
+def _render_in_worker(plan_data, fmt):
+    return RENDERERS[fmt](plan_data)
+
+
+def submit_render(plan_data, fmt, wait=None):
+    """Queue a render on the export pool and return its concurrent.futures.Future.
+
+    At most EXPORT_WORKERS renders run at once, with EXPORT_QUEUE_SIZE more
+    waiting. Past that, ExportQueueFull is raised rather than letting the
+    backlog grow; with `wait`, a free slot is waited for up to that many
+    seconds first. A slot is freed only when its render actually finishes,
+    even if the caller has given up waiting.
+    """
+    pool = get_export_pool()
+    if not (_SLOTS.acquire(timeout=wait) if wait else _SLOTS.acquire(blocking=False)):
+        raise ExportQueueFull()
+    try:
+        future = pool.submit(_render_in_worker, plan_data, fmt)
+    except BaseException:
+        _SLOTS.release()
+        raise
+    future.add_done_callback(lambda _: _SLOTS.release())
+    return future
+
+
+async def render(plan_data, fmt, timeout=None):
+    """Render `plan_data` as `fmt` in the export pool without blocking the event loop"""
+    timeout = timeout or Settings.EXPORT_RENDER_TIMEOUT
+    with timed("export_render_seconds", format=fmt):
+        if get_export_pool() is None:
+            loop = asyncio.get_running_loop()
+            return await asyncio.wait_for(loop.run_in_executor(None, RENDERERS[fmt], plan_data), timeout)
+        future = submit_render(plan_data, fmt)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            raise ExportTimeout(fmt, timeout)
+
+
+def render_blocking(plan_data, fmt, timeout=None):
+    """Synchronous render() for the Streamlit script thread, which waits without holding the GIL"""
+    timeout = timeout or Settings.EXPORT_RENDER_TIMEOUT
+    with timed("export_render_seconds", format=fmt):
+        if get_export_pool() is None:
+            return RENDERERS[fmt](plan_data)
+        return render_result(submit_render(plan_data, fmt), fmt, timeout)
+
+
+def render_result(future, fmt, timeout=None):
+    """Wait for a submit_render() future; raises ExportTimeout after `timeout` seconds"""
+    timeout = timeout or Settings.EXPORT_RENDER_TIMEOUT
+    try:
+        return future.result(timeout)
+    except FutureTimeout:
+        future.cancel()
+        raise ExportTimeout(fmt, timeout)
@@ -0,0 +1,125 @@
+"""
+Cache for rendered PDF, Word and HTML exports
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from ..config.settings import Settings
+from .export import EXPORT_TEMPLATE_VERSION, render_blocking
+from .metrics import count_cache
+
+
+def export_cache_key(plan_data, fmt):
+    """Content hash of the plan fields, output format and template version"""
+    payload = json.dumps(
+        [EXPORT_TEMPLATE_VERSION, fmt, {k: str(v) for k, v in plan_data.items()}],
+        sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ExportCache:
+    """Two-tier cache: an in-memory LRU capped by total bytes, plus an optional directory on disk"""
+
+    def __init__(self, max_bytes, disk_dir=None, disk_max_bytes=0):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _remember(self, key, data):
+        with self._lock:
+            if key in self._entries:
+                self._size -= len(self._entries.pop(key))
+            if len(data) > self.max_bytes:
+                return
+            self._entries[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key)
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                return data
+        if self.disk_dir:
+            try:
+                with open(self._disk_path(key), "rb") as fh:
+                    data = fh.read()
+                # Touched so the disk pruning sees it as recently used
+                os.utime(self._disk_path(key))
+            except OSError:
+                # Missing, or removed by another process's pruning
+                return None
+            self._remember(key, data)
+            return data
+        return None
+
+    def put(self, key, data):
+        self._remember(key, data)
+        if self.disk_dir:
+            tmp_path = self._disk_path(key) + ".tmp"
+            with open(tmp_path, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp_path, self._disk_path(key))
+            self._prune_disk()
+
+    def _prune_disk(self):
+        """Delete least recently used files once the directory exceeds its byte cap"""
+        entries = [e for e in os.scandir(self.disk_dir) if e.is_file() and not e.name.endswith(".tmp")]
+        total = sum(e.stat().st_size for e in entries)
+        if total <= self.disk_max_bytes:
+            return
+        for entry in sorted(entries, key=lambda e: e.stat().st_mtime):
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+            except OSError:
+                continue
+            total -= size
+            if total <= self.disk_max_bytes:
+                break
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_export_cache():
+    """Return the process-wide export cache configured in Settings"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ExportCache(Settings.EXPORT_CACHE_MAX_BYTES, Settings.EXPORT_CACHE_DIR,
+                                     Settings.EXPORT_CACHE_DISK_MAX_BYTES)
+    return _cache
+
+
+def render_export(plan_data, fmt):
+    """Render `plan_data` as "pdf", "docx" or "html", reusing any earlier render of the same content.
+
+    Cache misses are rendered in the export worker pool, off the calling thread.
+    """
+    cache = get_export_cache()
+    key = export_cache_key(plan_data, fmt)
+    data = cache.get(key)
+    count_cache("export", data is not None)
+    if data is None:
+        data = render_blocking(plan_data, fmt)
+        if data:
+            cache.put(key, data)
+    return data
@@ -1,58 +1,347 @@
 """
 LLM utilities for AI Lesson Planner
 """
-import streamlit as st
-from langchain_groq import ChatGroq
-from langchain_core.output_parsers import StrOutputParser
+import asyncio
+import atexit
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from ..config.settings import Settings
+from .cache import get_response_cache, make_cache_key
+from .metrics import inc, observe, timed
+from .notes import merge_notes_and_quiz, question_counts
+from .prompts import build_notes_part_prompts, build_notes_quiz_prompt, notes_context_ready, notes_fit_one_prompt
+from .resilience import call_with_resilience, acall_with_resilience, stream_with_resilience, get_groq_breaker
+
+
+# --- Process-wide client registry ---
+# Streamlit re-executes the script for every interaction and every session,
+# so chains are built once per (model, temperature, api key) and shared.
+_CLIENTS = {}
+_CLIENTS_LOCK = threading.Lock()
+
+# Background LLM calls (notes/quiz alongside a streaming plan) share one executor
+_EXECUTOR = None
+
+# Async calls run on one long-lived event loop so the pooled async HTTP
+# connections stay bound to a loop that outlives any single script run
+_LOOP = None
+
+# Used when ChatGroq is not given groq_api_base, as the Groq SDK does
+GROQ_API_BASE = "https://api.groq.com"
+
+
+class _PooledClient:
+    """A ChatGroq chain together with the keep-alive HTTP pools it owns"""
+
+    def __init__(self, model, temperature, api_key):
+        # Imported on first use; the SDK stack is slow to load and the login page never needs it
+        import httpx
+        from langchain_groq import ChatGroq
+        from langchain_core.output_parsers import StrOutputParser
+
+        limits = httpx.Limits(
+            max_connections=Settings.GROQ_MAX_CONNECTIONS,
+            max_keepalive_connections=Settings.GROQ_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=Settings.GROQ_KEEPALIVE_EXPIRY
+        )
+        timeout = httpx.Timeout(Settings.GROQ_REQUEST_TIMEOUT)
+        self.model_name = model
+        self.api_key = api_key
+        self.http_client = httpx.Client(limits=limits, timeout=timeout)
+        self.http_async_client = httpx.AsyncClient(limits=limits, timeout=timeout)
+        self.model = ChatGroq(
+            model=model,
+            groq_api_key=api_key,
+            temperature=temperature,
+            # Retries are handled by the resilience layer, not the SDK
+            max_retries=0,
+            http_client=self.http_client,
+            http_async_client=self.http_async_client,
+            callbacks=[_token_usage_handler()]
+        )
+        self.chain = self.model | StrOutputParser()
+
+    def is_healthy(self):
+        return not self.http_client.is_closed and not self.http_async_client.is_closed
+
+    def probe(self, timeout):
+        """Fetch the model's metadata over the pooled connections; uses no tokens. Returns the HTTP status"""
+        base = (self.model.groq_api_base or GROQ_API_BASE).rstrip("/")
+        response = self.http_client.get(
+            f"{base}/openai/v1/models/{self.model_name}",
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            timeout=timeout
+        )
+        return response.status_code
+
+    def close(self):
+        self.http_client.close()
+        try:
+            asyncio.run(self.http_async_client.aclose())
+        except Exception:
+            # The async pool may be bound to an event loop that is already gone
+            pass
 
 
-def LLM_Setup(prompt):
-    """Setup and invoke LLM with given prompt"""
+def _record_token_usage(response):
+    """Count the prompt and completion tokens Groq reports for one call"""
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    prompt, completion = usage.get("prompt_tokens"), usage.get("completion_tokens")
+    if prompt is None:
+        # Streamed calls report usage on the final chunk's message instead
+        for generations in response.generations:
+            for generation in generations:
+                metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if metadata:
+                    prompt, completion = metadata.get("input_tokens"), metadata.get("output_tokens")
+    if prompt:
+        inc("llm_tokens_total", prompt, kind="prompt")
+    if completion:
+        inc("llm_tokens_total", completion, kind="completion")
+
+
+def _token_usage_handler():
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class TokenUsageHandler(BaseCallbackHandler):
+        def on_llm_end(self, response, **kwargs):
+            _record_token_usage(response)
+
+    return TokenUsageHandler()
+
+
+def _ensure_api_key():
+    """Stop the script with setup instructions if no Groq key is configured"""
     if not Settings.GROQ_API_KEY or Settings.GROQ_API_KEY == 'your_groq_api_key_here':
+        # Imported here so that src.utils never imports streamlit: export workers and the
+        # scripts/ CLIs run with the repo root first on sys.path, where streamlit.py shadows it
+        import streamlit as st
         st.error("❌ Groq API key not found. Please set your API key in the .env file.")
         st.info("💡 **How to fix:**\n1. Create a `.env` file in the project root\n2. Add: `key=your_actual_groq_api_key`\n3. Get your API key from: https://console.groq.com/")
         st.stop()
-    
-    model = ChatGroq(
-        model=Settings.GROQ_MODEL,
-        groq_api_key=Settings.GROQ_API_KEY,
-        temperature=Settings.GROQ_TEMPERATURE
+
+
+def _get_client(model=None, temperature=None, api_key=None):
+    key = (
+        model or Settings.GROQ_MODEL,
+        Settings.GROQ_TEMPERATURE if temperature is None else temperature,
+        api_key or Settings.GROQ_API_KEY
+    )
+    client = _CLIENTS.get(key)
+    if client is not None and client.is_healthy():
+        return client
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(key)
+        if client is None or not client.is_healthy():
+            if client is not None:
+                client.close()
+            client = _PooledClient(*key)
+            _CLIENTS[key] = client
+    return client
+
+
+def get_llm_chain(model=None, temperature=None, api_key=None):
+    """Return the shared `model | parser` chain for the given configuration"""
+    return _get_client(model, temperature, api_key).chain
+
+
+def check_llm_health(timeout=5.0):
+    """Probe Groq through the default pooled client, for the admin timing panel.
+
+    Fetches the configured model's metadata, which checks the network path,
+    the API key and the model name without spending tokens or a rate-limit
+    slot. Clients whose pools have been closed are dropped first. Returns
+    {"model", "ok", "status", "latency_ms", "breaker"}; the probe is also
+    counted in llm_health_checks_total and timed as llm_health_seconds.
+    """
+    with _CLIENTS_LOCK:
+        for key, client in list(_CLIENTS.items()):
+            if not client.is_healthy():
+                client.close()
+                del _CLIENTS[key]
+
+    report = {"model": Settings.GROQ_MODEL, "ok": False, "status": None, "latency_ms": None,
+              "breaker": get_groq_breaker().state}
+    if not Settings.GROQ_API_KEY or Settings.GROQ_API_KEY == 'your_groq_api_key_here':
+        report["status"] = "no API key"
+    else:
+        started = time.perf_counter()
+        try:
+            status = _get_client().probe(timeout)
+            report["ok"], report["status"] = status == 200, status
+        except Exception as e:
+            report["status"] = type(e).__name__
+        elapsed = time.perf_counter() - started
+        report["latency_ms"] = round(elapsed * 1000, 1)
+        observe("llm_health_seconds", elapsed)
+    inc("llm_health_checks_total", result="ok" if report["ok"] else "failed")
+    return report
+
+
+def get_llm_executor():
+    """Return the shared thread pool used for concurrent LLM calls"""
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        with _CLIENTS_LOCK:
+            if _EXECUTOR is None:
+                _EXECUTOR = ThreadPoolExecutor(max_workers=Settings.LLM_WORKERS, thread_name_prefix="llm")
+    return _EXECUTOR
+
+
+def get_llm_loop():
+    """Return the background event loop that async LLM calls are scheduled on"""
+    global _LOOP
+    if _LOOP is None:
+        with _CLIENTS_LOCK:
+            if _LOOP is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="llm-loop", daemon=True).start()
+                _LOOP = loop
+    return _LOOP
+
+
+def shutdown_llm_clients():
+    """Close every pooled client; the next call rebuilds them on demand"""
+    global _EXECUTOR, _LOOP
+    with _CLIENTS_LOCK:
+        if _EXECUTOR is not None:
+            _EXECUTOR.shutdown(wait=False, cancel_futures=True)
+            _EXECUTOR = None
+        if _LOOP is not None:
+            _LOOP.call_soon_threadsafe(_LOOP.stop)
+            _LOOP = None
+        for client in _CLIENTS.values():
+            client.close()
+        _CLIENTS.clear()
+
+
+atexit.register(shutdown_llm_clients)
+
+
+def _timed_call(mode, call):
+    with timed("llm_request_seconds", mode=mode):
+        return call()
+
+
+def LLM_Setup(prompt, regenerate=False):
+    """Setup and invoke LLM with given prompt, serving repeats from the response cache"""
+    _ensure_api_key()
+    key = make_cache_key(prompt, Settings.GROQ_MODEL, Settings.GROQ_TEMPERATURE)
+    return get_response_cache().get_or_compute(
+        key,
+        lambda: _timed_call("invoke", lambda: call_with_resilience(lambda timeout: get_llm_chain().invoke(prompt, timeout=timeout))),
+        regenerate=regenerate
     )
-    parser = StrOutputParser()
-    output = model | parser
-    output = output.invoke(prompt)
+
+
+async def LLM_Setup_Async(prompt, regenerate=False):
+    """Async counterpart of LLM_Setup; run it on the loop from get_llm_loop()"""
+    cache = get_response_cache()
+    key = make_cache_key(prompt, Settings.GROQ_MODEL, Settings.GROQ_TEMPERATURE)
+    if not regenerate:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    with timed("llm_request_seconds", mode="ainvoke"):
+        output = await acall_with_resilience(lambda: get_llm_chain().ainvoke(prompt))
+    cache.set(key, output)
     return output
 
 
-def generate_notes_and_quiz(plan_content, subject, topic, grade):
+def LLM_Stream(prompt, regenerate=False):
+    """Stream the LLM response chunk by chunk; the completed text is cached like LLM_Setup"""
+    _ensure_api_key()
+    cache = get_response_cache()
+    key = make_cache_key(prompt, Settings.GROQ_MODEL, Settings.GROQ_TEMPERATURE)
+    if not regenerate:
+        cached = cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+    chunks = []
+    started = time.perf_counter()
+    with timed("llm_request_seconds", mode="stream"):
+        for chunk in stream_with_resilience(lambda: get_llm_chain().stream(prompt)):
+            if not chunks:
+                observe("llm_first_token_seconds", time.perf_counter() - started)
+            chunks.append(chunk)
+            yield chunk
+    cache.set(key, "".join(chunks))
+
+
+@timed("llm_notes_quiz_seconds")
+def generate_notes_and_quiz(plan_content, subject, topic, grade, regenerate=False):
     """Generate comprehensive notes and quiz from lesson plan"""
-    prompt = f"""Based on the following lesson plan for {subject} - {topic} (Grade/Level: {grade}), generate:
+    if not notes_fit_one_prompt(plan_content, subject, topic, grade):
+        return _map_reduce_notes_and_quiz(plan_content, subject, topic, grade, regenerate)
+    prompt = build_notes_quiz_prompt(plan_content, subject, topic, grade)
+    return LLM_Setup(prompt, regenerate=regenerate)
+
+
+def _map_reduce_notes_and_quiz(plan_content, subject, topic, grade, regenerate=False):
+    """Notes and questions for each part of a long plan in parallel, merged into one document.
+
+    The part calls run together on the shared event loop (the Groq token bucket
+    still applies), so latency follows the largest part, not the plan length.
+    """
+    _ensure_api_key()
+    parts = build_notes_part_prompts(plan_content, subject, topic, grade, question_counts)
+    if len(parts) < 2:
+        # Nothing to run in parallel; one ordinary notes call is cheaper
+        return LLM_Setup(build_notes_quiz_prompt(plan_content, subject, topic, grade), regenerate=regenerate)
+    inc("notes_map_reduce_total")
+    inc("notes_map_reduce_parts_total", len(parts))
+
+    async def run():
+        return await asyncio.gather(*(LLM_Setup_Async(prompt, regenerate=regenerate) for _, prompt in parts))
+
+    answers = asyncio.run_coroutine_threadsafe(run(), get_llm_loop()).result()
+    return merge_notes_and_quiz([(title, answer) for (title, _), answer in zip(parts, answers)])
 
-1. **Comprehensive Study Notes** - Detailed notes that students can use for studying, including:
-   - Key concepts and definitions
-   - Important points and explanations
-   - Examples and illustrations
-   - Summary of main topics
-   - Important formulas/theorems (if applicable)
 
-2. **Quiz/Assessment Questions** - Create a quiz with:
-   - 10-15 multiple choice questions (with 4 options each)
-   - 5-7 short answer questions
-   - 2-3 essay/long answer questions
-   - Answer key with explanations
+class FullPackageJob:
+    """Stream a lesson plan while its notes/quiz are generated concurrently.
 
-Format the response in Markdown with clear sections:
-- # Study Notes
-- # Quiz Questions
-- # Answer Key
+    The notes prompt only uses the plan sections listed in prompts.NOTES_SECTIONS,
+    so the notes call is submitted as soon as all of them have streamed in. The
+    result is identical to generating the notes afterwards, but the two calls
+    overlap for the rest of the plan (homework, resources, ...). Plans too long
+    for one notes prompt are covered in full by map-reduce once streaming ends.
+    """
 
-Make it appropriate for {grade} level students.
+    def __init__(self, prompt, subject, topic, grade, regenerate=False):
+        self.prompt = prompt
+        self.subject = subject
+        self.topic = topic
+        self.grade = grade
+        self.regenerate = regenerate
+        self.plan = None
+        self.notes_future = None
 
-Lesson Plan Content:
-{plan_content[:2000]}  # Limit to avoid token issues
+    def _start_notes(self, plan_content):
+        self.notes_future = get_llm_executor().submit(
+            generate_notes_and_quiz,
+            plan_content, self.subject, self.topic, self.grade,
+            regenerate=self.regenerate
+        )
 
-Generate comprehensive, well-structured notes and quiz questions."""
-    
-    return LLM_Setup(prompt)
+    def stream(self):
+        """Yield plan chunks, kicking off notes generation part-way through"""
+        chunks = []
+        for chunk in LLM_Stream(self.prompt, regenerate=self.regenerate):
+            chunks.append(chunk)
+            yield chunk
+            # A section is complete once the next heading starts, which begins a line
+            if self.notes_future is None and ("\n" in chunk or "#" in chunk):
+                partial = "".join(chunks)
+                if notes_context_ready(partial, self.subject, self.topic, self.grade):
+                    self._start_notes(partial)
+        self.plan = "".join(chunks)
+        if self.notes_future is None:
+            self._start_notes(self.plan)
 
+    def notes(self, timeout=None):
+        """Block until the notes/quiz are ready and return them"""
+        return self.notes_future.result(timeout=timeout)
@@ -0,0 +1,124 @@
+"""
+Single-pass Markdown parser shared by the export backends
+"""
+import re
+from collections import namedtuple
+
+# Block kinds emitted by parse_markdown()
+HEADING = "heading"      # level, spans
+PARAGRAPH = "paragraph"  # spans
+BULLET = "bullet"        # level, spans
+NUMBERED = "numbered"    # level, number, spans
+TABLE = "table"          # rows: list of rows of cells (each cell a list of spans); first row is the header
+CODE = "code"            # text
+RULE = "rule"
+
+Block = namedtuple("Block", ["kind", "spans", "level", "number", "rows", "text"])
+Block.__new__.__defaults__ = (None, 0, None, None, None)
+
+# Inline span: text plus style flags; `link` is the target URL or None
+Span = namedtuple("Span", ["text", "bold", "italic", "code", "link"])
+
+_HEADING_RE = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+_BULLET_RE = re.compile(r'^(\s*)[-*+]\s+(.*)$')
+_NUMBERED_RE = re.compile(r'^(\s*)(\d+)[.)]\s+(.*)$')
+_RULE_RE = re.compile(r'^\s*([-*_])(\s*\1){2,}\s*$')
+_TABLE_SEPARATOR_RE = re.compile(r'^\s*\|?\s*:?-{2,}:?\s*(\|\s*:?-{2,}:?\s*)*\|?\s*$')
+_INLINE_RE = re.compile(
+    r'(`[^`]+`)'                                            # code
+    r'|(\*\*[^*]+\*\*|(?<!\w)__[^_]+__(?!\w))'              # bold
+    r'|(\*[^*\s][^*]*\*|(?<!\w)_[^_\s][^_]*_(?!\w))'        # italic
+    r'|(\[[^\]]+\]\([^)]+\))'                               # link
+)
+_LINK_RE = re.compile(r'\[([^\]]+)\]\(([^)]+)\)')
+
+
+def parse_inline(text, bold=False, italic=False):
+    """Split a line into styled spans for bold, italic, inline code and links"""
+    spans = []
+    pos = 0
+    for match in _INLINE_RE.finditer(text):
+        if match.start() > pos:
+            spans.append(Span(text[pos:match.start()], bold, italic, False, None))
+        code, strong, emphasis, link = match.groups()
+        if code:
+            spans.append(Span(code[1:-1], bold, italic, True, None))
+        elif strong:
+            spans.extend(parse_inline(strong[2:-2], True, italic))
+        elif emphasis:
+            spans.extend(parse_inline(emphasis[1:-1], bold, True))
+        else:
+            label, url = _LINK_RE.match(link).groups()
+            spans.extend(s._replace(link=url) for s in parse_inline(label, bold, italic))
+        pos = match.end()
+    if pos < len(text):
+        spans.append(Span(text[pos:], bold, italic, False, None))
+    return spans
+
+
+def _split_row(line):
+    cells = line.strip().strip('|').split('|')
+    return [parse_inline(cell.strip()) for cell in cells]
+
+
+def _indent_level(indent):
+    return len(indent.replace('\t', '    ')) // 2
+
+
+def parse_markdown(content):
+    """Parse Markdown into a flat list of Blocks in one pass over the lines"""
+    blocks = []
+    lines = content.split('\n')
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+        i += 1
+        if not stripped:
+            continue
+
+        if stripped.startswith('```'):
+            code_lines = []
+            while i < len(lines) and not lines[i].strip().startswith('```'):
+                code_lines.append(lines[i])
+                i += 1
+            i += 1  # closing fence
+            blocks.append(Block(CODE, text='\n'.join(code_lines)))
+            continue
+
+        match = _HEADING_RE.match(stripped)
+        if match:
+            blocks.append(Block(HEADING, parse_inline(match.group(2)), level=len(match.group(1))))
+            continue
+
+        if _RULE_RE.match(stripped):
+            blocks.append(Block(RULE))
+            continue
+
+        if '|' in stripped and i < len(lines) and _TABLE_SEPARATOR_RE.match(lines[i]):
+            rows = [_split_row(stripped)]
+            i += 1  # separator row
+            while i < len(lines) and '|' in lines[i] and lines[i].strip():
+                rows.append(_split_row(lines[i]))
+                i += 1
+            blocks.append(Block(TABLE, rows=rows))
+            continue
+
+        match = _BULLET_RE.match(line)
+        if match:
+            blocks.append(Block(BULLET, parse_inline(match.group(2).strip()), level=_indent_level(match.group(1))))
+            continue
+
+        match = _NUMBERED_RE.match(line)
+        if match:
+            blocks.append(Block(NUMBERED, parse_inline(match.group(3).strip()),
+                                level=_indent_level(match.group(1)), number=int(match.group(2))))
+            continue
+
+        blocks.append(Block(PARAGRAPH, parse_inline(stripped)))
+    return blocks
+
+
+def spans_text(spans):
+    """Plain text of a span list"""
+    return ''.join(span.text for span in spans)
@@ -0,0 +1,279 @@
+"""
+Process-wide latency histograms and counters, with a Prometheus/JSON endpoint
+"""
+import bisect
+import json
+import logging
+import threading
+import time
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pymongo import monitoring
+
+from ..config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds, from a cached Mongo read up to a slow LLM call
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram in the Prometheus layout"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Estimate of the q-quantile, interpolated within its bucket"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else lower
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+# (name, ((label, value), ...)) -> Histogram / number
+_histograms = {}
+_counters = {}
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def observe(name, seconds, **labels):
+    """Record one latency sample (in seconds) in histogram `name`"""
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram()
+        histogram.observe(seconds)
+    trace = getattr(_local, "trace", None)
+    if trace is not None:
+        trace.append((name, key[1], seconds))
+
+
+def inc(name, amount=1, **labels):
+    """Add `amount` to counter `name`"""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def count_cache(cache, hit):
+    """Count a cache lookup; hit rates are hits / (hits + misses) per cache"""
+    inc("cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+
+class timed:
+    """Time a block or function into histogram `name`; exceptions also count in errors_total.
+
+        with timed("export_render_seconds", format="pdf"):
+            ...
+
+        @timed("llm_notes_quiz_seconds")
+        def generate_notes_and_quiz(...):
+    """
+
+    def __init__(self, name, **labels):
+        self.name = name
+        self.labels = labels
+
+    def __call__(self, fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            # A fresh instance per call, so concurrent calls do not share a start time
+            with timed(self.name, **self.labels):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.seconds = time.perf_counter() - self._started
+        observe(self.name, self.seconds, **self.labels)
+        if exc_type is not None and exc_type is not GeneratorExit:
+            inc("errors_total", operation=self.name, error=exc_type.__name__)
+        return False
+
+
+def start_trace():
+    """Collect every sample recorded on this thread until end_trace() (one script rerun)"""
+    _local.trace = []
+
+
+def end_trace():
+    """Samples recorded since start_trace() as (name, labels, seconds) tuples"""
+    trace = getattr(_local, "trace", None) or []
+    _local.trace = None
+    return trace
+
+
+def metrics_snapshot():
+    """All histograms and counters as plain data"""
+    with _lock:
+        histograms = [(name, dict(labels), h.snapshot()) for (name, labels), h in _histograms.items()]
+        counters = [(name, dict(labels), value) for (name, labels), value in _counters.items()]
+    return {
+        "histograms": [{"name": n, "labels": l, **s} for n, l, s in sorted(histograms, key=str)],
+        "counters": [{"name": n, "labels": l, "value": v} for n, l, v in sorted(counters, key=str)],
+    }
+
+
+def cache_hit_rates():
+    """{cache name: hit rate} from cache_requests_total"""
+    totals = {}
+    with _lock:
+        for (name, labels), value in _counters.items():
+            if name != "cache_requests_total":
+                continue
+            labels = dict(labels)
+            hits, lookups = totals.get(labels["cache"], (0, 0))
+            totals[labels["cache"]] = (hits + (value if labels["result"] == "hit" else 0), lookups + value)
+    return {cache: hits / lookups for cache, (hits, lookups) in totals.items() if lookups}
+
+
+def _prom_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def prometheus_text():
+    """Metrics in the Prometheus text exposition format"""
+    with _lock:
+        histograms = sorted((k, list(h.counts), h.buckets, h.count, h.sum) for k, h in _histograms.items())
+        counters = sorted(_counters.items())
+    lines = []
+    typed = set()
+    for (name, labels), counts, buckets, count, total in histograms:
+        if name not in typed:
+            lines.append(f"# TYPE {name} histogram")
+            typed.add(name)
+        cumulative = 0
+        for bound, n in zip(list(buckets) + ["+Inf"], counts):
+            cumulative += n
+            lines.append(f"{name}_bucket{_prom_labels(labels, [('le', bound)])} {cumulative}")
+        lines.append(f"{name}_sum{_prom_labels(labels)} {total}")
+        lines.append(f"{name}_count{_prom_labels(labels)} {count}")
+    for (name, labels), value in counters:
+        if name not in typed:
+            lines.append(f"# TYPE {name} counter")
+            typed.add(name)
+        lines.append(f"{name}{_prom_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path == "/metrics":
+            body, content_type = prometheus_text(), "text/plain; version=0.0.4"
+        elif path == "/metrics.json":
+            body, content_type = json.dumps(metrics_snapshot()), "application/json"
+        else:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port=None, host=None):
+    """Serve /metrics (Prometheus) and /metrics.json from a daemon thread; once per process.
+
+    Does nothing when the port (Settings.METRICS_PORT by default) is 0.
+    Returns the server, or None if disabled or the port is taken.
+    """
+    global _server
+    port = Settings.METRICS_PORT if port is None else port
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host or Settings.METRICS_HOST, port), _MetricsHandler)
+            except OSError as exc:
+                logger.warning("Metrics endpoint not started on port %s: %s", port, exc)
+                return None
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    return _server
+
+
+class MongoCommandTimer(monitoring.CommandListener):
+    """Times every MongoDB command into mongo_command_seconds{command, collection}"""
+
+    def __init__(self):
+        self._collections = {}
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        self._collections[(event.connection_id, event.request_id)] = collection if isinstance(collection, str) else ""
+
+    def _finish(self, event, failed):
+        collection = self._collections.pop((event.connection_id, event.request_id), "")
+        observe("mongo_command_seconds", event.duration_micros / 1e6,
+                command=event.command_name, collection=collection)
+        if failed:
+            inc("errors_total", operation="mongo_command_seconds", error=event.command_name)
+
+    def succeeded(self, event):
+        self._finish(event, False)
+
+    def failed(self, event):
+        self._finish(event, True)
+
+
+_mongo_listener = None
+
+
+def instrument_mongo():
+    """Register the command timer for MongoClients created from now on; idempotent"""
+    global _mongo_listener
+    with _server_lock:
+        if _mongo_listener is None:
+            _mongo_listener = MongoCommandTimer()
+            monitoring.register(_mongo_listener)
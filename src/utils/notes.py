@@ -0,0 +1,221 @@
+"""
+Merge per-part notes and quiz questions into one notes/quiz document
+
+Long lesson plans are split into parts (prompts.split_plan_for_notes) and
+each part is sent to the model on its own with NOTES_PART_TEMPLATE. This
+module parses those answers and reduces them into the same "# Study Notes /
+# Quiz Questions / # Answer Key" document a single call produces: notes in
+plan order, repeated bullet points and near-duplicate questions removed, and
+the questions trimmed to the usual quiz size with every part represented.
+"""
+import logging
+import math
+import re
+from collections import namedtuple
+
+from .metrics import inc
+
+logger = logging.getLogger(__name__)
+
+Question = namedtuple("Question", ["kind", "text", "options", "answer", "part"])
+
+# Question kinds in quiz order: (kind, section heading, questions in the final quiz)
+QUIZ_LAYOUT = (
+    ("multiple choice", "Multiple Choice Questions", 15),
+    ("short answer", "Short Answer Questions", 7),
+    ("essay", "Essay / Long Answer Questions", 3),
+)
+
+# Word overlap (Jaccard) above which two questions count as the same question
+DUPLICATE_SIMILARITY = 0.6
+
+_SECTION = re.compile(r"^(?:#{1,2}[ \t]+|\*\*)(study notes|questions|quiz questions|quiz)(?:\*\*)?:?[ \t]*$",
+                      re.IGNORECASE | re.MULTILINE)
+# A question header: "### Q", "### Q1: text", "## Question 2", "### 3.", "**Q4.**", "**Question 5:** text", "Q6)"
+_QUESTION_START = re.compile(
+    r"^[ \t]*(?:#{2,4}[ \t]*(?:\*\*)?(?:Q(?:uestion)?[ \t]*\d*|\d+)"
+    r"|\*\*[ \t]*(?:Q(?:uestion)?[ \t]*\d+|Q|\d+)"
+    r"|(?:Q|Question)[ \t]*\d+)\b[.):]?(?:\*\*)?[.):]?(?:\*\*)?[ \t]*(.*)$",
+    re.IGNORECASE | re.MULTILINE
+)
+# "Answer: ...", "**Answer:** ...", "- **Correct answer**: ..."
+_FIELD = re.compile(r"^\s*(?:[-*+]\s+)?(?:\*\*|__)?\s*(type|question|correct answer|answer)\s*(?:\*\*|__)?\s*:"
+                    r"\s*(?:\*\*|__)?\s*(.*)$", re.IGNORECASE)
+_OPTION = re.compile(r"^\s*(?:[-*+]\s+)?(?:\*\*)?\(?([A-Da-d])[).:](?:\*\*)?\s+(.+)$")
+_HEADING_LEVEL = re.compile(r"^(#{1,6})(?=\s)", re.MULTILINE)
+_BULLET = re.compile(r"^\s*(?:[-*+]|\d+[.)])\s+")
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def question_counts(parts):
+    """Questions of each kind to ask per part, so the merged quiz can be filled after deduplication"""
+    return tuple(max(1, math.ceil(total / parts)) for _, _, total in QUIZ_LAYOUT)
+
+
+def _kind(value, has_options):
+    value = value.lower()
+    if "multiple" in value or (not value and has_options):
+        return "multiple choice" if has_options else "short answer"
+    if "essay" in value or "long" in value:
+        return "essay"
+    return "short answer"
+
+
+def _question(kind, lines, options, answer, part):
+    question, answer = " ".join(lines).strip(), " ".join(answer).strip()
+    if not (question and answer):
+        return None
+    has_options = len(options) >= 2
+    return Question(_kind(kind, has_options), question, tuple(options) if has_options else (), answer, part)
+
+
+def parse_questions(text, part):
+    """Question tuples from the "# Questions" half of one part's answer; unanswered ones are dropped.
+
+    A question starts at a header (see _QUESTION_START) or, without headers,
+    at a "Question:" label following the previous question's answer.
+    """
+    questions = []
+    block = None  # [kind, question lines, options, answer lines]
+    field = "question"
+    for line in text.splitlines():
+        header = _QUESTION_START.match(line)
+        match = _FIELD.match(line)
+        label = match and ("answer" if match.group(1).lower() == "correct answer" else match.group(1).lower())
+        if header or (label == "question" and (block is None or block[3])):
+            if block:
+                questions.append(_question(*block, part))
+            # Text after a header's marker is the question itself
+            first = (header.group(1) if header else match.group(2)).strip(" *:")
+            block, field = ["", [first] if first else [], [], []], "question"
+            continue
+        if block is None:
+            continue
+        option = _OPTION.match(line)
+        if match:
+            field, value = label, match.group(2).strip(" *")
+            if field == "type":
+                block[0] = value
+            elif value:
+                block[1 if field == "question" else 3].append(value)
+        elif option and field == "question":
+            block[2].append(f"{option.group(1).upper()}) {option.group(2).strip()}")
+        elif line.strip():
+            block[3 if field == "answer" else 1].append(line.strip())
+    if block:
+        questions.append(_question(*block, part))
+    return [question for question in questions if question]
+
+
+def _first_question(text):
+    """Offset of the first question header or "Question:" label in `text` (its length if none)"""
+    offset = 0
+    for line in text.splitlines(keepends=True):
+        match = _FIELD.match(line)
+        if _QUESTION_START.match(line) or (match and match.group(1).lower() == "question"):
+            return offset
+        offset += len(line)
+    return len(text)
+
+
+def parse_part(text, part):
+    """(notes, questions) from one part's answer.
+
+    Without "# Study Notes" / "# Questions" headings, everything before the
+    first question is taken as notes.
+    """
+    pieces = _SECTION.split(text)
+    if len(pieces) > 1:
+        notes, questions = pieces[0], ""
+        for name, body in zip(pieces[1::2], pieces[2::2]):
+            if name.lower() == "study notes":
+                notes += body
+            else:
+                questions += body
+    else:
+        offset = _first_question(text)
+        notes, questions = text[:offset], text[offset:]
+    return notes.strip(), parse_questions(questions, part)
+
+
+def _demote(notes, top_level):
+    """Shift the headings in `notes` so the highest one sits at `top_level`"""
+    levels = [len(match.group(1)) for match in _HEADING_LEVEL.finditer(notes)]
+    if not levels:
+        return notes
+    shift = top_level - min(levels)
+    return _HEADING_LEVEL.sub(lambda match: "#" * min(6, len(match.group(1)) + shift), notes)
+
+
+def _drop_repeated_bullets(notes, seen):
+    """Remove bullet points already written for an earlier part"""
+    kept = []
+    for line in notes.splitlines():
+        if _BULLET.match(line):
+            key = " ".join(_WORD.findall(_BULLET.sub("", line).lower()))
+            if key in seen:
+                continue
+            seen.add(key)
+        kept.append(line)
+    return "\n".join(kept)
+
+
+def _similar(a, b):
+    words_a, words_b = set(_WORD.findall(a.lower())), set(_WORD.findall(b.lower()))
+    if not words_a or not words_b:
+        return False
+    return len(words_a & words_b) / len(words_a | words_b) >= DUPLICATE_SIMILARITY
+
+
+def _pick(questions, limit):
+    """Up to `limit` questions taken round-robin across parts, returned in plan order"""
+    by_part = {}
+    for question in questions:
+        by_part.setdefault(question.part, []).append(question)
+    queues = [by_part[part] for part in sorted(by_part)]
+    picked = []
+    while len(picked) < limit and any(queues):
+        for queue in queues:
+            if queue and len(picked) < limit:
+                picked.append(queue.pop(0))
+    return sorted(picked, key=questions.index)
+
+
+def merge_notes_and_quiz(answers):
+    """One notes/quiz document from [(part title, model answer)] in plan order"""
+    notes_sections = []
+    seen_bullets = set()
+    questions = []
+    for part, (title, answer) in enumerate(answers):
+        notes, part_questions = parse_part(answer, part)
+        notes = _drop_repeated_bullets(_demote(notes, 3), seen_bullets).strip()
+        if notes:
+            notes_sections.append(f"## {title}\n\n{notes}")
+        for question in part_questions:
+            if not any(_similar(question.text, kept.text) for kept in questions):
+                questions.append(question)
+
+    if not questions:
+        # Nothing parsed: better the model's own layout than an empty quiz
+        logger.warning("No quiz questions parsed from %d notes parts; returning them unmerged", len(answers))
+        inc("notes_merge_fallback_total")
+        return "\n\n".join(f"# {title}\n\n{_demote(answer.strip(), 2)}" for title, answer in answers) + "\n"
+
+    lines = ["# Study Notes", ""]
+    lines.append("\n\n".join(notes_sections))
+    lines += ["", "# Quiz Questions"]
+    answer_key = []
+    number = 0
+    for kind, heading, limit in QUIZ_LAYOUT:
+        chosen = _pick([q for q in questions if q.kind == kind], limit)
+        if not chosen:
+            continue
+        lines += ["", f"## {heading}", ""]
+        for question in chosen:
+            number += 1
+            lines.append(f"{number}. {question.text}")
+            lines.extend(f"   {option}" for option in question.options)
+            answer_key.append(f"{number}. {question.answer}")
+    lines += ["", "# Answer Key", ""]
+    lines.extend(answer_key)
+    return "\n".join(lines) + "\n"
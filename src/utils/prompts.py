@@ -0,0 +1,460 @@
+"""
+Prompt templates for AI Lesson Planner
+
+Templates are compiled once at import and prompts are fitted to a token
+budget: free-text inputs are shortened at line breaks, and the notes/quiz
+prompt carries whole lesson plan sections ranked by importance rather than
+a raw character prefix of the plan. Plans whose sections do not all fit that
+prompt are split into parts for map-reduce notes generation (see notes.py).
+"""
+import logging
+import re
+from functools import lru_cache
+from importlib.util import find_spec
+from string import Template
+
+from ..config.settings import Settings
+from .metrics import inc
+
+logger = logging.getLogger(__name__)
+
+TIKTOKEN_AVAILABLE = find_spec("tiktoken") is not None
+
+# Close enough to the Llama 3 vocabulary for budgeting
+TOKENIZER_ENCODING = "cl100k_base"
+
+LESSON_PLAN_TEMPLATE = Template("""Generate a comprehensive, detailed lesson plan for the subject "$subject" on the topic "$topic".
+
+**Lesson Details:**
+- Grade Level: $grade
+- Duration: $duration
+- Learning Style: $learning_style
+- Difficulty Level: $difficulty
+
+**Learning Objectives:**
+$learning_objectives
+
+**Customization Requirements:**
+$customization
+
+**Requirements:**
+1. Create a well-structured lesson plan in Markdown format
+2. Include relevant YouTube video links (at least 2-3 videos) that are educational and appropriate for $grade level
+3. Format YouTube links as: [Video Title](https://www.youtube.com/watch?v=VIDEO_ID) or [Video Title](https://youtu.be/VIDEO_ID)
+4. Include the following sections:
+   - **Lesson Overview** (brief summary)
+   - **Learning Objectives** (detailed, measurable, using Bloom's taxonomy for higher education levels)
+   - **Materials Needed** (list all resources, including digital tools if applicable)
+   - **Introduction/Warm-up** (5-10 minutes, or appropriate for session length)
+   - **Main Content** (detailed step-by-step activities with timing)
+   - **YouTube Videos & Resources** (with descriptions of what each video covers and why it's relevant)
+   - **Interactive Activities** (hands-on, group activities, discussions, or case studies)
+   - **Assessment/Evaluation** (how to measure learning - quizzes, assignments, projects, presentations)
+   - **Homework/Extension Activities** (optional follow-up work or research)
+   - **Additional Resources** (websites, articles, research papers, academic journals if applicable)
+
+5. Make it engaging, interactive, and appropriate for $grade level:
+   - For K-12: Use age-appropriate language, include games and hands-on activities
+   - For Associate/Bachelor's: Include academic rigor, research components, and critical thinking
+   - For Master's/PhD: Focus on advanced concepts, research methodologies, scholarly discussions, and peer review
+   - For Professional Development: Emphasize practical applications, real-world scenarios, and skill-building
+6. Include specific time allocations for each section
+7. Add practical examples and real-world connections relevant to the level
+8. Ensure the content aligns with $learning_style learning style
+9. Adjust complexity, depth, and academic rigor based on $difficulty difficulty level and $grade level
+10. For higher education levels, include:
+    - Academic citations and references where appropriate
+    - Discussion questions that promote critical thinking
+    - Research assignments or literature reviews
+    - Peer collaboration and presentation opportunities
+
+Return the lesson plan in clean Markdown format with proper headings, bullet points, and formatting.""")
+
+NOTES_QUIZ_TEMPLATE = Template("""Based on the following lesson plan for $subject - $topic (Grade/Level: $grade), generate:
+
+1. **Comprehensive Study Notes** - Detailed notes that students can use for studying, including:
+   - Key concepts and definitions
+   - Important points and explanations
+   - Examples and illustrations
+   - Summary of main topics
+   - Important formulas/theorems (if applicable)
+
+2. **Quiz/Assessment Questions** - Create a quiz with:
+   - 10-15 multiple choice questions (with 4 options each)
+   - 5-7 short answer questions
+   - 2-3 essay/long answer questions
+   - Answer key with explanations
+
+Format the response in Markdown with clear sections:
+- # Study Notes
+- # Quiz Questions
+- # Answer Key
+
+Make it appropriate for $grade level students.
+
+Lesson Plan Content:
+$plan_content
+
+Generate comprehensive, well-structured notes and quiz questions.""")
+
+NOTES_PART_TEMPLATE = Template("""Below is part $part of $parts of a lesson plan for $subject - $topic (Grade/Level: $grade).
+Write study notes and quiz questions covering only this part. Make it appropriate for $grade level students.
+
+Use exactly this format:
+
+# Study Notes
+Markdown notes with key concepts and definitions, important points and explanations,
+examples, and important formulas/theorems (if applicable).
+
+# Questions
+### Q
+Type: multiple choice
+Question: <question text>
+A) <option>
+B) <option>
+C) <option>
+D) <option>
+Answer: <letter and correct option> - <one-sentence explanation>
+
+### Q
+Type: short answer
+Question: <question text>
+Answer: <model answer>
+
+Write $multiple_choice multiple choice, $short_answer short answer and $essay essay questions,
+each under its own "### Q" line. Essay questions use "Type: essay" and an answer outline.
+
+Lesson Plan Part ($title):
+$plan_content""")
+
+# Plan sections the notes/quiz prompt draws on, most useful first, matched by
+# heading keywords. Each kind takes the first matching section; anything else
+# (materials, videos, homework, resource lists) is left out.
+NOTES_SECTIONS = (
+    ("main content", ("main content", "lesson content", "instruction", "procedure")),
+    ("objectives", ("objective", "learning goal", "outcome")),
+    ("overview", ("overview", "summary")),
+    ("assessment", ("assessment", "evaluation")),
+    ("activities", ("interactive activit", "activities", "practice")),
+    ("warm-up", ("warm-up", "warm up", "introduction")),
+)
+
+_HEADING = re.compile(r"^(?:(#{1,6})[ \t]+(.+?)|\*\*([^*\n]+?)\*\*:?)[ \t]*$", re.MULTILINE)
+_LINK = re.compile(r"\[([^\]\n]+)\]\(https?://[^)\s]+\)")
+_URL = re.compile(r"[ \t]*\(?<?https?://[^\s)>]+>?\)?")
+_BLANK_LINES = re.compile(r"\n{3,}")
+_PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n")
+_LINE_BREAK = re.compile(r"\n")
+
+# Sections that are lists of supplies or links; map-reduce notes skip them
+NOTES_SKIP_SECTIONS = ("material", "video", "resource", "reference", "citation")
+
+# Bold-only lines rank below every `#` heading
+_BOLD_LEVEL = 7
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    if not TIKTOKEN_AVAILABLE:
+        return None
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(TOKENIZER_ENCODING)
+    except Exception as exc:  # the BPE file is downloaded on first use
+        logger.warning("tiktoken unavailable, estimating tokens from length: %s", exc)
+        return None
+
+
+def count_tokens(text):
+    """Tokens in `text`; about four characters per token without tiktoken"""
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def truncate_tokens(text, max_tokens):
+    """`text` cut to at most `max_tokens`, at a line break where possible"""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    encoding = _encoding()
+    if encoding is not None:
+        head = encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens - 1])
+    else:
+        head = text[:(max_tokens - 1) * 4]
+    cut = head.rfind("\n")
+    if cut > len(head) // 2:
+        head = head[:cut]
+    return head.rstrip() + " …"
+
+
+def _compact(text):
+    """Drop URLs (link text is kept) and runs of blank lines; they cost tokens, not meaning"""
+    text = _LINK.sub(r"\1", text)
+    text = _URL.sub("", text)
+    return _BLANK_LINES.sub("\n\n", text).strip()
+
+
+def _headings(text):
+    """(offset, level, title) for every heading line"""
+    found = []
+    for match in _HEADING.finditer(text):
+        if match.group(1):
+            found.append((match.start(), len(match.group(1)), match.group(2).strip("# ")))
+        else:
+            found.append((match.start(), _BOLD_LEVEL, match.group(3).strip()))
+    return found
+
+
+def _kind_of(title):
+    title = title.lower()
+    for kind, keywords in NOTES_SECTIONS:
+        if any(keyword in title for keyword in keywords):
+            return kind
+    return None
+
+
+def split_sections(text):
+    """[(title, text)] at the heading level the plan uses for its named sections.
+
+    The level is that of the first heading matching NOTES_SECTIONS (any heading
+    if none match), so sub-headings stay inside their section. Text before the
+    first section comes back with an empty title.
+    """
+    headings = _headings(text)
+    if not headings:
+        return [("", text)] if text.strip() else []
+    levels = [level for _, level, title in headings if _kind_of(title)]
+    level = levels[0] if levels else min(level for _, level, _ in headings)
+    starts = [(offset, title) for offset, lvl, title in headings if lvl <= level]
+    sections = []
+    if text[:starts[0][0]].strip():
+        sections.append(("", text[:starts[0][0]]))
+    for i, (offset, title) in enumerate(starts):
+        end = starts[i + 1][0] if i + 1 < len(starts) else len(text)
+        sections.append((title, text[offset:end]))
+    return sections
+
+
+def _ranked_sections(sections):
+    """Indexes into `sections` in NOTES_SECTIONS order, one per kind present"""
+    taken = {}
+    for index, (title, _) in enumerate(sections):
+        kind = _kind_of(title)
+        if kind and kind not in taken:
+            taken[kind] = index
+    return [taken[kind] for kind, _ in NOTES_SECTIONS if kind in taken]
+
+
+def select_notes_context(plan_content, budget):
+    """Whole plan sections for the notes/quiz prompt within `budget` tokens.
+
+    Sections are taken in NOTES_SECTIONS order while they fit and returned in
+    plan order. A plan without recognisable sections contributes its sections
+    from the top. Only the first section picked is ever shortened, when it
+    alone exceeds the budget. Returns (context, tokens, sections dropped).
+    """
+    sections = split_sections(plan_content)
+    ranked = _ranked_sections(sections) or list(range(len(sections)))
+    chosen = {}
+    used = 0
+    for index in ranked:
+        text = _compact(sections[index][1])
+        tokens = count_tokens(text)
+        if not chosen and tokens > budget:
+            text = truncate_tokens(text, budget)
+            tokens = count_tokens(text)
+        if used + tokens <= budget:
+            chosen[index] = text
+            used += tokens
+    context = "\n\n".join(chosen[index] for index in sorted(chosen))
+    return context, used, len(sections) - len(chosen)
+
+
+def notes_prompt_budget():
+    """Tokens the notes/quiz prompt may use.
+
+    The model's context window less the room kept for the answer
+    (LLM_CONTEXT_TOKENS - NOTES_OUTPUT_TOKENS), or NOTES_PROMPT_MAX_TOKENS
+    when that is set and smaller.
+    """
+    budget = Settings.LLM_CONTEXT_TOKENS - Settings.NOTES_OUTPUT_TOKENS
+    if Settings.NOTES_PROMPT_MAX_TOKENS > 0:
+        budget = min(budget, Settings.NOTES_PROMPT_MAX_TOKENS)
+    return budget
+
+
+def _notes_context_budget(subject, topic, grade):
+    """Tokens left for plan content in the single notes/quiz prompt"""
+    overhead = count_tokens(NOTES_QUIZ_TEMPLATE.substitute(subject=subject, topic=topic, grade=grade,
+                                                           plan_content=""))
+    return notes_prompt_budget() - overhead
+
+
+def notes_fit_one_prompt(plan_content, subject, topic, grade):
+    """True if one notes/quiz prompt can carry every section it draws on, whole.
+
+    Measured against the budget that prompt actually gets (notes_prompt_budget()
+    less the instructions), section by section as select_notes_context()
+    takes them. Plans that fail this go through map-reduce, so no ranked
+    section is ever dropped or cut short.
+    """
+    sections = split_sections(plan_content)
+    ranked = _ranked_sections(sections) or list(range(len(sections)))
+    needed = sum(count_tokens(_compact(sections[index][1])) for index in ranked)
+    return needed <= _notes_context_budget(subject, topic, grade)
+
+
+def notes_context_ready(partial_plan, subject, topic, grade):
+    """True once a streaming plan holds every section select_notes_context() can pick.
+
+    Each NOTES_SECTIONS kind must have appeared and been followed by another
+    section, so the context chosen now is the one the finished plan would give.
+    Plans that need map-reduce are never ready early: every section counts.
+    """
+    complete = "".join(text for _, text in split_sections(partial_plan)[:-1])
+    if len(_ranked_sections(split_sections(complete))) < len(NOTES_SECTIONS):
+        return False
+    return notes_fit_one_prompt(complete, subject, topic, grade)
+
+
+def _pack(pieces, max_tokens):
+    """Join adjacent (title, text) pieces while the joined text stays within `max_tokens`"""
+    packed = []
+    for title, text in pieces:
+        if packed:
+            titles, joined = packed[-1]
+            candidate = joined + "\n\n" + text
+            if count_tokens(candidate) <= max_tokens:
+                packed[-1] = (titles if title in titles else titles + [title], candidate)
+                continue
+        packed.append(([title], text))
+    return packed
+
+
+def _split_to_fit(text, max_tokens):
+    """`text` as pieces of at most `max_tokens`, split at sub-headings, then paragraphs, then lines"""
+    if count_tokens(text) <= max_tokens:
+        return [text]
+    offsets = [offset for offset, _, _ in _headings(text) if offset > 0]
+    for separator in (_PARAGRAPH_BREAK, _LINE_BREAK):
+        if not offsets:
+            offsets = [match.end() for match in separator.finditer(text.rstrip())]
+    if not offsets:
+        # One very long line
+        size = max_tokens * 4
+        return [text[i:i + size] for i in range(0, len(text), size)]
+    bounds = [0] + offsets + [len(text)]
+    parts = [text[start:end].strip() for start, end in zip(bounds, bounds[1:])]
+    pieces = []
+    for part in parts:
+        if part:
+            pieces.extend(_split_to_fit(part, max_tokens))
+    return [joined for _, joined in _pack([("", piece) for piece in pieces], max_tokens)]
+
+
+def split_plan_for_notes(plan_content, max_tokens):
+    """The plan as [(title, text)] parts of at most `max_tokens` for map-reduce notes.
+
+    Every section except supply and link lists (NOTES_SKIP_SECTIONS) is
+    covered. Long sections are split, short neighbouring ones share a part.
+    """
+    pieces = []
+    for title, text in split_sections(plan_content):
+        if any(skip in title.lower() for skip in NOTES_SKIP_SECTIONS):
+            continue
+        text = _compact(text)
+        if not _HEADING.sub("", text).strip():
+            # Only headings, e.g. the plan's title line
+            continue
+        title = title or "Overview"
+        for index, piece in enumerate(_split_to_fit(text, max_tokens)):
+            pieces.append((title if index == 0 else f"{title} (continued)", piece))
+    return [(" / ".join(titles), text) for titles, text in _pack(pieces, max_tokens)]
+
+
+def _record(prompt, tokens, budget, dropped=0, truncated=False):
+    inc("prompts_total", prompt=prompt)
+    inc("prompt_tokens_total", tokens, prompt=prompt)
+    inc("prompt_budget_tokens_total", budget, prompt=prompt)
+    if dropped:
+        inc("prompt_sections_dropped_total", dropped, prompt=prompt)
+    if truncated:
+        inc("prompt_truncations_total", prompt=prompt)
+
+
+@lru_cache(maxsize=256)
+def _lesson_plan_prompt(subject, topic, grade, duration, learning_style, difficulty,
+                        learning_objectives, customization, budget):
+    fields = {"subject": subject, "topic": topic, "grade": grade, "duration": duration,
+              "learning_style": learning_style, "difficulty": difficulty,
+              "learning_objectives": learning_objectives,
+              "customization": customization if customization else "None specified"}
+    prompt = LESSON_PLAN_TEMPLATE.substitute(fields)
+    tokens = count_tokens(prompt)
+    truncated = False
+    # Over budget: shorten the free-text inputs, customization first
+    for field in ("customization", "learning_objectives"):
+        if tokens <= budget:
+            break
+        keep = count_tokens(fields[field]) - (tokens - budget)
+        fields[field] = truncate_tokens(fields[field], max(keep, 1))
+        prompt = LESSON_PLAN_TEMPLATE.substitute(fields)
+        tokens = count_tokens(prompt)
+        truncated = True
+    return prompt, tokens, truncated
+
+
+def build_lesson_plan_prompt(subject, topic, grade, duration, learning_style, difficulty,
+                             learning_objectives, customization=None):
+    """Build the lesson plan generation prompt from the Create Plan inputs"""
+    budget = Settings.PROMPT_MAX_TOKENS
+    prompt, tokens, truncated = _lesson_plan_prompt(
+        subject, topic, grade, duration, learning_style, difficulty,
+        learning_objectives, customization, budget
+    )
+    _record("lesson_plan", tokens, budget, truncated=truncated)
+    return prompt
+
+
+def build_notes_quiz_prompt(plan_content, subject, topic, grade):
+    """Build the notes/quiz prompt around the most useful sections of a lesson plan"""
+    budget = notes_prompt_budget()
+    fields = {"subject": subject, "topic": topic, "grade": grade}
+    context_budget = _notes_context_budget(subject, topic, grade)
+    context, tokens, dropped = select_notes_context(plan_content, context_budget)
+    _record("notes_quiz", budget - context_budget + tokens, budget, dropped=dropped)
+    return NOTES_QUIZ_TEMPLATE.substitute(fields, plan_content=context)
+
+
+def _notes_chunk_tokens(subject, topic, grade):
+    """Plan tokens per map-reduce part: NOTES_CHUNK_TOKENS, or less if the notes prompt budget is smaller"""
+    overhead = count_tokens(NOTES_PART_TEMPLATE.substitute(
+        part=1, parts=1, subject=subject, topic=topic, grade=grade, title="",
+        multiple_choice=0, short_answer=0, essay=0, plan_content=""
+    ))
+    return max(1, min(Settings.NOTES_CHUNK_TOKENS, notes_prompt_budget() - overhead))
+
+
+def build_notes_part_prompts(plan_content, subject, topic, grade, question_counts):
+    """One notes/questions prompt per part of a long plan, for map-reduce generation.
+
+    `question_counts(parts)` gives the (multiple choice, short answer, essay)
+    questions to ask of each part. Returns [(title, prompt)] in plan order.
+    """
+    chunk_tokens = _notes_chunk_tokens(subject, topic, grade)
+    parts = split_plan_for_notes(plan_content, chunk_tokens)
+    multiple_choice, short_answer, essay = question_counts(len(parts))
+    prompts = []
+    for number, (title, text) in enumerate(parts, 1):
+        prompt = NOTES_PART_TEMPLATE.substitute(
+            part=number, parts=len(parts), subject=subject, topic=topic, grade=grade, title=title,
+            multiple_choice=multiple_choice, short_answer=short_answer, essay=essay, plan_content=text
+        )
+        tokens = count_tokens(prompt)
+        # The budget covers the plan text; the instructions come on top
+        _record("notes_part", tokens, chunk_tokens + tokens - count_tokens(text))
+        prompts.append((title, prompt))
+    return prompts
@@ -0,0 +1,324 @@
+"""
+Rate limiting, retries and circuit breaking for Groq calls
+"""
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from ..config.settings import Settings
+
+# HTTP statuses worth retrying: rate limited or a transient server error
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+# Exception class names raised by groq/httpx for transport-level failures
+RETRYABLE_EXCEPTION_NAMES = {
+    "APIConnectionError", "APITimeoutError", "RateLimitError", "InternalServerError",
+    "ConnectError", "ConnectTimeout", "ReadTimeout", "WriteTimeout", "PoolTimeout",
+    "RemoteProtocolError", "ReadError"
+}
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling Groq while the circuit breaker is open"""
+
+    def __init__(self, retry_in):
+        super().__init__(f"AI service is temporarily unavailable. Try again in {int(retry_in) + 1} seconds.")
+        self.retry_in = retry_in
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a call cannot complete (including retries) before its deadline"""
+
+
+class TokenBucket:
+    """Client-side rate limiter: `rate` tokens per second, bursting up to `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """Take a token now if one is free, else return how long until one will be"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, timeout=None):
+        """Block until a token is available; False if that would exceed `timeout`"""
+        end = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._reserve()
+            if wait == 0:
+                return True
+            if end is not None and time.monotonic() + wait > end:
+                return False
+            time.sleep(wait)
+
+    async def aacquire(self, timeout=None):
+        """Async variant of acquire()"""
+        end = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._reserve()
+            if wait == 0:
+                return True
+            if end is not None and time.monotonic() + wait > end:
+                return False
+            await asyncio.sleep(wait)
+
+
+class CircuitBreaker:
+    """Stop calling a failing service, then let a single probe through after a cool-down"""
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_call(self):
+        """Raise CircuitOpenError if calls are blocked; True if this call is the half-open probe"""
+        with self._lock:
+            state = self.state
+            if state == "open" or (state == "half-open" and self._probing):
+                raise CircuitOpenError(max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at)))
+            if state == "half-open":
+                self._probing = True
+                return True
+            return False
+
+    def release_probe(self, probe):
+        """Let another call probe; for a probe that never reached the service"""
+        if probe:
+            with self._lock:
+                self._probing = False
+
+    def record_abandoned(self, probe):
+        """A call was cancelled or its stream closed before it finished.
+
+        Only the probe matters: it counts as a failure, so the breaker
+        re-opens instead of waiting forever for a result that never comes.
+        """
+        if probe:
+            self.record_failure()
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+def _status_code(exc):
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        response = getattr(exc, "response", None)
+        status = getattr(response, "status_code", None)
+    return status
+
+
+def is_retryable(exc):
+    """Whether a failed call is worth retrying"""
+    if _status_code(exc) in RETRYABLE_STATUS_CODES:
+        return True
+    return any(cls.__name__ in RETRYABLE_EXCEPTION_NAMES for cls in type(exc).__mro__)
+
+
+def retry_after(exc):
+    """Seconds the server asked us to wait via Retry-After, if any"""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    value = headers.get("retry-after") if headers is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+def backoff_delay(attempt, exc=None):
+    """Full-jitter exponential backoff, never shorter than the server's Retry-After"""
+    delay = random.uniform(0, min(Settings.LLM_RETRY_MAX_DELAY, Settings.LLM_RETRY_BASE_DELAY * (2 ** attempt)))
+    server_delay = retry_after(exc) if exc is not None else None
+    return max(delay, server_delay) if server_delay is not None else delay
+
+
+_limiter = None
+_breaker = None
+_init_lock = threading.Lock()
+
+
+def get_groq_limiter():
+    """Token bucket shared by every session in the process"""
+    global _limiter
+    if _limiter is None:
+        with _init_lock:
+            if _limiter is None:
+                _limiter = TokenBucket(Settings.GROQ_REQUESTS_PER_MINUTE / 60.0, Settings.GROQ_RATE_BURST)
+    return _limiter
+
+
+def get_groq_breaker():
+    """Circuit breaker shared by every session in the process"""
+    global _breaker
+    if _breaker is None:
+        with _init_lock:
+            if _breaker is None:
+                _breaker = CircuitBreaker(Settings.LLM_BREAKER_THRESHOLD, Settings.LLM_BREAKER_RESET_SECONDS)
+    return _breaker
+
+
+def _record_failure(breaker, exc):
+    """Count transient failures against the breaker; other errors prove the service is up"""
+    if is_retryable(exc):
+        breaker.record_failure()
+        return True
+    breaker.record_success()
+    return False
+
+
+def _remaining(deadline):
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def _check_deadline(deadline, wait=0.0):
+    remaining = _remaining(deadline)
+    if remaining is not None and remaining < wait:
+        raise DeadlineExceeded("AI request timed out. Please try again.")
+
+
+def call_with_resilience(fn, timeout=None):
+    """Call `fn(timeout)` under the shared rate limit and breaker, retrying transient failures.
+
+    `timeout` is a deadline in seconds for the whole call including waits and
+    retries; it defaults to Settings.LLM_CALL_DEADLINE. `fn` receives the time
+    left before the deadline and must use it as its request timeout, since a
+    blocking call cannot be interrupted from here.
+    """
+    deadline = time.monotonic() + (timeout or Settings.LLM_CALL_DEADLINE)
+    limiter, breaker = get_groq_limiter(), get_groq_breaker()
+    attempt = 0
+    while True:
+        probe = breaker.before_call()
+        if not limiter.acquire(timeout=_remaining(deadline)):
+            breaker.release_probe(probe)
+            raise DeadlineExceeded("AI service is busy. Please try again shortly.")
+        try:
+            result = fn(_remaining(deadline))
+        except Exception as e:
+            if not _record_failure(breaker, e) or attempt >= Settings.LLM_MAX_RETRIES:
+                raise
+            delay = backoff_delay(attempt, e)
+            _check_deadline(deadline, delay)
+            time.sleep(delay)
+            attempt += 1
+            continue
+        except BaseException:
+            breaker.record_abandoned(probe)
+            raise
+        breaker.record_success()
+        return result
+
+
+async def acall_with_resilience(coro_fn, timeout=None):
+    """Async variant of call_with_resilience(); `coro_fn()` must return a fresh coroutine"""
+    deadline = time.monotonic() + (timeout or Settings.LLM_CALL_DEADLINE)
+    limiter, breaker = get_groq_limiter(), get_groq_breaker()
+    attempt = 0
+    while True:
+        probe = breaker.before_call()
+        try:
+            acquired = await limiter.aacquire(timeout=_remaining(deadline))
+        except BaseException:
+            breaker.release_probe(probe)
+            raise
+        if not acquired:
+            breaker.release_probe(probe)
+            raise DeadlineExceeded("AI service is busy. Please try again shortly.")
+        try:
+            result = await asyncio.wait_for(coro_fn(), timeout=_remaining(deadline))
+        except asyncio.TimeoutError:
+            breaker.record_failure()
+            raise DeadlineExceeded("AI request timed out. Please try again.")
+        except Exception as e:
+            if not _record_failure(breaker, e) or attempt >= Settings.LLM_MAX_RETRIES:
+                raise
+            delay = backoff_delay(attempt, e)
+            _check_deadline(deadline, delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+            continue
+        except BaseException:
+            # Cancelled (asyncio.CancelledError is not an Exception)
+            breaker.record_abandoned(probe)
+            raise
+        breaker.record_success()
+        return result
+
+
+def stream_with_resilience(make_stream, timeout=None):
+    """Yield from `make_stream()`, retrying only while nothing has been yielded yet.
+
+    Once chunks have reached the caller a retry would duplicate them, so
+    mid-stream failures are raised as-is.
+    """
+    deadline = time.monotonic() + (timeout or Settings.LLM_CALL_DEADLINE)
+    limiter, breaker = get_groq_limiter(), get_groq_breaker()
+    attempt = 0
+    while True:
+        probe = breaker.before_call()
+        if not limiter.acquire(timeout=_remaining(deadline)):
+            breaker.release_probe(probe)
+            raise DeadlineExceeded("AI service is busy. Please try again shortly.")
+        started = False
+        try:
+            for chunk in make_stream():
+                started = True
+                yield chunk
+        except Exception as e:
+            if not _record_failure(breaker, e) or started or attempt >= Settings.LLM_MAX_RETRIES:
+                raise
+            delay = backoff_delay(attempt, e)
+            _check_deadline(deadline, delay)
+            time.sleep(delay)
+            attempt += 1
+            continue
+        except BaseException:
+            # The caller closed the stream (GeneratorExit on a rerun or stop).
+            # Chunks already received show the service is up.
+            if started:
+                breaker.record_success()
+            else:
+                breaker.record_abandoned(probe)
+            raise
+        breaker.record_success()
+        return
@@ -6,43 +6,38 @@ from datetime import datetime
 import json
 import io
 import base64
+import time
 
 from dotenv import load_dotenv
-from langchain_groq import ChatGroq
-from langchain_core.output_parsers import StrOutputParser
 
 # Import from new structure
 try:
     from src.config.settings import Settings
+    from src.db import get_database, get_users_collection, get_plans_collection, get_sessions_collection, ensure_indexes
+    from src.db.sessions import create_session, resolve_session, revoke_session
+    from src.db.user_cache import get_cached
+    from src.db.plans import list_plan_cards, count_plans, list_plan_grades, get_plan, DEFAULT_PAGE_SIZE as PLANS_PAGE_SIZE
+    from src.db.stats import get_plan_stats, invalidate_plan_stats
+    from src.db.search import search_plan_cards, count_search_results
     from src.utils.export import generate_pdf, generate_word_doc, DOCX_AVAILABLE, REPORTLAB_AVAILABLE
-    from src.utils.llm import LLM_Setup, generate_notes_and_quiz
+    from src.utils.export_cache import render_export
+    from src.utils.export import generate_markdown
+    from src.utils.bulk_export import export_plans_zip, read_export, discard_export
+    from src.app.downloads import deferred_download_button
+    from src.app.theme import apply_theme, HEADER_HTML, NAVBAR_HTML, footer_html
+    from src.app.timing_panel import timing_panel
+    from src.app.session_cookie import read_session_cookie, set_session_cookie, clear_session_cookie, sync_session_cookie
+    from src.utils.metrics import instrument_mongo, start_metrics_server, start_trace, end_trace, observe
+    from src.utils.llm import LLM_Setup, LLM_Stream, FullPackageJob, generate_notes_and_quiz
+    from src.utils.prompts import build_lesson_plan_prompt
+    from src.utils.batch import parse_topics_text, parse_topics_csv, build_batch_items, iter_batch_generation
+    from src.utils.auth import authenticate, register_user, LoginThrottled
     USE_MODULAR_STRUCTURE = True
 except ImportError:
     # Fallback to inline functions if modules not found
     USE_MODULAR_STRUCTURE = False
     Settings = None
 
-# Export libraries
-try:
-    from docx import Document
-    from docx.shared import Inches, Pt, RGBColor
-    from docx.enum.text import WD_ALIGN_PARAGRAPH
-    DOCX_AVAILABLE = True
-except ImportError:
-    DOCX_AVAILABLE = False
-
-try:
-    from reportlab.lib.pagesizes import letter, A4
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.units import inch
-    from reportlab.lib.colors import RGBColor
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
-    from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
-    REPORTLAB_AVAILABLE = True
-except ImportError:
-    REPORTLAB_AVAILABLE = False
-    RGBColor = None
-
 
 load_dotenv()
 
@@ -54,15 +49,30 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# --- Metrics ---
+if USE_MODULAR_STRUCTURE:
+    # The Mongo command timer must be registered before the client is created
+    instrument_mongo()
+    start_metrics_server()
+    rerun_started = time.perf_counter()
+    start_trace()
+
 # --- MongoDB Connection ---
 mongodb_uri = os.getenv('MONGODB_URI')
 
-try:
+@st.cache_resource(show_spinner=False)
+def connect_mongodb():
+    """Connect once per process; every rerun and session reuses the pooled client"""
+    if USE_MODULAR_STRUCTURE:
+        ensure_indexes(get_database())
+        return get_users_collection(), get_plans_collection()
     client = pymongo.MongoClient(mongodb_uri, serverSelectionTimeoutMS=10000)
     client.server_info()
     db = client["StudentDB"]
-    users = db["users"]
-    lesson_plans = db["lesson_plans"]  # Collection for saving lesson plans
+    return db["users"], db["lesson_plans"]
+
+try:
+    users, lesson_plans = connect_mongodb()  # lesson_plans: collection for saving lesson plans
 except pymongo.errors.ServerSelectionTimeoutError:
     st.error("❌ Cannot connect to MongoDB.")
     if mongodb_uri == 'mongodb://localhost:27017/':
@@ -100,31 +110,88 @@ except Exception as e:
         st.error(f"❌ MongoDB connection error: {error_msg}")
     st.stop()
 
+# --- Auth (Fallback if modular import fails) ---
+if not USE_MODULAR_STRUCTURE:
+    class LoginThrottled(Exception):
+        pass
+
+    def authenticate(users, username, password):
+        user = users.find_one({"username": username})
+        if user and bcrypt.checkpw(password.encode('utf-8'), user["password"]):
+            return user
+        return None
+
+    def register_user(users, username, password):
+        users.insert_one({"username": username, "password": bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())})
+
+# --- Theme (Fallback if modular import fails) ---
+if not USE_MODULAR_STRUCTURE:
+    # Palette only; the stylesheet lives in src/app/theme.py
+    def apply_theme(dark_mode):
+        if dark_mode:
+            return {"bg_color": "#0f172a", "text_color": "#f1f5f9", "card_bg_color": "#1e293b",
+                    "input_bg_color": "#334155", "input_text_color": "#f1f5f9", "button_color": "#6366f1",
+                    "accent_color": "#8b5cf6", "border_color": "#475569"}
+        return {"bg_color": "#f8fafc", "text_color": "#1e293b", "card_bg_color": "#ffffff",
+                "input_bg_color": "#ffffff", "input_text_color": "#1e293b", "button_color": "#4f46e5",
+                "accent_color": "#7c3aed", "border_color": "#e2e8f0"}
+
+    HEADER_HTML = "<h1>📚 AI Lesson Planner</h1>"
+    NAVBAR_HTML = ""
+
+    def footer_html(linkedin_url, github_url, email, portfolio_url):
+        return (f'<p><a href="{linkedin_url}" target="_blank">💼 LinkedIn</a> · '
+                f'<a href="{github_url}" target="_blank">🐙 GitHub</a> · '
+                f'<a href="mailto:{email}">📧 Email</a> · '
+                f'<a href="{portfolio_url}" target="_blank">🌐 Portfolio</a></p>')
+
 # --- LLM Setup (Fallback if modular import fails) ---
 if not USE_MODULAR_STRUCTURE:
-    def LLM_Setup(prompt):
+    @st.cache_resource
+    def _llm_chain(api_key):
+        # One chain (and HTTP connection pool) per process, shared by all sessions
+        from langchain_groq import ChatGroq
+        from langchain_core.output_parsers import StrOutputParser
+        model = ChatGroq(
+            model="llama-3.3-70b-versatile",
+            groq_api_key=api_key,
+            temperature=0.7
+        )
+        return model | StrOutputParser()
+
+    def LLM_Setup(prompt, regenerate=False):
         api_key = os.getenv('key')
         if not api_key or api_key == 'your_groq_api_key_here':
             st.error("❌ Groq API key not found. Please set your API key in the .env file.")
             st.info("💡 **How to fix:**\n1. Create a `.env` file in the project root\n2. Add: `key=your_actual_groq_api_key`\n3. Get your API key from: https://console.groq.com/")
             st.stop()
         
-        model = ChatGroq(
-            model="llama-3.3-70b-versatile",
-            groq_api_key=api_key,
-            temperature=0.7
-        )
-        parser = StrOutputParser()
-        output = model | parser
-        output = output.invoke(prompt)
-        return output
+        return _llm_chain(api_key).invoke(prompt)
+
+    def LLM_Stream(prompt, regenerate=False):
+        api_key = os.getenv('key')
+        if not api_key or api_key == 'your_groq_api_key_here':
+            st.error("❌ Groq API key not found. Please set your API key in the .env file.")
+            st.stop()
+        
+        yield from _llm_chain(api_key).stream(prompt)
 
 # --- Export Functions (Fallback if modular import fails) ---
 if not USE_MODULAR_STRUCTURE:
+    from importlib.util import find_spec
+    DOCX_AVAILABLE = find_spec("docx") is not None
+    REPORTLAB_AVAILABLE = find_spec("reportlab") is not None
+
     def generate_pdf(plan_data):
         """Generate PDF from lesson plan"""
         if not REPORTLAB_AVAILABLE:
             return None
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.units import inch
+        from reportlab.lib.colors import HexColor
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+        from reportlab.lib.enums import TA_CENTER
         
         buffer = io.BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5*inch, bottomMargin=0.5*inch)
@@ -136,7 +203,7 @@ if not USE_MODULAR_STRUCTURE:
             'CustomTitle',
             parent=styles['Heading1'],
             fontSize=24,
-            textColor=RGBColor(0, 0, 139),
+            textColor=HexColor('#00008B'),
             spaceAfter=30,
             alignment=TA_CENTER
         )
@@ -149,7 +216,7 @@ if not USE_MODULAR_STRUCTURE:
             'Meta',
             parent=styles['Normal'],
             fontSize=11,
-            textColor=RGBColor(100, 100, 100),
+            textColor=HexColor('#646464'),
             alignment=TA_CENTER
         )
         meta_text = f"<b>Grade/Level:</b> {plan_data['grade']} | <b>Duration:</b> {plan_data['duration']} | <b>Created:</b> {plan_data.get('created_at', 'N/A')}"
@@ -190,6 +257,8 @@ if not USE_MODULAR_STRUCTURE:
         """Generate Word document from lesson plan"""
         if not DOCX_AVAILABLE:
             return None
+        from docx import Document
+        from docx.enum.text import WD_ALIGN_PARAGRAPH
         
         doc = Document()
         
@@ -235,7 +304,61 @@ if not USE_MODULAR_STRUCTURE:
         buffer.seek(0)
         return buffer.getvalue()
 
-    def generate_notes_and_quiz(plan_content, subject, topic, grade):
+    def render_export(plan_data, fmt):
+        """Render `plan_data` as "pdf" or "docx" (uncached)"""
+        return generate_pdf(plan_data) if fmt == "pdf" else generate_word_doc(plan_data)
+
+    def generate_markdown(plan_data):
+        """Generate a Markdown file from lesson plan"""
+        return (f"# {plan_data['subject']} - {plan_data['topic']}\n\n"
+                f"**Grade/Level:** {plan_data['grade']}  \n**Duration:** {plan_data['duration']}  \n"
+                f"**Created:** {plan_data.get('created_at', 'N/A')}\n\n---\n\n{plan_data['content']}\n")
+
+    def export_plans_zip(collection, username, formats, path=None, progress=None, batch_size=None):
+        """Write all of a user's plans, rendered in `formats` in this process, to a ZIP file and return its path"""
+        import re
+        import tempfile
+        import zipfile
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="lesson_plans_", suffix=".zip")
+            os.close(fd)
+        renderers = {"md": generate_markdown, "pdf": generate_pdf, "docx": generate_word_doc}
+        total = collection.count_documents({"username": username})
+        try:
+            with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+                plans = collection.find({"username": username}).sort("created_at", pymongo.DESCENDING)
+                for done, plan in enumerate(plans, 1):
+                    created = plan.get('created_at')
+                    plan_data = dict(plan, created_at=created.strftime('%B %d, %Y at %I:%M %p')
+                                     if isinstance(created, datetime) else str(created or 'N/A'))
+                    stem = re.sub(r'[^\w\-]+', '_', f"{plan['subject']}_{plan['topic']}")[:80] + f"_{str(plan['_id'])[-6:]}"
+                    for fmt in formats:
+                        data = renderers[fmt](plan_data)
+                        if data:
+                            archive.writestr(f"{fmt}/{stem}.{fmt}", data)
+                    if progress:
+                        progress(done, total)
+        except BaseException:
+            os.remove(path)
+            raise
+        return path
+
+    def read_export(path):
+        with open(path, "rb") as archive:
+            return archive.read()
+
+    def discard_export(path):
+        if path and os.path.exists(path):
+            os.remove(path)
+
+    def deferred_download_button(label, render, file_name, mime, key, token, prepare_label=None):
+        """Download button (renders eagerly without the `src` package)"""
+        data = render()
+        if data:
+            st.download_button(label=label, data=data, file_name=file_name, mime=mime,
+                               key=f"download_{key}", use_container_width=True)
+
+    def generate_notes_and_quiz(plan_content, subject, topic, grade, regenerate=False):
         """Generate comprehensive notes and quiz from lesson plan"""
         prompt = f"""Based on the following lesson plan for {subject} - {topic} (Grade/Level: {grade}), generate:
 
@@ -266,6 +389,125 @@ Generate comprehensive, well-structured notes and quiz questions."""
         
         return LLM_Setup(prompt)
 
+    def build_lesson_plan_prompt(subject, topic, grade, duration, learning_style, difficulty,
+                                 learning_objectives, customization=None):
+        """Build the lesson plan generation prompt from the Create Plan inputs"""
+        return f"""Generate a comprehensive, detailed lesson plan for the subject "{subject}" on the topic "{topic}".
+
+**Lesson Details:**
+- Grade Level: {grade}
+- Duration: {duration}
+- Learning Style: {learning_style}
+- Difficulty Level: {difficulty}
+
+**Learning Objectives:**
+{learning_objectives}
+
+**Customization Requirements:**
+{customization if customization else "None specified"}
+
+**Requirements:**
+1. Create a well-structured lesson plan in Markdown format
+2. Include relevant YouTube video links (at least 2-3 videos) that are educational and appropriate for {grade} level
+3. Format YouTube links as: [Video Title](https://www.youtube.com/watch?v=VIDEO_ID) or [Video Title](https://youtu.be/VIDEO_ID)
+4. Include the following sections:
+   - **Lesson Overview** (brief summary)
+   - **Learning Objectives** (detailed, measurable, using Bloom's taxonomy for higher education levels)
+   - **Materials Needed** (list all resources, including digital tools if applicable)
+   - **Introduction/Warm-up** (5-10 minutes, or appropriate for session length)
+   - **Main Content** (detailed step-by-step activities with timing)
+   - **YouTube Videos & Resources** (with descriptions of what each video covers and why it's relevant)
+   - **Interactive Activities** (hands-on, group activities, discussions, or case studies)
+   - **Assessment/Evaluation** (how to measure learning - quizzes, assignments, projects, presentations)
+   - **Homework/Extension Activities** (optional follow-up work or research)
+   - **Additional Resources** (websites, articles, research papers, academic journals if applicable)
+
+5. Make it engaging, interactive, and appropriate for {grade} level:
+   - For K-12: Use age-appropriate language, include games and hands-on activities
+   - For Associate/Bachelor's: Include academic rigor, research components, and critical thinking
+   - For Master's/PhD: Focus on advanced concepts, research methodologies, scholarly discussions, and peer review
+   - For Professional Development: Emphasize practical applications, real-world scenarios, and skill-building
+6. Include specific time allocations for each section
+7. Add practical examples and real-world connections relevant to the level
+8. Ensure the content aligns with {learning_style} learning style
+9. Adjust complexity, depth, and academic rigor based on {difficulty} difficulty level and {grade} level
+10. For higher education levels, include:
+    - Academic citations and references where appropriate
+    - Discussion questions that promote critical thinking
+    - Research assignments or literature reviews
+    - Peer collaboration and presentation opportunities
+
+Return the lesson plan in clean Markdown format with proper headings, bullet points, and formatting."""
+
+# --- Plan Statistics (Fallback if modular import fails) ---
+if not USE_MODULAR_STRUCTURE:
+    from datetime import timedelta
+
+    def get_plan_stats(collection, username):
+        """Total plans, distinct subjects and grades, and plans from the last 7 days (uncached)"""
+        week_ago = datetime.now() - timedelta(days=7)
+        return {
+            "total": collection.count_documents({"username": username}),
+            "subjects": len(collection.distinct("subject", {"username": username})),
+            "grades": len(collection.distinct("grade", {"username": username})),
+            "this_week": collection.count_documents({"username": username, "created_at": {"$gte": week_ago}}),
+        }
+
+    def invalidate_plan_stats(username):
+        """Nothing is cached without the `src` package"""
+
+# --- Plan Queries (Fallback if modular import fails) ---
+if not USE_MODULAR_STRUCTURE:
+    import re
+    from bson import ObjectId
+
+    PLANS_PAGE_SIZE = 10
+    _PLAN_SORTS = {
+        "Newest First": ("created_at", pymongo.DESCENDING),
+        "Oldest First": ("created_at", pymongo.ASCENDING),
+        "Subject A-Z": ("subject", pymongo.ASCENDING),
+        "Subject Z-A": ("subject", pymongo.DESCENDING),
+    }
+
+    def _plan_filter(username, search=None, grade=None):
+        query = {"username": username}
+        if grade:
+            query["grade"] = grade
+        if search:
+            pattern = {"$regex": re.escape(search.strip()), "$options": "i"}
+            query["$or"] = [{"subject": pattern}, {"topic": pattern}, {"grade": pattern}]
+        return query
+
+    def list_plan_cards(collection, username, search=None, grade=None, sort="Newest First",
+                        page_size=PLANS_PAGE_SIZE, after=None):
+        """One page of plans without their content; the next page's cursor is its offset (None on the last page)"""
+        offset = after or 0
+        cards = list(collection.find(_plan_filter(username, search, grade), {"content": False})
+                     .sort(*_PLAN_SORTS[sort]).skip(offset).limit(page_size + 1))
+        if len(cards) > page_size:
+            return cards[:page_size], offset + page_size
+        return cards, None
+
+    def count_plans(collection, username, search=None, grade=None):
+        return collection.count_documents(_plan_filter(username, search, grade))
+
+    def list_plan_grades(collection, username):
+        return sorted(g for g in collection.distinct("grade", {"username": username}) if g)
+
+    def get_plan(collection, plan_id, username):
+        return collection.find_one({"_id": ObjectId(plan_id), "username": username})
+
+    def get_cached(username, name, compute, ttl=None):
+        """Uncached: runs `compute()` every time"""
+        return compute()
+
+# --- Form Options ---
+GRADE_LEVELS = ['Kindergarten', 'Grade 1', 'Grade 2', 'Grade 3', 'Grade 4', 'Grade 5',
+                'Grade 6', 'Grade 7', 'Grade 8', 'Grade 9', 'Grade 10', 'Grade 11', 'Grade 12',
+                'Associate Degree', 'Bachelor\'s Degree', 'Master\'s Degree', 'PhD/Doctorate', 'Professional Development']
+LEARNING_STYLES = ['Visual', 'Auditory', 'Kinesthetic', 'Mixed', 'Interactive']
+DIFFICULTY_LEVELS = ['Beginner', 'Intermediate', 'Advanced']
+
 # --- Session State Initialization ---
 if "logged_in" not in st.session_state:
     st.session_state.logged_in = False
@@ -276,6 +518,24 @@ if "current_plan" not in st.session_state:
 if "plan_history" not in st.session_state:
     st.session_state.plan_history = []
 
+# Restore the signed-in user from the session cookie after a refresh or in a new tab
+if USE_MODULAR_STRUCTURE:
+    if "session" in st.query_params:
+        # Tokens in links are never honoured (anyone could share theirs); just tidy the URL
+        del st.query_params["session"]
+    cookie_token = read_session_cookie()
+    # The cookie is what the browser sent when the tab connected; look each token up once
+    if not st.session_state.logged_in and cookie_token and st.session_state.get("session_cookie_seen") != cookie_token:
+        st.session_state.session_cookie_seen = cookie_token
+        restored_user = resolve_session(get_sessions_collection(), cookie_token)
+        if restored_user:
+            st.session_state.logged_in = True
+            st.session_state.username = restored_user
+            st.session_state.session_token = cookie_token
+        else:
+            clear_session_cookie()
+    sync_session_cookie()
+
 # --- Dark / Light Mode Toggle ---
 # Initialize dark mode in session state
 if "dark_mode" not in st.session_state:
@@ -283,350 +543,20 @@ if "dark_mode" not in st.session_state:
 
 dark_mode = st.session_state.dark_mode
 
-# --- Define colors based on mode ---
-bg_color = "#0f172a" if dark_mode else "#f8fafc"
-text_color = "#f1f5f9" if dark_mode else "#1e293b"
-card_bg_color = "#1e293b" if dark_mode else "#ffffff"
-input_bg_color = "#334155" if dark_mode else "#ffffff"
-input_text_color = "#f1f5f9" if dark_mode else "#1e293b"
-button_color = "#6366f1" if dark_mode else "#4f46e5"
-accent_color = "#8b5cf6" if dark_mode else "#7c3aed"
-border_color = "#475569" if dark_mode else "#e2e8f0"
-
-# --- Enhanced CSS Styling ---
-st.markdown(
-    f"""
-    <style>
-    /* Main App Background */
-    .stApp {{
-        background: linear-gradient(135deg, {bg_color} 0%, {'#1e293b' if dark_mode else '#e0e7ff'} 100%);
-        color: {text_color};
-    }}
-    
-    /* Hide Streamlit default elements */
-    #MainMenu {{visibility: hidden;}}
-    footer {{visibility: hidden;}}
-    header {{visibility: hidden;}}
-    
-    /* Custom Header */
-    .main-header {{
-        background: linear-gradient(135deg, {button_color} 0%, {accent_color} 100%);
-        padding: 2rem 1rem;
-        border-radius: 15px;
-        margin-bottom: 2rem;
-        box-shadow: 0 10px 30px rgba(0,0,0,0.2);
-        text-align: center;
-    }}
-    
-    .main-header h1 {{
-        color: white;
-        font-size: 2.5rem;
-        font-weight: 800;
-        margin: 0;
-        text-shadow: 2px 2px 4px rgba(0,0,0,0.3);
-    }}
-    
-    .main-header p {{
-        color: rgba(255,255,255,0.9);
-        font-size: 1.1rem;
-        margin-top: 0.5rem;
-    }}
-    
-    /* Cards */
-    .lesson-card {{
-        background-color: {card_bg_color};
-        padding: 2rem;
-        border-radius: 15px;
-        box-shadow: 0 4px 20px rgba(0,0,0,0.1);
-        margin: 1rem 0;
-        border: 1px solid {border_color};
-    }}
-    
-    /* Input boxes - Mobile Friendly */
-    .stTextInput>div>div>input, 
-    .stTextArea>div>div>textarea,
-    .stSelectbox>div>div>select {{
-        background-color: {input_bg_color} !important;
-        color: {input_text_color} !important;
-        font-size: 16px !important; /* Larger for mobile */
-        border-radius: 10px !important;
-        padding: 12px 15px !important;
-        border: 2px solid {border_color} !important;
-        transition: all 0.3s ease !important;
-    }}
-    
-    .stTextInput>div>div>input:focus,
-    .stTextArea>div>div>textarea:focus {{
-        border-color: {button_color} !important;
-        box-shadow: 0 0 0 3px rgba(99, 102, 241, 0.1) !important;
-    }}
-    
-    /* Labels */
-    .stTextInput label, 
-    .stTextArea label,
-    .stSelectbox label {{
-        color: {text_color} !important;
-        font-weight: 600 !important;
-        font-size: 14px !important;
-        margin-bottom: 8px !important;
-    }}
-    
-    /* Buttons - Touch Friendly */
-    .stButton>button {{
-        background: linear-gradient(135deg, {button_color} 0%, {accent_color} 100%) !important;
-        color: white !important;
-        font-weight: 600 !important;
-        font-size: 16px !important;
-        border-radius: 12px !important;
-        padding: 12px 30px !important;
-        min-height: 48px !important; /* Touch-friendly size */
-        width: 100% !important;
-        border: none !important;
-        box-shadow: 0 4px 15px rgba(99, 102, 241, 0.3) !important;
-        transition: all 0.3s ease !important;
-    }}
-    
-    .stButton>button:hover {{
-        transform: translateY(-2px) !important;
-        box-shadow: 0 6px 20px rgba(99, 102, 241, 0.4) !important;
-    }}
-    
-    .stButton>button:active {{
-        transform: translateY(0) !important;
-    }}
-    
-    /* Sidebar */
-    .css-1d391kg {{
-        background-color: {card_bg_color} !important;
-    }}
-    
-    /* Markdown content */
-    .lesson-plan-content {{
-        background-color: {card_bg_color};
-        padding: 2rem;
-        border-radius: 15px;
-        margin: 1rem 0;
-        line-height: 1.8;
-        font-size: 16px;
-    }}
-    
-    .lesson-plan-content h1, .lesson-plan-content h2, .lesson-plan-content h3 {{
-        color: {button_color};
-        margin-top: 1.5rem;
-        margin-bottom: 1rem;
-    }}
-    
-    .lesson-plan-content a {{
-        color: {accent_color};
-        text-decoration: none;
-        font-weight: 600;
-    }}
-    
-    .lesson-plan-content a:hover {{
-        text-decoration: underline;
-    }}
-    
-    /* Mobile Responsive */
-    @media (max-width: 768px) {{
-        .main-header h1 {{
-            font-size: 1.8rem;
-        }}
-        
-        .lesson-card {{
-            padding: 1.5rem;
-        }}
-        
-        [data-testid="stSidebar"] {{
-            width: 100% !important;
-        }}
-    }}
-    
-    /* Success/Error Messages */
-    .stSuccess {{
-        background-color: rgba(34, 197, 94, 0.1);
-        border-left: 4px solid #22c55e;
-        padding: 1rem;
-        border-radius: 8px;
-    }}
-    
-    .stError {{
-        background-color: rgba(239, 68, 68, 0.1);
-        border-left: 4px solid #ef4444;
-        padding: 1rem;
-        border-radius: 8px;
-    }}
-    
-    /* Loading Spinner */
-    .stSpinner > div {{
-        border-top-color: {button_color} !important;
-    }}
-    
-    /* Navigation Bar */
-    .navbar {{
-        background: linear-gradient(135deg, {button_color} 0%, {accent_color} 100%);
-        padding: 1rem 2rem;
-        border-radius: 0 0 15px 15px;
-        margin-bottom: 2rem;
-        box-shadow: 0 4px 15px rgba(0,0,0,0.1);
-        position: relative;
-    }}
-    
-    .navbar-content {{
-        display: flex;
-        justify-content: space-between;
-        align-items: center;
-        max-width: 100%;
-        margin: 0 auto;
-    }}
-    
-    .navbar-brand {{
-        font-size: 1.5rem;
-        font-weight: 800;
-        color: white;
-        text-decoration: none;
-    }}
-    
-    .navbar-links {{
-        display: flex;
-        gap: 1.5rem;
-        align-items: center;
-    }}
-    
-    .navbar-link {{
-        color: white;
-        text-decoration: none;
-        font-weight: 600;
-        padding: 0.5rem 1rem;
-        border-radius: 8px;
-        transition: all 0.3s ease;
-    }}
-    
-    .navbar-link:hover {{
-        background: rgba(255,255,255,0.2);
-    }}
-    
-    /* Dark Mode Toggle Button in Navbar */
-    .dark-mode-toggle {{
-        background: rgba(255, 255, 255, 0.15) !important;
-        color: white !important;
-        border: 2px solid rgba(255, 255, 255, 0.3) !important;
-        font-weight: 600 !important;
-        font-size: 14px !important;
-        padding: 8px 16px !important;
-        border-radius: 25px !important;
-        transition: all 0.3s ease !important;
-        cursor: pointer !important;
-        display: flex !important;
-        align-items: center !important;
-        gap: 8px !important;
-    }}
-    
-    .dark-mode-toggle:hover {{
-        background: rgba(255, 255, 255, 0.25) !important;
-        transform: scale(1.05) !important;
-        box-shadow: 0 4px 12px rgba(0,0,0,0.2) !important;
-    }}
-    
-    .dark-mode-toggle:active {{
-        transform: scale(0.98) !important;
-    }}
-    
-    /* Toggle Icon Animation */
-    .toggle-icon {{
-        font-size: 18px !important;
-        transition: transform 0.3s ease !important;
-    }}
-    
-    .dark-mode-toggle:hover .toggle-icon {{
-        transform: rotate(15deg) !important;
-    }}
-    
-    /* Footer */
-    .footer {{
-        background: linear-gradient(135deg, {card_bg_color} 0%, {bg_color} 100%);
-        padding: 2rem;
-        margin-top: 4rem;
-        border-top: 2px solid {border_color};
-        border-radius: 15px 15px 0 0;
-    }}
-    
-    .footer-content {{
-        max-width: 1200px;
-        margin: 0 auto;
-        display: grid;
-        grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-        gap: 2rem;
-    }}
-    
-    .footer-section h4 {{
-        color: {button_color};
-        margin-bottom: 1rem;
-        font-size: 1.2rem;
-    }}
-    
-    .footer-section p, .footer-section a {{
-        color: {text_color};
-        text-decoration: none;
-        line-height: 1.8;
-    }}
-    
-    .footer-section a:hover {{
-        color: {accent_color};
-    }}
-    
-    .footer-bottom {{
-        text-align: center;
-        margin-top: 2rem;
-        padding-top: 1rem;
-        border-top: 1px solid {border_color};
-        color: {text_color};
-    }}
-    
-    /* Feature Cards */
-    .feature-card {{
-        background: {card_bg_color};
-        padding: 2rem;
-        border-radius: 15px;
-        border: 2px solid {border_color};
-        box-shadow: 0 4px 15px rgba(0,0,0,0.1);
-        transition: transform 0.3s ease, box-shadow 0.3s ease;
-        height: 100%;
-    }}
-    
-    .feature-card:hover {{
-        transform: translateY(-5px);
-        box-shadow: 0 8px 25px rgba(0,0,0,0.15);
-    }}
-    
-    .feature-icon {{
-        font-size: 3rem;
-        margin-bottom: 1rem;
-    }}
-    
-    .feature-card h3 {{
-        color: {button_color};
-        margin-bottom: 1rem;
-    }}
-    
-    .feature-card p {{
-        color: {text_color};
-        line-height: 1.6;
-    }}
-    </style>
-    """,
-    unsafe_allow_html=True
-)
+# --- Theme ---
+# The compiled stylesheet is served as a static file; only a small tag is sent per rerun
+theme = apply_theme(dark_mode)
+bg_color = theme["bg_color"]
+text_color = theme["text_color"]
+card_bg_color = theme["card_bg_color"]
+input_bg_color = theme["input_bg_color"]
+input_text_color = theme["input_text_color"]
+button_color = theme["button_color"]
+accent_color = theme["accent_color"]
+border_color = theme["border_color"]
 
 # --- Page Header ---
-st.markdown(
-    f"""
-    <div class="main-header">
-        <h1>📚 AI Lesson Planner</h1>
-        <p>Create engaging, interactive lesson plans with AI-powered assistance</p>
-    </div>
-    """,
-    unsafe_allow_html=True
-)
+st.markdown(HEADER_HTML, unsafe_allow_html=True)
 
 # --- Login / Signup Section ---
 if not st.session_state.logged_in:
@@ -656,14 +586,21 @@ if not st.session_state.logged_in:
             username = st.text_input("👤 Username", key="login_username", placeholder="Enter your username")
             password = st.text_input("🔒 Password", type="password", key="login_password", placeholder="Enter your password")
             if st.button("🔑 Login", key="login_btn", use_container_width=True):
-                user = users.find_one({"username": username})
-                if user and bcrypt.checkpw(password.encode('utf-8'), user["password"]):
-                    st.session_state.logged_in = True
-                    st.session_state.username = username
-                    st.success(f"✅ Welcome back, {username}!")
-                    st.rerun()
+                try:
+                    user = authenticate(users, username, password)
+                except LoginThrottled as e:
+                    st.error(f"🔒 {e}")
                 else:
-                    st.error("❌ Invalid username or password")
+                    if user:
+                        st.session_state.logged_in = True
+                        st.session_state.username = username
+                        if USE_MODULAR_STRUCTURE:
+                            st.session_state.session_token = create_session(get_sessions_collection(), username)
+                            set_session_cookie(st.session_state.session_token)
+                        st.success(f"✅ Welcome back, {username}!")
+                        st.rerun()
+                    else:
+                        st.error("❌ Invalid username or password")
             st.markdown("</div>", unsafe_allow_html=True)
     
     with tab2:
@@ -686,9 +623,12 @@ if not st.session_state.logged_in:
                 elif users.find_one({"username": username}):
                     st.error("⚠️ Username already exists. Try another.")
                 else:
-                    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-                    users.insert_one({"username": username, "password": hashed})
-                    st.success("✅ Account created successfully! Please switch to the Login tab to sign in.")
+                    try:
+                        register_user(users, username, password)
+                        st.success("✅ Account created successfully! Please switch to the Login tab to sign in.")
+                    except pymongo.errors.DuplicateKeyError:
+                        # Lost a race with another signup for the same name (unique index)
+                        st.error("⚠️ Username already exists. Try another.")
             st.markdown("</div>", unsafe_allow_html=True)
 
 # --- AI Lesson Planner Section (Only if logged in) ---
@@ -698,21 +638,7 @@ if st.session_state.logged_in:
     nav_col1, nav_col2 = st.columns([5, 1])
     
     with nav_col1:
-        st.markdown(
-            f"""
-            <div class="navbar">
-                <div class="navbar-content">
-                    <div class="navbar-brand">📚 AI Lesson Planner</div>
-                    <div class="navbar-links">
-                        <a href="#" class="navbar-link">Home</a>
-                        <a href="#" class="navbar-link">Features</a>
-                        <a href="#" class="navbar-link">About</a>
-                    </div>
-                </div>
-            </div>
-            """,
-            unsafe_allow_html=True
-        )
+        st.markdown(NAVBAR_HTML, unsafe_allow_html=True)
     
     with nav_col2:
         # Dark Mode Toggle Button - Enhanced UI
@@ -730,41 +656,7 @@ if st.session_state.logged_in:
         ):
             st.session_state.dark_mode = not st.session_state.dark_mode
             st.rerun()
-        
-        # Enhanced custom styling to the toggle button
-        st.markdown(
-            f"""
-            <style>
-            button[key="dark_mode_toggle_navbar"] {{
-                background: linear-gradient(135deg, rgba(255, 255, 255, 0.2) 0%, rgba(255, 255, 255, 0.1) 100%) !important;
-                color: white !important;
-                border: 2px solid rgba(255, 255, 255, 0.4) !important;
-                font-weight: 700 !important;
-                font-size: 15px !important;
-                border-radius: 30px !important;
-                transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1) !important;
-                margin-top: 0.5rem !important;
-                padding: 10px 20px !important;
-                box-shadow: 0 2px 8px rgba(0,0,0,0.15) !important;
-                text-transform: none !important;
-                letter-spacing: 0.5px !important;
-            }}
-            
-            button[key="dark_mode_toggle_navbar"]:hover {{
-                background: linear-gradient(135deg, rgba(255, 255, 255, 0.3) 0%, rgba(255, 255, 255, 0.2) 100%) !important;
-                transform: translateY(-2px) scale(1.05) !important;
-                box-shadow: 0 6px 20px rgba(0,0,0,0.25) !important;
-                border-color: rgba(255, 255, 255, 0.6) !important;
-            }}
-            
-            button[key="dark_mode_toggle_navbar"]:active {{
-                transform: translateY(0) scale(0.98) !important;
-                box-shadow: 0 2px 8px rgba(0,0,0,0.15) !important;
-            }}
-            </style>
-            """,
-            unsafe_allow_html=True
-        )
+
     
     # Sidebar
     with st.sidebar:
@@ -784,7 +676,7 @@ if st.session_state.logged_in:
         st.markdown("---")
         
         # Navigation
-        nav_options = ["🏠 Home", "📝 Create Plan", "📚 My Plans", "⚙️ Settings"]
+        nav_options = ["🏠 Home", "📝 Create Plan", "📦 Batch Plans", "📚 My Plans", "⚙️ Settings"]
         if "nav_page" in st.session_state and st.session_state.nav_page in nav_options:
             default_index = nav_options.index(st.session_state.nav_page)
         else:
@@ -794,6 +686,12 @@ if st.session_state.logged_in:
             del st.session_state.nav_page
         
         if st.button("🚪 Logout", use_container_width=True):
+            if USE_MODULAR_STRUCTURE:
+                if st.session_state.get("session_token"):
+                    revoke_session(get_sessions_collection(), st.session_state.session_token)
+                st.session_state.session_token = None
+                clear_session_cookie()
+                discard_export(st.session_state.pop("bulk_export_path", None))
             st.session_state.logged_in = False
             st.session_state.username = None
             st.session_state.current_plan = None
@@ -822,12 +720,15 @@ if st.session_state.logged_in:
 
         with col_welcome2:
             try:
-                saved_plans = list(lesson_plans.find({"username": st.session_state.username}))
-                recent_plans = sorted(saved_plans, key=lambda x: x.get('created_at', datetime.min) if isinstance(x.get('created_at'), datetime) else datetime.min, reverse=True)[:3]
+                plan_counts = get_plan_stats(lesson_plans, st.session_state.username)
+                recent_plans = get_cached(
+                    st.session_state.username, "recent_plans",
+                    lambda: list_plan_cards(lesson_plans, st.session_state.username, page_size=3)[0]
+                )
                 
                 st.markdown("### 📊 Quick Stats")
-                st.metric("Total Plans", len(saved_plans))
-                st.metric("This Week", len([p for p in saved_plans if isinstance(p.get('created_at'), datetime) and (datetime.now() - p['created_at']).days <= 7]))
+                st.metric("Total Plans", plan_counts["total"])
+                st.metric("This Week", plan_counts["this_week"])
                 
                 if recent_plans:
                     st.markdown("### 📚 Recent Plans")
@@ -977,20 +878,12 @@ if st.session_state.logged_in:
         with col1:
             subject = st.text_input('📖 Subject *', key="subject", placeholder="e.g., Science, Mathematics, English")
             topic = st.text_input('📌 Topic *', key="topic", placeholder="e.g., Photosynthesis, Algebra, Poetry")
-            grade = st.selectbox('🎓 Grade/Level *', 
-                                ['Kindergarten', 'Grade 1', 'Grade 2', 'Grade 3', 'Grade 4', 'Grade 5',
-                                 'Grade 6', 'Grade 7', 'Grade 8', 'Grade 9', 'Grade 10', 'Grade 11', 'Grade 12',
-                                 'Associate Degree', 'Bachelor\'s Degree', 'Master\'s Degree', 'PhD/Doctorate', 'Professional Development'],
-                                key="grade")
+            grade = st.selectbox('🎓 Grade/Level *', GRADE_LEVELS, key="grade")
         
         with col2:
             duration = st.text_input('⏱️ Duration *', key="duration", placeholder="e.g., 45 minutes, 1 hour")
-            learning_style = st.selectbox('🎨 Learning Style', 
-                                         ['Visual', 'Auditory', 'Kinesthetic', 'Mixed', 'Interactive'],
-                                         key="learning_style")
-            difficulty = st.selectbox('📊 Difficulty Level', 
-                                     ['Beginner', 'Intermediate', 'Advanced'],
-                                     key="difficulty")
+            learning_style = st.selectbox('🎨 Learning Style', LEARNING_STYLES, key="learning_style")
+            difficulty = st.selectbox('📊 Difficulty Level', DIFFICULTY_LEVELS, key="difficulty")
         
         learning_objectives = st.text_area('🎯 Learning Objectives *', 
                                           key="learning_objectives",
@@ -1001,62 +894,38 @@ if st.session_state.logged_in:
         
         # Generate button
         col_btn1, col_btn2, col_btn3 = st.columns([1, 2, 1])
+        # Full-width area below the button where the plan streams in as it is generated
+        stream_area = st.empty()
         with col_btn2:
+            regenerate = st.checkbox(
+                "🔄 Regenerate (ignore previously generated result)",
+                key="regenerate_plan",
+                help="Identical requests are answered from cache. Tick this to ask the AI for a fresh plan."
+            )
+            full_package = USE_MODULAR_STRUCTURE and st.checkbox(
+                "📦 Full package (also generate Notes & Quiz)",
+                key="full_package",
+                help="Generates study notes and a quiz alongside the plan, at the same time."
+            )
             if st.button('🚀 Generate Lesson Plan', use_container_width=True, type="primary"):
                 if not subject or not topic or not grade or not duration or not learning_objectives:
                     st.warning('⚠️ Please fill out all required fields (marked with *) before generating the lesson plan.')
                 else:
                     with st.spinner("🧠 AI is crafting your comprehensive lesson plan with YouTube links and resources..."):
                         # Enhanced prompt with YouTube links requirement
-                        prompt = f"""Generate a comprehensive, detailed lesson plan for the subject "{subject}" on the topic "{topic}".
-
-**Lesson Details:**
-- Grade Level: {grade}
-- Duration: {duration}
-- Learning Style: {learning_style}
-- Difficulty Level: {difficulty}
-
-**Learning Objectives:**
-{learning_objectives}
-
-**Customization Requirements:**
-{customization if customization else "None specified"}
-
-**Requirements:**
-1. Create a well-structured lesson plan in Markdown format
-2. Include relevant YouTube video links (at least 2-3 videos) that are educational and appropriate for {grade} level
-3. Format YouTube links as: [Video Title](https://www.youtube.com/watch?v=VIDEO_ID) or [Video Title](https://youtu.be/VIDEO_ID)
-4. Include the following sections:
-   - **Lesson Overview** (brief summary)
-   - **Learning Objectives** (detailed, measurable, using Bloom's taxonomy for higher education levels)
-   - **Materials Needed** (list all resources, including digital tools if applicable)
-   - **Introduction/Warm-up** (5-10 minutes, or appropriate for session length)
-   - **Main Content** (detailed step-by-step activities with timing)
-   - **YouTube Videos & Resources** (with descriptions of what each video covers and why it's relevant)
-   - **Interactive Activities** (hands-on, group activities, discussions, or case studies)
-   - **Assessment/Evaluation** (how to measure learning - quizzes, assignments, projects, presentations)
-   - **Homework/Extension Activities** (optional follow-up work or research)
-   - **Additional Resources** (websites, articles, research papers, academic journals if applicable)
-
-5. Make it engaging, interactive, and appropriate for {grade} level:
-   - For K-12: Use age-appropriate language, include games and hands-on activities
-   - For Associate/Bachelor's: Include academic rigor, research components, and critical thinking
-   - For Master's/PhD: Focus on advanced concepts, research methodologies, scholarly discussions, and peer review
-   - For Professional Development: Emphasize practical applications, real-world scenarios, and skill-building
-6. Include specific time allocations for each section
-7. Add practical examples and real-world connections relevant to the level
-8. Ensure the content aligns with {learning_style} learning style
-9. Adjust complexity, depth, and academic rigor based on {difficulty} difficulty level and {grade} level
-10. For higher education levels, include:
-    - Academic citations and references where appropriate
-    - Discussion questions that promote critical thinking
-    - Research assignments or literature reviews
-    - Peer collaboration and presentation opportunities
-
-Return the lesson plan in clean Markdown format with proper headings, bullet points, and formatting."""
+                        prompt = build_lesson_plan_prompt(
+                            subject, topic, grade, duration, learning_style, difficulty,
+                            learning_objectives, customization
+                        )
                         
                         try:
-                            llm_output = LLM_Setup(prompt)
+                            if full_package:
+                                job = FullPackageJob(prompt, subject, topic, grade, regenerate=regenerate)
+                                plan_stream = job.stream()
+                            else:
+                                plan_stream = LLM_Stream(prompt, regenerate=regenerate)
+                            with stream_area.container():
+                                llm_output = st.write_stream(plan_stream)
                             st.session_state.current_plan = {
                                 "subject": subject,
                                 "topic": topic,
@@ -1065,10 +934,24 @@ Return the lesson plan in clean Markdown format with proper headings, bullet poi
                                 "content": llm_output,
                                 "created_at": datetime.now().isoformat()
                             }
+                            # Notes/quiz from an earlier plan no longer apply
+                            st.session_state.pop("notes_quiz", None)
+                            # The saved plan is rendered below; drop the streamed copy
+                            stream_area.empty()
                             st.success("✅ Lesson Plan Generated Successfully!")
                         except Exception as e:
+                            full_package = False
                             st.error(f"❌ Error generating lesson plan: {str(e)}")
                             st.info("💡 Please try again. If the issue persists, check your API key and internet connection.")
+                        
+                        # The plan is kept even if its notes/quiz fail
+                        if full_package:
+                            try:
+                                with st.spinner("🧠 Finishing notes and quiz..."):
+                                    st.session_state.notes_quiz = job.notes()
+                            except Exception as e:
+                                st.warning(f"⚠️ Lesson plan ready, but notes/quiz generation failed: {str(e)}. "
+                                           "Use \"📝 Generate Notes & Quiz\" below to try again.")
         
         # Display generated plan
         if st.session_state.current_plan:
@@ -1090,6 +973,7 @@ Return the lesson plan in clean Markdown format with proper headings, bullet poi
                             "created_at": datetime.now()
                         }
                         lesson_plans.insert_one(plan_data)
+                        invalidate_plan_stats(st.session_state.username)
                         st.success("✅ Lesson plan saved successfully!")
                     except Exception as e:
                         st.error(f"❌ Error saving plan: {str(e)}")
@@ -1102,7 +986,8 @@ Return the lesson plan in clean Markdown format with proper headings, bullet poi
                                 st.session_state.current_plan['content'],
                                 st.session_state.current_plan['subject'],
                                 st.session_state.current_plan['topic'],
-                                st.session_state.current_plan['grade']
+                                st.session_state.current_plan['grade'],
+                                regenerate=st.session_state.get("regenerate_plan", False)
                             )
                             st.session_state.notes_quiz = notes_quiz
                             st.success("✅ Notes and Quiz generated!")
@@ -1120,29 +1005,33 @@ Return the lesson plan in clean Markdown format with proper headings, bullet poi
             st.markdown("### 📤 Export Options")
             col_pdf, col_word, col_md = st.columns(3)
             
+            # Stamp exports with the plan's own creation time so identical content renders identically
+            try:
+                plan_created = datetime.fromisoformat(st.session_state.current_plan['created_at']).strftime('%Y-%m-%d %H:%M')
+            except (KeyError, TypeError, ValueError):
+                plan_created = datetime.now().strftime('%Y-%m-%d %H:%M')
             plan_data_export = {
                 "subject": st.session_state.current_plan['subject'],
                 "topic": st.session_state.current_plan['topic'],
                 "grade": st.session_state.current_plan['grade'],
                 "duration": st.session_state.current_plan['duration'],
                 "content": st.session_state.current_plan['content'],
-                "created_at": datetime.now().strftime('%Y-%m-%d %H:%M')
+                "created_at": plan_created
             }
             
+            # PDF and Word files are only rendered when requested
+            plan_export_token = hash(tuple(sorted(plan_data_export.items())))
             with col_pdf:
                 if REPORTLAB_AVAILABLE:
                     try:
-                        pdf_data = generate_pdf(plan_data_export)
-                        if pdf_data:
-                            st.download_button(
-                                label="📄 Download PDF",
-                                data=pdf_data,
-                                file_name=f"lesson_plan_{st.session_state.current_plan['subject']}_{st.session_state.current_plan['topic']}.pdf",
-                                mime="application/pdf",
-                                use_container_width=True
-                            )
-                        else:
-                            st.button("📄 PDF (Unavailable)", disabled=True, use_container_width=True)
+                        deferred_download_button(
+                            label="📄 Download PDF",
+                            render=lambda: render_export(plan_data_export, "pdf"),
+                            file_name=f"lesson_plan_{st.session_state.current_plan['subject']}_{st.session_state.current_plan['topic']}.pdf",
+                            mime="application/pdf",
+                            key="plan_pdf",
+                            token=plan_export_token
+                        )
                     except Exception as e:
                         st.error(f"PDF Error: {str(e)}")
                 else:
@@ -1151,17 +1040,14 @@ Return the lesson plan in clean Markdown format with proper headings, bullet poi
             with col_word:
                 if DOCX_AVAILABLE:
                     try:
-                        word_data = generate_word_doc(plan_data_export)
-                        if word_data:
-                            st.download_button(
-                                label="📘 Download Word",
-                                data=word_data,
-                                file_name=f"lesson_plan_{st.session_state.current_plan['subject']}_{st.session_state.current_plan['topic']}.docx",
-                                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                                use_container_width=True
-                            )
-                        else:
-                            st.button("📘 Word (Unavailable)", disabled=True, use_container_width=True)
+                        deferred_download_button(
+                            label="📘 Download Word",
+                            render=lambda: render_export(plan_data_export, "docx"),
+                            file_name=f"lesson_plan_{st.session_state.current_plan['subject']}_{st.session_state.current_plan['topic']}.docx",
+                            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                            key="plan_docx",
+                            token=plan_export_token
+                        )
                     except Exception as e:
                         st.error(f"Word Error: {str(e)}")
                 else:
@@ -1172,7 +1058,7 @@ Return the lesson plan in clean Markdown format with proper headings, bullet poi
 
 **Grade/Level:** {st.session_state.current_plan['grade']}  
 **Duration:** {st.session_state.current_plan['duration']}  
-**Created:** {datetime.now().strftime('%Y-%m-%d %H:%M')}
+**Created:** {plan_created}
 
 ---
 
@@ -1203,36 +1089,35 @@ Return the lesson plan in clean Markdown format with proper headings, bullet poi
                     "grade": st.session_state.current_plan['grade'],
                     "duration": "N/A",
                     "content": st.session_state.notes_quiz,
-                    "created_at": datetime.now().strftime('%Y-%m-%d %H:%M')
+                    "created_at": plan_created
                 }
                 
+                notes_export_token = hash(tuple(sorted(notes_data.items())))
                 with col_notes_pdf:
                     if REPORTLAB_AVAILABLE:
                         try:
-                            pdf_data = generate_pdf(notes_data)
-                            if pdf_data:
-                                st.download_button(
-                                    label="📄 Download Notes PDF",
-                                    data=pdf_data,
-                                    file_name=f"notes_quiz_{st.session_state.current_plan['subject']}_{st.session_state.current_plan['topic']}.pdf",
-                                    mime="application/pdf",
-                                    use_container_width=True
-                                )
+                            deferred_download_button(
+                                label="📄 Download Notes PDF",
+                                render=lambda: render_export(notes_data, "pdf"),
+                                file_name=f"notes_quiz_{st.session_state.current_plan['subject']}_{st.session_state.current_plan['topic']}.pdf",
+                                mime="application/pdf",
+                                key="notes_pdf",
+                                token=notes_export_token
+                            )
                         except:
                             pass
                 
                 with col_notes_word:
                     if DOCX_AVAILABLE:
                         try:
-                            word_data = generate_word_doc(notes_data)
-                            if word_data:
-                                st.download_button(
-                                    label="📘 Download Notes Word",
-                                    data=word_data,
-                                    file_name=f"notes_quiz_{st.session_state.current_plan['subject']}_{st.session_state.current_plan['topic']}.docx",
-                                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                                    use_container_width=True
-                                )
+                            deferred_download_button(
+                                label="📘 Download Notes Word",
+                                render=lambda: render_export(notes_data, "docx"),
+                                file_name=f"notes_quiz_{st.session_state.current_plan['subject']}_{st.session_state.current_plan['topic']}.docx",
+                                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                                key="notes_docx",
+                                token=notes_export_token
+                            )
                         except:
                             pass
                 
@@ -1251,17 +1136,134 @@ Return the lesson plan in clean Markdown format with proper headings, bullet poi
                 unsafe_allow_html=True
             )
 
+    # Batch Plans Page
+    elif page == "📦 Batch Plans":
+        st.markdown("### 📦 Batch Generate a Unit")
+        st.markdown("Generate lesson plans for a whole unit at once. Shared details apply to every topic; a CSV can override them per topic.")
+        
+        if not USE_MODULAR_STRUCTURE:
+            st.info("💡 Batch generation requires the `src` package.")
+        else:
+            col1, col2 = st.columns(2)
+            with col1:
+                batch_subject = st.text_input('📖 Subject *', key="batch_subject", placeholder="e.g., Science")
+                batch_grade = st.selectbox('🎓 Grade/Level *', GRADE_LEVELS, key="batch_grade")
+                batch_duration = st.text_input('⏱️ Duration *', key="batch_duration", placeholder="e.g., 45 minutes")
+            with col2:
+                batch_style = st.selectbox('🎨 Learning Style', LEARNING_STYLES, key="batch_learning_style")
+                batch_difficulty = st.selectbox('📊 Difficulty Level', DIFFICULTY_LEVELS, key="batch_difficulty")
+                batch_concurrency = st.slider("⚡ Parallel requests", 1, 8, 4, key="batch_concurrency")
+            batch_objectives = st.text_area('🎯 Learning Objectives *', key="batch_objectives",
+                                            placeholder="Applied to every topic unless the CSV provides its own")
+            
+            topic_source = st.radio("Topics", ["✍️ Paste list", "📄 Upload CSV"], horizontal=True, key="batch_topic_source")
+            topics = []
+            if topic_source == "✍️ Paste list":
+                topics_text = st.text_area("One topic per line", key="batch_topics_text", height=200)
+                topics = parse_topics_text(topics_text)
+            else:
+                st.caption("Columns: `topic` (required), `duration`, `learning_objectives`, `customization` (optional)")
+                uploaded = st.file_uploader("Topics CSV", type=["csv"], key="batch_topics_csv")
+                if uploaded is not None:
+                    try:
+                        topics = parse_topics_csv(uploaded.getvalue())
+                    except ValueError as e:
+                        st.error(f"❌ {str(e)}")
+            if topics:
+                st.markdown(f"**📋 {len(topics)} topics ready**")
+            
+            if st.button(f"🚀 Generate {len(topics)} Lesson Plans", use_container_width=True, type="primary", disabled=not topics):
+                if not batch_subject or not batch_duration or not batch_objectives:
+                    st.warning('⚠️ Please fill out all required fields (marked with *) before generating.')
+                else:
+                    items = build_batch_items(topics, {
+                        "subject": batch_subject,
+                        "grade": batch_grade,
+                        "duration": batch_duration,
+                        "learning_style": batch_style,
+                        "difficulty": batch_difficulty,
+                        "learning_objectives": batch_objectives
+                    })
+                    progress = st.progress(0.0, text=f"Generating 0 of {len(items)}...")
+                    status_area = st.container()
+                    results = [None] * len(items)
+                    for done, result in enumerate(iter_batch_generation(items, max_concurrency=batch_concurrency), start=1):
+                        results[result.index] = result
+                        progress.progress(done / len(items), text=f"Generating {done} of {len(items)}...")
+                        with status_area:
+                            if result.error:
+                                st.markdown(f"❌ **{result.item['topic']}** — {str(result.error)}")
+                            else:
+                                st.markdown(f"✅ **{result.item['topic']}**")
+                    st.session_state.batch_results = results
+            
+            batch_results = st.session_state.get("batch_results")
+            if batch_results:
+                succeeded = [r for r in batch_results if r.content]
+                st.markdown("---")
+                st.markdown(f"### ✅ {len(succeeded)} of {len(batch_results)} plans generated")
+                for result in succeeded:
+                    with st.expander(f"{result.item['subject']} - {result.item['topic']}"):
+                        st.markdown(result.content)
+                
+                col_save_all, col_discard = st.columns(2)
+                with col_save_all:
+                    if st.button("💾 Save All", use_container_width=True, disabled=not succeeded):
+                        try:
+                            now = datetime.now()
+                            lesson_plans.insert_many([
+                                {
+                                    "username": st.session_state.username,
+                                    "subject": r.item["subject"],
+                                    "topic": r.item["topic"],
+                                    "grade": r.item["grade"],
+                                    "duration": r.item["duration"],
+                                    "content": r.content,
+                                    "created_at": now
+                                }
+                                for r in succeeded
+                            ])
+                            invalidate_plan_stats(st.session_state.username)
+                            del st.session_state.batch_results
+                            st.success(f"✅ Saved {len(succeeded)} lesson plans!")
+                        except Exception as e:
+                            st.error(f"❌ Error saving plans: {str(e)}")
+                with col_discard:
+                    if st.button("🗑️ Discard", use_container_width=True):
+                        del st.session_state.batch_results
+                        st.rerun()
+    
     # My Plans Page
     elif page == "📚 My Plans":
         st.markdown("### 📚 My Saved Lesson Plans")
         st.markdown("Manage and organize all your lesson plans in one place")
         
+        # Export format -> (extension, mime type, button label, available)
+        SAVED_PLAN_EXPORTS = {
+            "Markdown": ("md", "text/markdown", "📝 Download", True),
+            "PDF": ("pdf", "application/pdf", "📄 Download", REPORTLAB_AVAILABLE),
+            "Word": ("docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document", "📘 Download", DOCX_AVAILABLE),
+        }
+        
+        def build_saved_plan_export(plan_id, fmt, plan_date):
+            """Load a saved plan's content and render it in the requested format"""
+            full_plan = get_plan(lesson_plans, plan_id, st.session_state.username)
+            plan_data = {
+                "subject": full_plan['subject'],
+                "topic": full_plan['topic'],
+                "grade": full_plan['grade'],
+                "duration": full_plan['duration'],
+                "content": full_plan['content'],
+                "created_at": plan_date
+            }
+            if fmt == "md":
+                return generate_markdown(plan_data)
+            return render_export(plan_data, fmt)
+        
         try:
-            saved_plans = list(lesson_plans.find(
-                {"username": st.session_state.username}
-            ).sort("created_at", -1))
+            plan_counts = get_plan_stats(lesson_plans, st.session_state.username)
             
-            if saved_plans:
+            if plan_counts["total"]:
                 # Enhanced Statistics Cards
                 st.markdown("---")
                 col_stat1, col_stat2, col_stat3, col_stat4 = st.columns(4)
@@ -1269,40 +1271,37 @@ Return the lesson plan in clean Markdown format with proper headings, bullet poi
                     st.markdown(
                         f"""
                         <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 1.5rem; border-radius: 15px; text-align: center; color: white;'>
-                            <h2 style='margin: 0; font-size: 2.5rem;'>{len(saved_plans)}</h2>
+                            <h2 style='margin: 0; font-size: 2.5rem;'>{plan_counts['total']}</h2>
                             <p style='margin: 0.5rem 0 0 0; font-size: 1rem;'>📊 Total Plans</p>
                         </div>
                         """,
                         unsafe_allow_html=True
                     )
                 with col_stat2:
-                    subjects = set([p['subject'] for p in saved_plans])
                     st.markdown(
                         f"""
                         <div style='background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%); padding: 1.5rem; border-radius: 15px; text-align: center; color: white;'>
-                            <h2 style='margin: 0; font-size: 2.5rem;'>{len(subjects)}</h2>
+                            <h2 style='margin: 0; font-size: 2.5rem;'>{plan_counts['subjects']}</h2>
                             <p style='margin: 0.5rem 0 0 0; font-size: 1rem;'>📖 Subjects</p>
                         </div>
                         """,
                         unsafe_allow_html=True
                     )
                 with col_stat3:
-                    grades = set([p['grade'] for p in saved_plans])
                     st.markdown(
                         f"""
                         <div style='background: linear-gradient(135deg, #4facfe 0%, #00f2fe 100%); padding: 1.5rem; border-radius: 15px; text-align: center; color: white;'>
-                            <h2 style='margin: 0; font-size: 2.5rem;'>{len(grades)}</h2>
+                            <h2 style='margin: 0; font-size: 2.5rem;'>{plan_counts['grades']}</h2>
                             <p style='margin: 0.5rem 0 0 0; font-size: 1rem;'>🎓 Levels</p>
                         </div>
                         """,
                         unsafe_allow_html=True
                     )
                 with col_stat4:
-                    recent_plans = [p for p in saved_plans if isinstance(p.get('created_at'), datetime) and (datetime.now() - p['created_at']).days <= 7]
                     st.markdown(
                         f"""
                         <div style='background: linear-gradient(135deg, #43e97b 0%, #38f9d7 100%); padding: 1.5rem; border-radius: 15px; text-align: center; color: white;'>
-                            <h2 style='margin: 0; font-size: 2.5rem;'>{len(recent_plans)}</h2>
+                            <h2 style='margin: 0; font-size: 2.5rem;'>{plan_counts['this_week']}</h2>
                             <p style='margin: 0.5rem 0 0 0; font-size: 1rem;'>🆕 This Week</p>
                         </div>
                         """,
@@ -1311,48 +1310,98 @@ Return the lesson plan in clean Markdown format with proper headings, bullet poi
                 
                 st.markdown("---")
                 
+                # Bulk export: every saved plan in one ZIP, rendered in worker processes
+                with st.expander("📦 Export All Plans"):
+                    bulk_formats = [name for name, (_, _, _, available) in SAVED_PLAN_EXPORTS.items() if available]
+                    chosen_formats = st.multiselect("Formats", bulk_formats, default=bulk_formats[:1], key="bulk_export_formats")
+                    if st.button("📦 Build ZIP", use_container_width=True, disabled=not chosen_formats):
+                        # Only the archive's path is kept in the session; the file is read on download
+                        # and removed on the next build, on logout or once stale
+                        discard_export(st.session_state.pop("bulk_export_path", None))
+                        bulk_progress = st.progress(0.0, text="Rendering plans...")
+                        try:
+                            st.session_state.bulk_export_path = export_plans_zip(
+                                lesson_plans, st.session_state.username,
+                                [SAVED_PLAN_EXPORTS[name][0] for name in chosen_formats],
+                                progress=lambda done, total: bulk_progress.progress(
+                                    min(1.0, done / max(total, 1)), text=f"Rendered {done} of {total} plans"
+                                )
+                            )
+                        except Exception as e:
+                            st.error(f"❌ Error exporting plans: {str(e)}")
+                        bulk_progress.empty()
+                    bulk_export_path = st.session_state.get("bulk_export_path")
+                    if bulk_export_path and not os.path.exists(bulk_export_path):
+                        # Removed as stale while the session sat idle
+                        del st.session_state.bulk_export_path
+                        bulk_export_path = None
+                    if bulk_export_path:
+                        st.download_button(
+                            label="⬇️ Download ZIP",
+                            data=lambda: read_export(bulk_export_path),
+                            file_name=f"lesson_plans_{st.session_state.username}_{datetime.now():%Y-%m-%d}.zip",
+                            mime="application/zip",
+                            use_container_width=True
+                        )
+                
                 # Enhanced Search and Filter
                 st.markdown("### 🔍 Search & Filter")
                 col_search, col_filter, col_sort = st.columns([2, 1, 1])
                 with col_search:
-                    search_query = st.text_input("🔍 Search plans", placeholder="Search by subject, topic, or grade...", key="search_plans", label_visibility="collapsed")
+                    search_query = st.text_input("🔍 Search plans", placeholder="Search plan titles and content, e.g. photosynthesis lab...", key="search_plans", label_visibility="collapsed")
                 with col_filter:
                     filter_grade = st.selectbox("🎓 Filter by Level", 
-                                               ["All Levels"] + sorted(set([p['grade'] for p in saved_plans])),
+                                               ["All Levels"] + get_cached(st.session_state.username, "grades", lambda: list_plan_grades(lesson_plans, st.session_state.username)),
                                                key="filter_grade", label_visibility="collapsed")
                 with col_sort:
                     sort_option = st.selectbox("📊 Sort by", 
                                               ["Newest First", "Oldest First", "Subject A-Z", "Subject Z-A"],
                                               key="sort_plans", label_visibility="collapsed")
                 
-                # Filter plans
-                filtered_plans = saved_plans
-                if search_query:
-                    search_lower = search_query.lower()
-                    filtered_plans = [p for p in filtered_plans 
-                                     if search_lower in p['subject'].lower() 
-                                     or search_lower in p['topic'].lower() 
-                                     or search_lower in p['grade'].lower()]
-                
-                if filter_grade != "All Levels":
-                    filtered_plans = [p for p in filtered_plans if p['grade'] == filter_grade]
+                # Filtering, sorting and paging all happen in MongoDB; only card fields are fetched
+                grade_filter = None if filter_grade == "All Levels" else filter_grade
+                query_key = (search_query, grade_filter, sort_option)
+                if st.session_state.get("plans_query_key") != query_key:
+                    st.session_state.plans_query_key = query_key
+                    st.session_state.plans_page_cursors = [None]
+                page_cursors = st.session_state.plans_page_cursors
                 
-                # Sort plans
-                if sort_option == "Newest First":
-                    filtered_plans = sorted(filtered_plans, key=lambda x: x.get('created_at', datetime.min) if isinstance(x.get('created_at'), datetime) else datetime.min, reverse=True)
-                elif sort_option == "Oldest First":
-                    filtered_plans = sorted(filtered_plans, key=lambda x: x.get('created_at', datetime.max) if isinstance(x.get('created_at'), datetime) else datetime.max)
-                elif sort_option == "Subject A-Z":
-                    filtered_plans = sorted(filtered_plans, key=lambda x: x.get('subject', '').lower())
-                elif sort_option == "Subject Z-A":
-                    filtered_plans = sorted(filtered_plans, key=lambda x: x.get('subject', '').lower(), reverse=True)
+                plan_cards = None
+                if search_query.strip() and USE_MODULAR_STRUCTURE:
+                    # Ranked full-text search over titles and content (sort order is by relevance);
+                    # without the `src` package, only titles are matched below
+                    try:
+                        plan_cards, next_cursor = search_plan_cards(
+                            lesson_plans, st.session_state.username, search_query,
+                            grade=grade_filter, after=page_cursors[-1]
+                        )
+                        matching_count = count_search_results(lesson_plans, st.session_state.username, search_query, grade=grade_filter)
+                    except pymongo.errors.OperationFailure:
+                        # Text index not built yet; fall back to matching titles only
+                        plan_cards = None
+                if plan_cards is None:
+                    def load_plan_page():
+                        cards, cursor = list_plan_cards(
+                            lesson_plans, st.session_state.username,
+                            search=search_query, grade=grade_filter, sort=sort_option, after=page_cursors[-1]
+                        )
+                        return cards, cursor, count_plans(lesson_plans, st.session_state.username, search=search_query, grade=grade_filter)
+                    if search_query.strip() or page_cursors[-1] is not None:
+                        plan_cards, next_cursor, matching_count = load_plan_page()
+                    else:
+                        # Unfiltered first pages are shared by all of the user's tabs until the next write
+                        plan_cards, next_cursor, matching_count = get_cached(
+                            st.session_state.username, ("plan_page", grade_filter, sort_option), load_plan_page
+                        )
                 
-                if filtered_plans:
-                    st.markdown(f"**📋 Showing {len(filtered_plans)} of {len(saved_plans)} plans**")
+                if plan_cards:
+                    first_shown = (len(page_cursors) - 1) * PLANS_PAGE_SIZE + 1
+                    st.markdown(f"**📋 Showing {first_shown}-{first_shown + len(plan_cards) - 1} of {matching_count} matching ({plan_counts['total']} total) plans**")
                     st.markdown("---")
                     
                     # Modern Card Layout
-                    for idx, plan in enumerate(filtered_plans):
+                    for plan in plan_cards:
+                        idx = str(plan['_id'])
                         plan_date = plan['created_at'].strftime('%B %d, %Y at %I:%M %p') if isinstance(plan['created_at'], datetime) else str(plan.get('created_at', 'Unknown'))
                         days_ago = (datetime.now() - plan['created_at']).days if isinstance(plan['created_at'], datetime) else 0
                         
@@ -1374,6 +1423,7 @@ Return the lesson plan in clean Markdown format with proper headings, bullet poi
                                     <div>📅 <strong>Created:</strong> {plan_date}</div>
                                     {f"<div>🕐 <strong>{days_ago} days ago</strong></div>" if days_ago > 0 else ""}
                                 </div>
+                                {f"<div style='color: {text_color}; opacity: 0.85; font-size: 0.95rem;'>{plan['snippet_html']}</div>" if plan.get('snippet_html') else ""}
                             </div>
                             """,
                             unsafe_allow_html=True
@@ -1384,6 +1434,7 @@ Return the lesson plan in clean Markdown format with proper headings, bullet poi
                         
                         with col_view:
                             if st.button("👁️ View Full Plan", key=f"view_{idx}", use_container_width=True):
+                                plan = get_plan(lesson_plans, plan['_id'], st.session_state.username)
                                 st.session_state.current_plan = {
                                     "subject": plan['subject'],
                                     "topic": plan['topic'],
@@ -1396,6 +1447,7 @@ Return the lesson plan in clean Markdown format with proper headings, bullet poi
                         
                         with col_duplicate:
                             if st.button("📋 Duplicate", key=f"duplicate_{idx}", use_container_width=True):
+                                plan = get_plan(lesson_plans, plan['_id'], st.session_state.username)
                                 new_plan = {
                                     "username": st.session_state.username,
                                     "subject": plan['subject'] + " (Copy)",
@@ -1406,6 +1458,7 @@ Return the lesson plan in clean Markdown format with proper headings, bullet poi
                                     "created_at": datetime.now()
                                 }
                                 lesson_plans.insert_one(new_plan)
+                                invalidate_plan_stats(st.session_state.username)
                                 st.success("✅ Plan duplicated!")
                                 st.rerun()
                         
@@ -1413,75 +1466,49 @@ Return the lesson plan in clean Markdown format with proper headings, bullet poi
                             # Export dropdown
                             export_format = st.selectbox(
                                 "📥 Export",
-                                ["Markdown", "PDF", "Word"],
+                                ["📥 Export as...", "Markdown", "PDF", "Word"],
                                 key=f"export_format_{idx}",
                                 label_visibility="collapsed"
                             )
                             
-                            plan_data_export = {
-                                "subject": plan['subject'],
-                                "topic": plan['topic'],
-                                "grade": plan['grade'],
-                                "duration": plan['duration'],
-                                "content": plan['content'],
-                                "created_at": plan_date
-                            }
-                            
-                            if export_format == "Markdown":
-                                plan_markdown = f"""# {plan['subject']} - {plan['topic']}
-
-**Grade/Level:** {plan['grade']}  
-**Duration:** {plan['duration']}  
-**Created:** {plan_date}
-
----
-
-{plan['content']}
-"""
-                                st.download_button(
-                                    label="📝 Download",
-                                    data=plan_markdown,
-                                    file_name=f"lesson_plan_{plan['subject']}_{plan['topic']}.md",
-                                    mime="text/markdown",
-                                    key=f"download_md_{idx}",
-                                    use_container_width=True
-                                )
-                            elif export_format == "PDF" and REPORTLAB_AVAILABLE:
-                                try:
-                                    pdf_data = generate_pdf(plan_data_export)
-                                    if pdf_data:
-                                        st.download_button(
-                                            label="📄 Download",
-                                            data=pdf_data,
-                                            file_name=f"lesson_plan_{plan['subject']}_{plan['topic']}.pdf",
-                                            mime="application/pdf",
-                                            key=f"download_pdf_{idx}",
-                                            use_container_width=True
-                                        )
-                                except:
-                                    st.button("📄 PDF Error", disabled=True, use_container_width=True, key=f"pdf_err_{idx}")
-                            elif export_format == "Word" and DOCX_AVAILABLE:
-                                try:
-                                    word_data = generate_word_doc(plan_data_export)
-                                    if word_data:
-                                        st.download_button(
-                                            label="📘 Download",
-                                            data=word_data,
-                                            file_name=f"lesson_plan_{plan['subject']}_{plan['topic']}.docx",
-                                            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                                            key=f"download_word_{idx}",
-                                            use_container_width=True
+                            # Plan content is loaded and rendered only when the user prepares a file
+                            if export_format in SAVED_PLAN_EXPORTS:
+                                fmt, mime, label, available = SAVED_PLAN_EXPORTS[export_format]
+                                if available:
+                                    try:
+                                        deferred_download_button(
+                                            label=label,
+                                            render=lambda: build_saved_plan_export(plan['_id'], fmt, plan_date),
+                                            file_name=f"lesson_plan_{plan['subject']}_{plan['topic']}.{fmt}",
+                                            mime=mime,
+                                            key=f"{fmt}_{idx}",
+                                            token=f"{idx}:{fmt}",
+                                            prepare_label="⚙️ Prepare"
                                         )
-                                except:
-                                    st.button("📘 Word Error", disabled=True, use_container_width=True, key=f"word_err_{idx}")
+                                    except Exception:
+                                        st.button(f"{label.split(' ')[0]} Export Error", disabled=True, use_container_width=True, key=f"{fmt}_err_{idx}")
                         
                         with col_delete:
                             if st.button("🗑️ Delete", key=f"delete_{idx}", use_container_width=True):
-                                lesson_plans.delete_one({"_id": plan["_id"]})
+                                lesson_plans.delete_one({"_id": plan["_id"], "username": st.session_state.username})
+                                invalidate_plan_stats(st.session_state.username)
                                 st.success("✅ Plan deleted!")
                                 st.rerun()
                         
                         st.markdown("---")
+                    
+                    # Pagination
+                    col_prev, col_page, col_next = st.columns([1, 2, 1])
+                    with col_prev:
+                        if st.button("⬅️ Previous", use_container_width=True, disabled=len(page_cursors) == 1):
+                            page_cursors.pop()
+                            st.rerun()
+                    with col_page:
+                        st.markdown(f"<p style='text-align: center; color: {text_color};'>Page {len(page_cursors)}</p>", unsafe_allow_html=True)
+                    with col_next:
+                        if st.button("Next ➡️", use_container_width=True, disabled=next_cursor is None):
+                            page_cursors.append(next_cursor)
+                            st.rerun()
                 else:
                     st.info("🔍 No plans match your search criteria. Try adjusting your filters.")
             else:
@@ -1528,40 +1555,12 @@ Return the lesson plan in clean Markdown format with proper headings, bullet poi
         portfolio_url = "https://your-portfolio-website.com"
     
     st.markdown("---")
-    st.markdown(
-        f"""
-        <div class="footer">
-            <div class="footer-content">
-                <div class="footer-section">
-                    <h4>📚 AI Lesson Planner</h4>
-                    <p>Create comprehensive, engaging lesson plans with AI-powered assistance. Perfect for educators at all levels.</p>
-                </div>
-                <div class="footer-section">
-                    <h4>🔗 Quick Links</h4>
-                    <p><a href="#home" style="color: {accent_color};">🏠 Home</a></p>
-                    <p><a href="#create-plan" style="color: {accent_color};">📝 Create Plan</a></p>
-                    <p><a href="#my-plans" style="color: {accent_color};">📚 My Plans</a></p>
-                    <p><a href="#settings" style="color: {accent_color};">⚙️ Settings</a></p>
-                </div>
-                <div class="footer-section">
-                    <h4>💡 Features</h4>
-                    <p>🤖 AI-Powered Generation</p>
-                    <p>📚 Notes & Quiz Creator</p>
-                    <p>📥 Multiple Export Formats</p>
-                    <p>💾 Cloud Storage</p>
-                </div>
-                <div class="footer-section">
-                    <h4>📞 Support & Connect</h4>
-                    <p><a href="{linkedin_url}" target="_blank" style="color: {accent_color}; text-decoration: none;">💼 LinkedIn</a></p>
-                    <p><a href="{github_url}" target="_blank" style="color: {accent_color}; text-decoration: none;">🐙 GitHub</a></p>
-                    <p><a href="mailto:{email}" style="color: {accent_color}; text-decoration: none;">📧 Email</a></p>
-                    <p><a href="{portfolio_url}" target="_blank" style="color: {accent_color}; text-decoration: none;">🌐 Portfolio</a></p>
-                </div>
-            </div>
-            <div class="footer-bottom">
-                <p>© 2024 AI Lesson Planner. All rights reserved. | Made with  for educators worldwide</p>
-            </div>
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
+    st.markdown(footer_html(linkedin_url, github_url, email, portfolio_url), unsafe_allow_html=True)
+
+# --- Admin Timing Panel ---
+if USE_MODULAR_STRUCTURE:
+    rerun_seconds = time.perf_counter() - rerun_started
+    observe("rerun_seconds", rerun_seconds)
+    rerun_trace = end_trace()
+    if st.session_state.logged_in and st.session_state.username in Settings.ADMIN_USERS:
+        timing_panel(rerun_seconds, rerun_trace)
@@ -0,0 +1,7 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# First on sys.path, as under `streamlit run`; nothing under src/utils or src/db may import streamlit
+sys.path.insert(0, ROOT)
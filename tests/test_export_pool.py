@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+
+from conftest import ROOT
+
+# Run the way `streamlit run streamlit.py` does: the repo root first on sys.path,
+# where the app script shadows the streamlit package
+RENDER_IN_POOL = """
+import sys
+sys.path.insert(0, {root!r})
+from src.utils.export import get_export_pool, render_blocking
+
+if __name__ == "__main__":
+    assert get_export_pool() is not None
+    data = render_blocking({{"subject": "Science", "topic": "Plants", "grade": "Grade 5",
+                            "duration": "45 minutes", "content": "# Plants\\n\\n- Leaves", "created_at": "today"}}, "html")
+    print("rendered", b"Plants" in data)
+"""
+
+
+def test_spawned_export_worker_does_not_import_app_script(tmp_path):
+    script = tmp_path / "render.py"
+    script.write_text(RENDER_IN_POOL.format(root=ROOT))
+    result = subprocess.run(
+        [sys.executable, str(script)], cwd=ROOT, capture_output=True, text=True, timeout=120,
+        env={**os.environ, "EXPORT_WORKERS": "1"}
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "rendered True"
@@ -0,0 +1,63 @@
+import os
+import subprocess
+import sys
+import textwrap
+from importlib.util import find_spec
+
+import pytest
+
+from conftest import ROOT
+
+# Run in a fresh interpreter from outside the repo, with the repo appended to sys.path,
+# so `import streamlit` finds the package rather than the app's streamlit.py
+SCRIPT = textwrap.dedent("""
+    import sys
+    sys.path.append({root!r})
+    sys.modules["src"] = None  # the app's `src` imports fail, as without the package
+
+    from datetime import datetime
+    import bcrypt, mongomock, pymongo
+    client = mongomock.MongoClient()
+    pymongo.MongoClient = lambda *args, **kwargs: client
+    db = client["StudentDB"]
+    db.users.insert_one({{"username": "ada", "password": bcrypt.hashpw(b"secret", bcrypt.gensalt(4))}})
+    for i in range(12):
+        db.lesson_plans.insert_one({{"username": "ada", "subject": "Science", "topic": f"Topic {{i}}",
+                                     "grade": "Grade 5", "duration": "45 minutes", "content": "# Plan",
+                                     "created_at": datetime.now()}})
+
+    from streamlit.testing.v1 import AppTest
+
+    def check(at, step):
+        problems = [e.value for e in at.exception] + [e.value for e in at.error]
+        assert not problems, (step, problems)
+
+    at = AppTest.from_file({app!r}, default_timeout=60).run()
+    check(at, "login page")
+    at.text_input(key="login_username").set_value("ada")
+    at.text_input(key="login_password").set_value("secret")
+    [b for b in at.button if b.key == "login_btn"][0].click().run()
+    check(at, "login")
+    assert at.session_state.logged_in and "session_token" not in at.session_state
+    assert [m.value for m in at.metric][:2] == ["12", "12"]
+
+    at.radio[0].set_value("📚 My Plans").run()
+    check(at, "my plans")
+    at.text_input(key="search_plans").set_value("Topic 1").run()
+    check(at, "search")
+    assert any("of 3 matching" in m.value for m in at.markdown)
+
+    [b for b in at.button if "Logout" in b.label][0].click().run()
+    check(at, "logout")
+    assert not at.session_state.logged_in
+    print("ok")
+""")
+
+
+@pytest.mark.skipif(find_spec("mongomock") is None, reason="needs mongomock")
+def test_app_runs_without_src_package(tmp_path):
+    script = tmp_path / "fallback_app.py"
+    script.write_text(SCRIPT.format(root=ROOT, app=os.path.join(ROOT, "streamlit.py")))
+    result = subprocess.run([sys.executable, str(script)], cwd=tmp_path, capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stderr[-3000:]
+    assert result.stdout.strip().endswith("ok")
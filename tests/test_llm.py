@@ -0,0 +1,36 @@
+from src.config.settings import Settings
+from src.utils import llm
+from src.utils.prompts import count_tokens
+
+from test_prompts import make_plan
+
+PART_ANSWER = """# Study Notes
+- {title} explained
+
+# Questions
+### Q
+Type: short answer
+Question: What matters most in {title}?
+Answer: The key idea of {title}.
+"""
+
+
+def test_plan_over_notes_budget_goes_to_map_reduce(monkeypatch):
+    monkeypatch.setattr(Settings, "GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(Settings, "NOTES_PROMPT_MAX_TOKENS", 1000)
+    monkeypatch.setattr(llm, "LLM_Setup", lambda prompt, regenerate=False: "single prompt")
+    prompts = []
+
+    async def fake_async(prompt, regenerate=False):
+        prompts.append(prompt)
+        title = prompt.rsplit("Lesson Plan Part (", 1)[1].split(")", 1)[0]
+        return PART_ANSWER.format(title=title)
+
+    monkeypatch.setattr(llm, "LLM_Setup_Async", fake_async)
+    result = llm.generate_notes_and_quiz(make_plan(8), "Science", "Photosynthesis", "Grade 5")
+
+    assert len(prompts) >= 2
+    assert all(count_tokens(prompt) <= 1000 for prompt in prompts)
+    assert result.startswith("# Study Notes")
+    assert "Main Content point 7" in "".join(prompts)
+    assert "# Answer Key" in result
@@ -0,0 +1,96 @@
+from src.utils.notes import merge_notes_and_quiz, parse_part, parse_questions
+
+
+TEMPLATE_ANSWER = """# Study Notes
+## Key Concepts
+- Chlorophyll absorbs light
+
+# Questions
+### Q
+Type: multiple choice
+Question: What does photosynthesis produce?
+A) Oxygen
+B) Nitrogen
+C) Helium
+D) Argon
+Answer: A) Oxygen - plants release it.
+
+### Q
+Type: short answer
+Question: Why are leaves green?
+Answer: Chlorophyll reflects green light.
+"""
+
+
+def test_parse_questions_template_format():
+    _, questions = parse_part(TEMPLATE_ANSWER, 0)
+    assert [q.kind for q in questions] == ["multiple choice", "short answer"]
+    assert questions[0].text == "What does photosynthesis produce?"
+    assert questions[0].options == ("A) Oxygen", "B) Nitrogen", "C) Helium", "D) Argon")
+    assert questions[0].answer == "A) Oxygen - plants release it."
+
+
+def test_parse_questions_numbered_headers_and_bold_labels():
+    text = """### Q1
+**Type:** multiple choice
+**Question:** What gas do plants take in?
+- A) Oxygen
+- B) Carbon dioxide
+- C) Helium
+- D) Neon
+**Answer:** B) Carbon dioxide
+
+### Q2: Name the green pigment in leaves.
+**Answer:** Chlorophyll
+
+**Question 3:** Discuss why photosynthesis matters for life on Earth.
+**Type:** essay
+**Correct answer:** Food chains, oxygen, carbon cycle.
+"""
+    questions = parse_questions(text, 1)
+    assert [q.kind for q in questions] == ["multiple choice", "short answer", "essay"]
+    assert questions[0].text == "What gas do plants take in?"
+    assert len(questions[0].options) == 4
+    assert questions[1].text == "Name the green pigment in leaves."
+    assert questions[2].answer == "Food chains, oxygen, carbon cycle."
+    assert all(q.part == 1 for q in questions)
+
+
+def test_parse_questions_labels_without_headers():
+    text = "Question: What is light?\nAnswer: Energy.\nQuestion: What is a leaf?\nAnswer: An organ.\n"
+    assert [q.text for q in parse_questions(text, 0)] == ["What is light?", "What is a leaf?"]
+
+
+def test_parse_questions_drops_unanswered():
+    assert parse_questions("### Q\nQuestion: Left open?\n", 0) == []
+
+
+def test_parse_part_splits_notes_from_questions():
+    notes, questions = parse_part(TEMPLATE_ANSWER, 0)
+    assert notes.startswith("## Key Concepts")
+    assert "Question" not in notes
+    assert len(questions) == 2
+
+
+def test_parse_part_without_section_headings():
+    notes, questions = parse_part("Some notes.\n\n**Q1.** What is light?\n**Answer:** Energy.\n", 0)
+    assert notes == "Some notes."
+    assert [q.text for q in questions] == ["What is light?"]
+
+
+def test_merge_dedupes_and_numbers_answer_key():
+    merged = merge_notes_and_quiz([("Part A", TEMPLATE_ANSWER), ("Part B", TEMPLATE_ANSWER)])
+    assert merged.startswith("# Study Notes")
+    assert merged.count("What does photosynthesis produce?") == 1
+    assert merged.count("- Chlorophyll absorbs light") == 1
+    assert "## Part A" in merged
+    key = merged.split("# Answer Key", 1)[1]
+    assert "1. A) Oxygen - plants release it." in key
+    assert "2. Chlorophyll reflects green light." in key
+
+
+def test_merge_falls_back_to_raw_output_without_questions():
+    merged = merge_notes_and_quiz([("Part A", "# Study Notes\nOnly notes here.")])
+    assert "# Answer Key" not in merged
+    assert "Only notes here." in merged
+    assert merged.startswith("# Part A")
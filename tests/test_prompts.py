@@ -0,0 +1,36 @@
+from src.config.settings import Settings
+from src.utils.prompts import _compact, build_notes_quiz_prompt, count_tokens, notes_fit_one_prompt, split_sections
+
+SECTIONS = [
+    "Lesson Overview", "Learning Objectives", "Materials Needed", "Introduction/Warm-up", "Main Content",
+    "YouTube Videos & Resources", "Interactive Activities", "Assessment/Evaluation", "Homework/Extension Activities",
+]
+
+
+def make_plan(lines_per_section):
+    """A plan in the layout LESSON_PLAN_TEMPLATE asks for"""
+    plan = ["# Lesson Plan: Photosynthesis", ""]
+    for title in SECTIONS:
+        plan += [f"## {title}", ""]
+        plan += [f"- {title} point {i}: plants turn light, water and carbon dioxide into glucose and oxygen."
+                 for i in range(lines_per_section)]
+        plan.append("")
+    return "\n".join(plan)
+
+
+def test_normal_plan_keeps_ranked_sections_whole():
+    plan = make_plan(8)
+    assert 1200 < count_tokens(plan) < 3000
+    prompt = build_notes_quiz_prompt(plan, "Science", "Photosynthesis", "Grade 5")
+    ranked = ("Lesson Overview", "Learning Objectives", "Introduction/Warm-up", "Main Content",
+              "Interactive Activities", "Assessment/Evaluation")
+    for title, text in split_sections(plan):
+        if title in ranked:
+            assert _compact(text) in prompt, title
+
+
+def test_plan_over_notes_budget_needs_map_reduce(monkeypatch):
+    plan = make_plan(8)
+    assert notes_fit_one_prompt(plan, "Science", "Photosynthesis", "Grade 5")
+    monkeypatch.setattr(Settings, "NOTES_PROMPT_MAX_TOKENS", 1000)
+    assert not notes_fit_one_prompt(plan, "Science", "Photosynthesis", "Grade 5")
@@ -0,0 +1,22 @@
+import subprocess
+import sys
+
+from conftest import ROOT
+
+
+def test_manage_indexes_help():
+    # Run from the repo root, where streamlit.py would shadow the package if src.db pulled it in
+    result = subprocess.run(
+        [sys.executable, "scripts/manage_indexes.py", "--help"], cwd=ROOT, capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
+    assert "ensure" in result.stdout
+
+
+def test_db_package_loads_only_metrics_from_utils():
+    result = subprocess.run(
+        [sys.executable, "-c", "import sys, src.db; print(sorted(m for m in sys.modules if m.startswith('src.utils')))"],
+        cwd=ROOT, capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "['src.utils', 'src.utils.metrics']"